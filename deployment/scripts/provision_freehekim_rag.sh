@@ -94,6 +94,8 @@ fi
 echo "[+] Ensuring Qdrant data dir /srv/qdrant exists"
 mkdir -p /srv/qdrant
 chown -R "$TARGET_USER":"docker" /srv/qdrant || chown -R "$TARGET_USER":"$TARGET_USER" /srv/qdrant || true
+mkdir -p /srv/freehekim-rag/local-index /srv/freehekim-rag/keyword-index
+chown -R "$TARGET_USER":"$TARGET_USER" /srv/freehekim-rag/local-index /srv/freehekim-rag/keyword-index || true
 
 # 3) Install systemd units from templates
 SYSTEMD_DIR_TPL="$REPO_DIR/deployment/systemd"
@@ -107,7 +109,7 @@ WORKDIR_ESC="$(printf '%s' "$REPO_DIR" | sed -e 's/[\/&]/\\&/g')"
 USER_ESC="$(printf '%s' "$TARGET_USER" | sed -e 's/[\/&]/\\&/g')"
 ENV_ESC="$(printf '%s' "$ENV_FILE" | sed -e 's/[\/&]/\\&/g')"
 
-for unit in freehekim-rag.service freehekim-rag-health-monitor.service freehekim-rag-health-monitor.timer freehekim-rag-backup.service freehekim-rag-backup.timer; do
+for unit in freehekim-rag.service freehekim-rag-health-monitor.service freehekim-rag-health-monitor.timer freehekim-rag-backup.service freehekim-rag-backup.timer freehekim-rag-local-index.service freehekim-rag-local-index.timer; do
   src="$SYSTEMD_DIR_TPL/$unit"
   dst="/etc/systemd/system/$unit"
   if [ -f "$src" ]; then
@@ -124,6 +126,7 @@ systemctl daemon-reload
 systemctl enable freehekim-rag.service
 systemctl enable freehekim-rag-health-monitor.timer || true
 systemctl enable freehekim-rag-backup.timer || true
+systemctl enable freehekim-rag-local-index.timer || true
 
 # 4) Ensure deployment scripts are executable for manual runs
 echo "[+] Ensuring deployment scripts are executable"
@@ -133,4 +136,5 @@ echo "[+] You can start services now:"
 echo "    systemctl start freehekim-rag.service"
 echo "    systemctl start freehekim-rag-health-monitor.timer  # optional"
 echo "    systemctl start freehekim-rag-backup.timer          # optional"
+echo "    systemctl start freehekim-rag-local-index.timer     # optional (LOCAL_INDEX_ENABLED)"
 echo "[✓] Provisioning complete. Remember to edit $ENV_FILE"
@@ -5,12 +5,14 @@ FastAPI application providing Retrieval-Augmented Generation endpoints
 for medical content search and question-answering.
 """
 
+import json
 import logging
 import time
 import uuid
 from collections import defaultdict, deque
+from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
-from typing import Any
+from typing import Any, Literal
 
 from prometheus_fastapi_instrumentator import Instrumentator
 from pydantic import BaseModel, Field, field_validator
@@ -20,8 +22,11 @@ from starlette.types import ASGIApp
 from config import Settings
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from rag.pipeline import retrieve_answer
+from fastapi.responses import JSONResponse, StreamingResponse
+from rag.context import get_encoding
+from rag.executor import run_blocking
+from rag.pipeline import aretrieve_answer, ashutdown, astream_answer
+from rag.rerank import get_reranker
 
 # Configure logging (plain or JSON)
 logging.basicConfig(level=logging.INFO)
@@ -63,11 +68,16 @@ async def _lifespan(app: FastAPI):
     logger.info(f"🚀 FreeHekim RAG API starting in {settings.env} mode")
     logger.info(f"📊 Qdrant: {settings.qdrant_host}:{settings.qdrant_port}")
     logger.info(f"🤖 Embedding provider: {settings.embed_provider}")
+    # Load the tokenizer (and the cross-encoder) now rather than on the first request
+    await run_blocking(get_encoding)
+    if settings.rerank_enabled:
+        await run_blocking(get_reranker)
     try:
         yield
     finally:
         # Shutdown
         logger.info("🛑 FreeHekim RAG API shutting down")
+        await ashutdown()
 
 
 app = FastAPI(
@@ -244,6 +254,13 @@ class RAGQueryRequest(BaseModel):
         description="User question (3-500 characters)",
         examples=["Diyabet belirtileri nelerdir?"],
     )
+    profile: Literal["fast", "accurate"] | None = Field(
+        default=None,
+        description=(
+            'Search latency budget: "fast" (lower HNSW ef, no rescoring) or "accurate" '
+            "(higher ef, oversampled + rescored); omitted = configured defaults"
+        ),
+    )
 
     @field_validator("q")
     @classmethod
@@ -276,6 +293,15 @@ class RAGQueryResponse(BaseModel):
 # ============================================================================
 
 
+def _check_api_key(raw: Request) -> None:
+    """Enforce the optional X-Api-Key protection for RAG endpoints."""
+    if settings.require_api_key:
+        provided = raw.headers.get("x-api-key") or raw.headers.get("X-Api-Key")
+        expected = settings.get_api_key()
+        if not expected or not provided or provided != expected:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+
 @app.get("/health", response_model=HealthResponse, tags=["Health"], summary="Health check endpoint")
 def health() -> HealthResponse:
     """
@@ -353,7 +379,7 @@ def ready() -> ReadinessResponse | JSONResponse:
         500: {"description": "Internal server error"},
     },
 )
-def rag_query(request: RAGQueryRequest, raw: Request) -> RAGQueryResponse:
+async def rag_query(request: RAGQueryRequest, raw: Request) -> RAGQueryResponse:
     """
     Query the RAG pipeline to get AI-generated answers from medical knowledge base.
 
@@ -373,20 +399,17 @@ def rag_query(request: RAGQueryRequest, raw: Request) -> RAGQueryResponse:
     **Example:**
         ```json
         {
-          "q": "Metformin yan etkileri nelerdir?"
+          "q": "Metformin yan etkileri nelerdir?",
+          "profile": "fast"
         }
         ```
     """
-    try:
-        # Optional API key check
-        if settings.require_api_key:
-            provided = raw.headers.get("x-api-key") or raw.headers.get("X-Api-Key")
-            expected = settings.get_api_key()
-            if not expected or not provided or provided != expected:
-                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+    # Optional API key check
+    _check_api_key(raw)
 
+    try:
         logger.info(f"Received RAG query: {request.q[:50]}...")
-        result = retrieve_answer(request.q)
+        result = await aretrieve_answer(request.q, profile=request.profile)
         return RAGQueryResponse(**result)
     except ValueError as e:
         logger.error(f"Validation error: {e}")
@@ -399,6 +422,50 @@ def rag_query(request: RAGQueryRequest, raw: Request) -> RAGQueryResponse:
         ) from e
 
 
+def _sse_event(event: str, data: dict[str, Any]) -> str:
+    """Serialize one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _sse_stream(q: str, profile: str | None = None) -> AsyncIterator[str]:
+    async for item in astream_answer(q, profile=profile):
+        yield _sse_event(item["event"], item["data"])
+
+
+@app.post(
+    "/rag/query/stream",
+    tags=["RAG"],
+    summary="Query medical knowledge base (Server-Sent Events)",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Event stream: sources, token..., done (or error)",
+            "content": {"text/event-stream": {}},
+        },
+        400: {"description": "Invalid request"},
+    },
+)
+async def rag_query_stream(request: RAGQueryRequest, raw: Request) -> StreamingResponse:
+    """
+    Streaming variant of `/rag/query` using Server-Sent Events.
+
+    **Events:**
+    - `sources`: question, source previews and retrieval metadata, sent as soon
+      as fusion finishes (before the LLM call)
+    - `token`: `{"text": "..."}` answer fragments as the LLM produces them
+    - `done`: `tokens_used`, `model` and `disclaimer_appended`
+    - `error`: pipeline failure (same fields as the `/rag/query` error response)
+    """
+    _check_api_key(raw)
+
+    logger.info(f"Received RAG stream query: {request.q[:50]}...")
+    return StreamingResponse(
+        _sse_stream(request.q, request.profile),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ============================================================================
 # Startup/Shutdown Events
 # ============================================================================
@@ -7,7 +7,7 @@ Supports both .env files and environment variables.
 
 import inspect
 import os
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import AliasChoices, Field, SecretStr, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -44,6 +44,27 @@ class Settings(BaseSettings):
         default="openai", description="Embedding generation provider"
     )
 
+    # Local embedding model (EMBED_PROVIDER=bge-m3, ONNX Runtime on CPU, offline)
+    local_embed_model_dir: str = Field(
+        default="models/bge-m3",
+        description="Directory with model.onnx (or onnx/model.onnx) and tokenizer.json",
+    )
+    local_embed_threads: int = Field(
+        default=4, ge=1, le=64, description="ONNX Runtime intra-op threads per inference"
+    )
+    local_embed_max_length: int = Field(
+        default=512, ge=8, le=8192, description="Max tokens per text (longer input is truncated)"
+    )
+    local_embed_max_batch_size: int = Field(
+        default=32, ge=1, le=512, description="Max texts per local inference batch"
+    )
+    local_embed_max_batch_tokens: int = Field(
+        default=8192,
+        ge=64,
+        le=262144,
+        description="Padded-token budget per local batch (texts x longest text)",
+    )
+
     # OpenAI Configuration
     openai_api_key: SecretStr | None = Field(default=None, description="OpenAI API key")
     openai_embedding_model: str = Field(
@@ -79,20 +100,174 @@ class Settings(BaseSettings):
     qdrant_timeout: float = Field(
         default=10.0, ge=0.1, description="Qdrant client timeout in seconds"
     )
+    qdrant_prefer_grpc: bool = Field(
+        default=False, description="Use the gRPC transport (protobuf) instead of REST/JSON"
+    )
+    qdrant_grpc_port: int = Field(
+        default=6334, ge=1, le=65535, description="Qdrant gRPC port (used when QDRANT_PREFER_GRPC)"
+    )
+    qdrant_quantization_rescore: bool = Field(
+        default=True,
+        description="Re-score quantized candidates with the original vectors (quantized collections)",
+    )
+    qdrant_quantization_oversampling: float | None = Field(
+        default=None,
+        ge=1.0,
+        le=10.0,
+        description="Fetch limit x oversampling quantized candidates before rescoring (unset = 1)",
+    )
 
     # RAG pipeline tuning
     search_topk: int = Field(
         default=5, ge=1, le=100, description="Top-K results to retrieve per collection"
     )
+    search_extra_collections: list[str] = Field(
+        default_factory=list,
+        description='Additional Qdrant collections the API may query (JSON list, e.g. ["col_a"])',
+    )
+    search_fusion_collections: list[str] = Field(
+        default_factory=list,
+        description="Extra collections searched for every question and fused with internal/external",
+    )
+    rrf_k: int = Field(
+        default=60, ge=0, le=1000, description="Reciprocal-Rank Fusion constant (higher = flatter)"
+    )
+    rrf_weights: dict[str, float] = Field(
+        default_factory=dict,
+        description=(
+            "RRF weight per source (internal, external or a fusion collection; default 1.0), "
+            'JSON, e.g. {"external": 0.5}'
+        ),
+    )
+    mmr_enabled: bool = Field(
+        default=False,
+        description="Re-rank fused hits with Maximal Marginal Relevance to drop near-duplicates",
+    )
+    mmr_lambda: float = Field(
+        default=0.7,
+        ge=0.0,
+        le=1.0,
+        description="MMR trade-off: 1.0 = fused relevance only, 0.0 = diversity only",
+    )
+    mmr_candidates: int = Field(
+        default=20,
+        ge=1,
+        le=100,
+        description="Fused hits (fetched with vectors) MMR chooses the context chunks from",
+    )
+    # Cross-encoder reranker (rag/rerank.py, ONNX Runtime on CPU, offline)
+    rerank_enabled: bool = Field(
+        default=False, description="Re-score the top fused hits with a local cross-encoder"
+    )
+    rerank_model_dir: str = Field(
+        default="models/reranker",
+        description="Directory with model.onnx (or onnx/model.onnx) and tokenizer.json",
+    )
+    rerank_candidates: int = Field(
+        default=20, ge=1, le=100, description="Top fused hits scored by the reranker"
+    )
+    rerank_context_chunks: int = Field(
+        default=0,
+        ge=0,
+        le=20,
+        description="Context chunks sent to the LLM after reranking (0 = PIPELINE_MAX_CONTEXT_CHUNKS)",
+    )
+    rerank_budget_seconds: float = Field(
+        default=0.3,
+        ge=0.01,
+        le=10.0,
+        description="Per-request reranking time budget; on expiry the RRF order is kept",
+    )
+    rerank_threads: int = Field(
+        default=4, ge=1, le=64, description="ONNX Runtime intra-op threads for the reranker"
+    )
+    rerank_max_length: int = Field(
+        default=256, ge=16, le=8192, description="Max tokens per (question, chunk) pair"
+    )
+    search_hnsw_ef: int | None = Field(
+        default=None,
+        ge=1,
+        le=4096,
+        description="HNSW ef at search time (higher = better recall, slower; unset = server default)",
+    )
+    search_exact: bool = Field(
+        default=False, description="Bypass HNSW and search exhaustively (small collections, debug)"
+    )
+    search_score_threshold: float | None = Field(
+        default=None, description="Drop hits scoring below this value (unset = keep all)"
+    )
+    search_collection_params: dict[str, dict[str, Any]] = Field(
+        default_factory=dict,
+        description=(
+            "Per-collection overrides of hnsw_ef / exact / rescore / oversampling / "
+            'score_threshold (JSON, e.g. {"freehekim_external": {"hnsw_ef": 64}})'
+        ),
+    )
+    search_fast_hnsw_ef: int = Field(
+        default=32, ge=1, le=4096, description='HNSW ef for the "fast" request profile'
+    )
+    search_fast_rescore: bool = Field(
+        default=False,
+        description='Re-score quantized candidates in the "fast" profile (false = skip originals)',
+    )
+    search_accurate_hnsw_ef: int = Field(
+        default=256, ge=1, le=4096, description='HNSW ef for the "accurate" request profile'
+    )
+    search_accurate_oversampling: float = Field(
+        default=2.0,
+        ge=1.0,
+        le=10.0,
+        description='Quantization oversampling for the "accurate" profile (always rescored)',
+    )
+    search_payload_fields: list[str] = Field(
+        default_factory=lambda: ["text", "metadata", "ingested_at"],
+        description="Payload keys returned by searches (JSON list; empty = full payload)",
+    )
+    # Local fallback index (rag/local_index.py, tools/local_index_export.py)
+    local_index_enabled: bool = Field(
+        default=False,
+        description="Serve INTERNAL from the local index when Qdrant errors or is too slow",
+    )
+    local_index_path: str = Field(
+        default="data/local-index/internal",
+        description="Directory written by tools/local_index_export.py",
+    )
+    local_index_latency_budget_seconds: float | None = Field(
+        default=1.5,
+        ge=0.05,
+        le=30.0,
+        description="Fall back when Qdrant search takes longer than this (unset = errors only)",
+    )
+    # BM25 keyword index (rag/keyword_index.py, tools/keyword_index_build.py)
+    keyword_index_enabled: bool = Field(
+        default=False,
+        description='Search the local BM25 index with every question and fuse it as "keyword"',
+    )
+    keyword_index_path: str = Field(
+        default="data/keyword-index/bm25",
+        description="Directory written by tools/keyword_index_build.py / ingest.py --keyword-index",
+    )
     pipeline_max_context_chunks: int = Field(
         default=5, ge=1, le=20, description="Max number of context chunks to feed LLM"
     )
+    pipeline_prompt_token_budget: int = Field(
+        default=2000,
+        ge=500,
+        le=128000,
+        description="Prompt tokens per answer (instructions + question + packed context)",
+    )
     pipeline_max_source_display: int = Field(
         default=3, ge=1, le=10, description="Max number of sources to include in response"
     )
     pipeline_max_source_text_length: int = Field(
         default=200, ge=50, le=2000, description="Max characters per source preview"
     )
+    pipeline_executor_workers: int = Field(
+        default=8,
+        ge=1,
+        le=64,
+        description="Worker threads shared by blocking pipeline steps (app lifespan scoped)",
+    )
 
     # Basic protections
     rate_limit_per_minute: int = Field(
@@ -110,6 +285,63 @@ class Settings(BaseSettings):
     cache_max_entries: int = Field(
         default=256, ge=1, le=10000, description="Maximum number of cached responses to keep"
     )
+    enable_request_coalescing: bool = Field(
+        default=True,
+        description="Share one in-flight pipeline run between identical concurrent queries",
+    )
+    embedding_batch_enabled: bool = Field(
+        default=True, description="Merge concurrent query embeddings into one provider request"
+    )
+    embedding_batch_window_ms: float = Field(
+        default=5.0, ge=0.0, le=100.0, description="Micro-batch collection window (ms)"
+    )
+    embedding_batch_max_items: int = Field(
+        default=32, ge=1, le=2048, description="Texts that flush a micro-batch immediately"
+    )
+    embedding_batch_concurrency: int = Field(
+        default=4, ge=1, le=32, description="In-flight requests for bulk embed_batch calls"
+    )
+    embedding_batch_max_tokens: int = Field(
+        default=100_000,
+        ge=1000,
+        le=300_000,
+        description="Estimated input tokens per bulk embeddings request",
+    )
+    embedding_batch_max_retries: int = Field(
+        default=5, ge=0, le=20, description="Retries per bulk batch (rate limits, 5xx)"
+    )
+    embedding_cache_enabled: bool = Field(
+        default=True, description="Cache query embeddings in memory (LRU + TTL)"
+    )
+    embedding_cache_ttl_seconds: int = Field(
+        default=3600, ge=10, le=604800, description="TTL for cached embeddings (seconds)"
+    )
+    embedding_cache_max_entries: int = Field(
+        default=2048, ge=1, le=100000, description="Maximum number of cached embeddings"
+    )
+    semantic_cache_enabled: bool = Field(
+        default=False,
+        description="Serve cached responses for questions with near-identical embeddings",
+    )
+    semantic_cache_threshold: float = Field(
+        default=0.95,
+        ge=0.5,
+        le=1.0,
+        description="Minimum cosine similarity for a semantic cache hit",
+    )
+    semantic_cache_max_entries: int = Field(
+        default=256, ge=1, le=10000, description="Maximum number of semantic cache entries"
+    )
+    generation_cache_enabled: bool = Field(
+        default=True,
+        description="Reuse LLM answers for equivalent questions over the same context points",
+    )
+    generation_cache_ttl_seconds: int = Field(
+        default=3600, ge=10, le=604800, description="TTL for cached generations (seconds)"
+    )
+    generation_cache_max_entries: int = Field(
+        default=1024, ge=1, le=100000, description="Maximum number of cached generations"
+    )
 
     # Simple API key protection for /rag/query
     require_api_key: bool = Field(
@@ -174,6 +406,18 @@ class Settings(BaseSettings):
         """Get plain text Qdrant API key"""
         return self.qdrant_api_key.get_secret_value() if self.qdrant_api_key else None
 
+    def get_qdrant_client_kwargs(self, host: str | None = None) -> dict[str, Any]:
+        """Connection arguments shared by QdrantClient and AsyncQdrantClient"""
+        return {
+            "host": host or self.qdrant_host,
+            "port": self.qdrant_port,
+            "grpc_port": self.qdrant_grpc_port,
+            "prefer_grpc": self.qdrant_prefer_grpc,
+            "api_key": self.get_qdrant_api_key(),
+            "https": self.use_https,
+            "timeout": self.qdrant_timeout,
+        }
+
     def get_openai_api_key(self) -> str | None:
         """Get plain text OpenAI API key"""
         return self.openai_api_key.get_secret_value() if self.openai_api_key else None
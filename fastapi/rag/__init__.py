@@ -5,17 +5,31 @@ Retrieval-Augmented Generation pipeline for medical content search and Q&A.
 Combines vector search (Qdrant) with large language models (OpenAI GPT-4).
 """
 
-from .client_qdrant import EXTERNAL, INTERNAL, search
-from .embeddings import embed, embed_batch, get_embedding_dimension
-from .pipeline import generate_answer, reciprocal_rank_fusion, retrieve_answer
+from .client_qdrant import EXTERNAL, INTERNAL, asearch, search
+from .embeddings import aembed, embed, embed_batch, get_embedding_dimension
+from .fusion import fuse_rankings
+from .mmr import mmr_select
+from .pipeline import (
+    agenerate_answer,
+    aretrieve_answer,
+    generate_answer,
+    reciprocal_rank_fusion,
+    retrieve_answer,
+)
 
 __all__ = [
     "EXTERNAL",
     "INTERNAL",
+    "aembed",
+    "agenerate_answer",
+    "aretrieve_answer",
+    "asearch",
     "embed",
     "embed_batch",
+    "fuse_rankings",
     "generate_answer",
     "get_embedding_dimension",
+    "mmr_select",
     "reciprocal_rank_fusion",
     "retrieve_answer",
     "search",
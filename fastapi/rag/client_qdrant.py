@@ -4,15 +4,25 @@ Qdrant Vector Database Client
 Manages connection and search operations for FreeHekim vector collections.
 """
 
+import asyncio
 import logging
 import time
-from typing import Any
-
-from qdrant_client import QdrantClient
-from qdrant_client.models import ScoredPoint
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    QuantizationSearchParams,
+    QueryRequest,
+    ScoredPoint,
+    SearchParams,
+)
 
 from config import Settings
 
+from .executor import get_executor
+
 logger = logging.getLogger(__name__)
 
 # Initialize settings
@@ -22,9 +32,28 @@ settings = Settings()
 INTERNAL = "freehekim_internal"  # Internal FreeHekim articles
 EXTERNAL = "freehekim_external"  # External medical knowledge
 
+# Blue/green builds are named "<alias>__v<version>" (see rag.reindex)
+VERSION_SEPARATOR = "__v"
+
+T = TypeVar("T")
+
 # Global Qdrant client instance
 _qdrant: QdrantClient | None = None
 
+# Async Qdrant client, bound to the event loop it was created on
+_async_qdrant: AsyncQdrantClient | None = None
+_async_qdrant_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _describe_transport() -> str:
+    """Human-readable endpoint summary for connection logs."""
+    if settings.qdrant_prefer_grpc:
+        return (
+            f"{settings.qdrant_host}:{settings.qdrant_grpc_port} "
+            f"(gRPC, TLS: {settings.use_https})"
+        )
+    return f"{settings.qdrant_host}:{settings.qdrant_port} (HTTPS: {settings.use_https})"
+
 
 def get_qdrant_client() -> QdrantClient:
     """
@@ -40,18 +69,9 @@ def get_qdrant_client() -> QdrantClient:
 
     if _qdrant is None:
         try:
-            logger.info(
-                f"Connecting to Qdrant: {settings.qdrant_host}:{settings.qdrant_port} "
-                f"(HTTPS: {settings.use_https})"
-            )
+            logger.info(f"Connecting to Qdrant: {_describe_transport()}")
 
-            _qdrant = QdrantClient(
-                host=settings.qdrant_host,
-                port=settings.qdrant_port,
-                api_key=settings.get_qdrant_api_key(),
-                https=settings.use_https,
-                timeout=settings.qdrant_timeout,  # Connection timeout (configurable)
-            )
+            _qdrant = QdrantClient(**settings.get_qdrant_client_kwargs())
 
             # Verify connection
             _qdrant.get_collections()
@@ -64,6 +84,295 @@ def get_qdrant_client() -> QdrantClient:
     return _qdrant
 
 
+async def get_async_qdrant_client() -> AsyncQdrantClient:
+    """
+    Get or create the async Qdrant client for the running event loop.
+
+    Both transports (httpx pool for REST, grpc.aio channel for gRPC) are bound
+    to one event loop, so a new client is created when called from another loop.
+
+    Returns:
+        AsyncQdrantClient: Configured async Qdrant client
+
+    Raises:
+        ConnectionError: If Qdrant connection fails
+    """
+    global _async_qdrant, _async_qdrant_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_qdrant is None or _async_qdrant_loop is not loop:
+        try:
+            logger.info(f"Connecting to Qdrant (async): {_describe_transport()}")
+
+            client = AsyncQdrantClient(**settings.get_qdrant_client_kwargs())
+
+            # Verify connection
+            await client.get_collections()
+            _async_qdrant = client
+            _async_qdrant_loop = loop
+            logger.info("✅ Async Qdrant connection established")
+
+        except Exception as e:
+            logger.error(f"❌ Failed to connect to Qdrant: {e}")
+            raise ConnectionError(f"Qdrant connection failed: {e}") from e
+
+    return _async_qdrant
+
+
+async def aclose_qdrant_client() -> None:
+    """Close the async Qdrant client if it belongs to the running event loop."""
+    global _async_qdrant, _async_qdrant_loop
+
+    if _async_qdrant is not None and _async_qdrant_loop is asyncio.get_running_loop():
+        try:
+            await _async_qdrant.close()
+        except Exception:
+            logger.debug("Async Qdrant client close failed", exc_info=True)
+    _async_qdrant = None
+    _async_qdrant_loop = None
+
+
+@dataclass(slots=True, frozen=True)
+class SearchPlanItem:
+    """
+    One query of a multi-collection search plan (see :func:`search_many`).
+
+    Attributes:
+        collection: Collection (or alias) to query
+        limit: Number of results to return
+        score_threshold: Minimum similarity score (optional)
+        name: Key for this item's results; defaults to the collection name
+        profile: Latency profile ("fast" / "accurate"); None = configured defaults
+        with_vectors: Also return each hit's stored vector (e.g. for MMR)
+    """
+
+    collection: str
+    limit: int = 5
+    score_threshold: float | None = None
+    name: str | None = None
+    profile: str | None = None
+    with_vectors: bool = False
+
+    @property
+    def key(self) -> str:
+        return self.name or self.collection
+
+
+def allowed_collections() -> list[str]:
+    """Collections the API may query: INTERNAL, EXTERNAL and any configured extras."""
+    return [
+        INTERNAL,
+        EXTERNAL,
+        *settings.search_extra_collections,
+        *settings.search_fusion_collections,
+    ]
+
+
+def base_collection(name: str) -> str:
+    """Alias a versioned build collection serves (``name`` itself if unversioned)."""
+    return name.split(VERSION_SEPARATOR, 1)[0]
+
+
+def _validate_search(collection: str, topk: int) -> None:
+    allowed = allowed_collections()
+    if collection not in allowed:
+        raise ValueError(
+            f"Invalid collection: {collection}. Must be one of: {', '.join(repr(c) for c in allowed)}"
+        )
+
+    if topk < 1 or topk > 100:
+        raise ValueError(f"topk must be between 1 and 100, got {topk}")
+
+
+def payload_selector() -> list[str] | bool:
+    """
+    Payload projection for searches.
+
+    Returns the configured ``SEARCH_PAYLOAD_FIELDS`` so Qdrant only sends
+    the keys the pipeline reads, or True (full payload) when the list is empty.
+    """
+    return list(settings.search_payload_fields) or True
+
+
+@dataclass(frozen=True, slots=True)
+class SearchTuning:
+    """
+    Search-time knobs for one collection and profile.
+
+    Attributes:
+        hnsw_ef: HNSW candidate list size (None = server default)
+        exact: Exhaustive search instead of HNSW
+        rescore: Re-score quantized candidates with the original vectors
+        oversampling: Quantized candidates fetched per result before rescoring
+        score_threshold: Default minimum score when a search passes none
+    """
+
+    hnsw_ef: int | None = None
+    exact: bool = False
+    rescore: bool = True
+    oversampling: float | None = None
+    score_threshold: float | None = None
+
+    def search_params(self) -> SearchParams | None:
+        """Qdrant ``SearchParams``, or None when everything is at server defaults."""
+        quantization = None
+        if not self.rescore or self.oversampling is not None:
+            quantization = QuantizationSearchParams(
+                rescore=self.rescore, oversampling=self.oversampling
+            )
+        if self.hnsw_ef is None and not self.exact and quantization is None:
+            return None
+        return SearchParams(hnsw_ef=self.hnsw_ef, exact=self.exact, quantization=quantization)
+
+
+SEARCH_PROFILES = ("fast", "accurate")
+_TUNING_KEYS = frozenset(SearchTuning.__dataclass_fields__)
+
+
+def search_tuning(collection: str | None = None, profile: str | None = None) -> SearchTuning:
+    """
+    Resolve search parameters: global settings, then the collection's
+    ``SEARCH_COLLECTION_PARAMS`` entry, then the request profile.
+
+    - ``fast``: small ``hnsw_ef``, quantized scores used as-is (no rescoring)
+    - ``accurate``: large ``hnsw_ef``, oversampled and rescored candidates
+
+    Raises:
+        ValueError: If the profile or a per-collection key is unknown
+    """
+    if profile is not None and profile not in SEARCH_PROFILES:
+        raise ValueError(f"Invalid search profile: {profile}. Must be one of: {SEARCH_PROFILES}")
+
+    values: dict[str, Any] = {
+        "hnsw_ef": settings.search_hnsw_ef,
+        "exact": settings.search_exact,
+        "rescore": settings.qdrant_quantization_rescore,
+        "oversampling": settings.qdrant_quantization_oversampling,
+        "score_threshold": settings.search_score_threshold,
+    }
+    if collection is not None:
+        overrides = settings.search_collection_params.get(base_collection(collection), {})
+        unknown = set(overrides) - _TUNING_KEYS
+        if unknown:
+            raise ValueError(f"Unknown search params for {collection}: {sorted(unknown)}")
+        values.update(overrides)
+    if profile == "fast":
+        values.update(
+            hnsw_ef=settings.search_fast_hnsw_ef,
+            exact=False,
+            rescore=settings.search_fast_rescore,
+            oversampling=None,
+        )
+    elif profile == "accurate":
+        values.update(
+            hnsw_ef=settings.search_accurate_hnsw_ef,
+            rescore=True,
+            oversampling=settings.search_accurate_oversampling,
+        )
+    return SearchTuning(**values)
+
+
+def search_params(collection: str | None = None, profile: str | None = None) -> SearchParams | None:
+    """
+    Qdrant search parameters for ``collection`` under ``profile``, or None to
+    use server defaults. Quantization settings are ignored by collections
+    without quantization.
+    """
+    return search_tuning(collection, profile).search_params()
+
+
+def _query_kwargs(vector: list[float], item: SearchPlanItem) -> dict[str, Any]:
+    """Keyword arguments for ``query_points`` (single request)."""
+    tuning = search_tuning(item.collection, item.profile)
+    params: dict[str, Any] = {
+        "collection_name": item.collection,
+        "query": vector,
+        "limit": item.limit,
+        "with_payload": payload_selector(),
+        "with_vectors": item.with_vectors,
+    }
+    threshold = item.score_threshold if item.score_threshold is not None else tuning.score_threshold
+    if threshold is not None:
+        params["score_threshold"] = threshold
+    search = tuning.search_params()
+    if search is not None:
+        params["search_params"] = search
+    return params
+
+
+def _query_request(vector: list[float], item: SearchPlanItem) -> QueryRequest:
+    """Request body for ``query_batch_points`` (several requests, one round trip)."""
+    tuning = search_tuning(item.collection, item.profile)
+    threshold = item.score_threshold if item.score_threshold is not None else tuning.score_threshold
+    return QueryRequest(
+        query=vector,
+        limit=item.limit,
+        score_threshold=threshold,
+        params=tuning.search_params(),
+        with_payload=payload_selector(),
+        with_vector=item.with_vectors,
+    )
+
+
+def _group_plan(plan: Sequence[SearchPlanItem]) -> dict[str, list[SearchPlanItem]]:
+    """Validate a plan and group its items by collection, preserving order."""
+    groups: dict[str, list[SearchPlanItem]] = {}
+    seen: set[str] = set()
+    for item in plan:
+        _validate_search(item.collection, item.limit)
+        search_tuning(item.collection, item.profile)  # reject bad profiles before any I/O
+        if item.key in seen:
+            raise ValueError(f"Duplicate search plan key: {item.key}")
+        seen.add(item.key)
+        groups.setdefault(item.collection, []).append(item)
+    return groups
+
+
+def _with_retries(fn: Callable[[], T], collection: str, retries: int, backoff: float) -> T:
+    """Call ``fn`` retrying transient errors with exponential backoff."""
+    last_exc: Exception | None = None
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:  # retry on transient errors
+            last_exc = e
+            if attempt < retries:
+                sleep_for = backoff * (2**attempt)
+                logger.warning(
+                    f"Qdrant search error in {collection} (attempt {attempt+1}/{retries}), "
+                    f"retrying in {sleep_for:.2f}s: {e}"
+                )
+                time.sleep(sleep_for)
+
+    if last_exc is not None:
+        raise last_exc
+    # Defensive: should not happen, but avoid `assert` in production code
+    raise RuntimeError("Qdrant search failed for unknown reason")
+
+
+async def _awith_retries(
+    fn: Callable[[], Awaitable[T]], collection: str, retries: int, backoff: float
+) -> T:
+    """Async variant of :func:`_with_retries`."""
+    last_exc: Exception | None = None
+    for attempt in range(retries + 1):
+        try:
+            return await fn()
+        except Exception as e:  # retry on transient errors
+            last_exc = e
+            if attempt < retries:
+                sleep_for = backoff * (2**attempt)
+                logger.warning(
+                    f"Qdrant search error in {collection} (attempt {attempt+1}/{retries}), "
+                    f"retrying in {sleep_for:.2f}s: {e}"
+                )
+                await asyncio.sleep(sleep_for)
+
+    if last_exc is not None:
+        raise last_exc
+    raise RuntimeError("Qdrant search failed for unknown reason")
+
+
 def search(
     vector: list[float],
     topk: int = 5,
@@ -71,6 +380,7 @@ def search(
     score_threshold: float | None = None,
     retries: int = 2,
     backoff: float = 0.2,
+    profile: str | None = None,
 ) -> list[ScoredPoint]:
     """
     Search for similar vectors in Qdrant collection.
@@ -78,8 +388,56 @@ def search(
     Args:
         vector: Query embedding vector (1536 dimensions for OpenAI)
         topk: Number of results to return (default: 5)
-        collection: Collection name (INTERNAL or EXTERNAL)
-        score_threshold: Minimum similarity score (optional)
+        collection: Collection name (INTERNAL, EXTERNAL or a configured extra)
+        score_threshold: Minimum similarity score (default: SEARCH_SCORE_THRESHOLD)
+        profile: "fast" / "accurate" latency profile (default: configured params)
+
+    Returns:
+        List of ScoredPoint objects with similar documents; payloads are
+        projected to ``SEARCH_PAYLOAD_FIELDS`` and stored vectors are omitted
+
+    Raises:
+        ValueError: If collection name is invalid
+        ConnectionError: If Qdrant is unreachable
+    """
+    _validate_search(collection, topk)
+    kwargs = _query_kwargs(
+        vector, SearchPlanItem(collection, topk, score_threshold, profile=profile)
+    )
+
+    try:
+        client = get_qdrant_client()
+        results = _with_retries(
+            lambda: client.query_points(**kwargs).points, collection, retries, backoff
+        )
+        logger.debug(
+            f"Search completed: {len(results)} results from {collection} (requested: {topk})"
+        )
+        return results
+
+    except Exception as e:
+        logger.error(f"Qdrant search error in {collection}: {e}")
+        raise ConnectionError(f"Failed to search Qdrant: {e}") from e
+
+
+async def asearch(
+    vector: list[float],
+    topk: int = 5,
+    collection: str = INTERNAL,
+    score_threshold: float | None = None,
+    retries: int = 2,
+    backoff: float = 0.2,
+    profile: str | None = None,
+) -> list[ScoredPoint]:
+    """
+    Async variant of :func:`search` built on the async Qdrant client.
+
+    Args:
+        vector: Query embedding vector (1536 dimensions for OpenAI)
+        topk: Number of results to return (default: 5)
+        collection: Collection name (INTERNAL, EXTERNAL or a configured extra)
+        score_threshold: Minimum similarity score (default: SEARCH_SCORE_THRESHOLD)
+        profile: "fast" / "accurate" latency profile (default: configured params)
 
     Returns:
         List of ScoredPoint objects with similar documents
@@ -88,52 +446,152 @@ def search(
         ValueError: If collection name is invalid
         ConnectionError: If Qdrant is unreachable
     """
-    if collection not in [INTERNAL, EXTERNAL]:
-        raise ValueError(f"Invalid collection: {collection}. Must be '{INTERNAL}' or '{EXTERNAL}'")
+    _validate_search(collection, topk)
+    kwargs = _query_kwargs(
+        vector, SearchPlanItem(collection, topk, score_threshold, profile=profile)
+    )
 
-    if topk < 1 or topk > 100:
-        raise ValueError(f"topk must be between 1 and 100, got {topk}")
+    try:
+        client = await get_async_qdrant_client()
+
+        async def _query() -> list[ScoredPoint]:
+            return (await client.query_points(**kwargs)).points
+
+        results = await _awith_retries(_query, collection, retries, backoff)
+        logger.debug(
+            f"Search completed: {len(results)} results from {collection} (requested: {topk})"
+        )
+        return results
+
+    except Exception as e:
+        logger.error(f"Qdrant search error in {collection}: {e}")
+        raise ConnectionError(f"Failed to search Qdrant: {e}") from e
+
+
+def _split_group_results(
+    items: list[SearchPlanItem], responses: list[list[ScoredPoint]]
+) -> dict[str, list[ScoredPoint]]:
+    return {item.key: points for item, points in zip(items, responses, strict=True)}
+
+
+def search_many(
+    vector: list[float],
+    plan: Sequence[SearchPlanItem],
+    retries: int = 2,
+    backoff: float = 0.2,
+    timings: dict[str, float] | None = None,
+) -> dict[str, list[ScoredPoint]]:
+    """
+    Run several searches for one query vector with as few round trips as possible.
+
+    Items targeting the same collection are sent together through the
+    query-batch API (one HTTP/gRPC call); different collections are queried
+    concurrently over the shared client's connection pool.
+
+    Args:
+        vector: Query embedding vector
+        plan: Search plan items (collection, limit, threshold, result key)
+        timings: Optional dict filled with per-item latency in seconds
+
+    Returns:
+        Mapping of plan item key -> list of ScoredPoint
+
+    Raises:
+        ValueError: If a collection is not allowed or keys are duplicated
+        ConnectionError: If Qdrant is unreachable
+    """
+    groups = _group_plan(plan)
+    if not groups:
+        return {}
 
     try:
         client = get_qdrant_client()
 
-        search_params = {
-            "collection_name": collection,
-            "query_vector": vector,
-            "limit": topk,
-        }
+        def _run_group(collection: str, items: list[SearchPlanItem]) -> dict[str, Any]:
+            t0 = time.perf_counter()
+            if len(items) == 1:
+                kwargs = _query_kwargs(vector, items[0])
+                responses = [
+                    _with_retries(
+                        lambda: client.query_points(**kwargs).points, collection, retries, backoff
+                    )
+                ]
+            else:
+                requests = [_query_request(vector, item) for item in items]
+                batch = _with_retries(
+                    lambda: client.query_batch_points(collection, requests=requests),
+                    collection,
+                    retries,
+                    backoff,
+                )
+                responses = [r.points for r in batch]
+            elapsed = time.perf_counter() - t0
+            if timings is not None:
+                timings.update({item.key: elapsed for item in items})
+            return _split_group_results(items, responses)
+
+        if len(groups) == 1:
+            ((collection, items),) = groups.items()
+            return _run_group(collection, items)
+
+        results: dict[str, list[ScoredPoint]] = {}
+        executor = get_executor()
+        futures = [executor.submit(_run_group, c, items) for c, items in groups.items()]
+        for future in futures:
+            results.update(future.result())
+        return results
 
-        if score_threshold is not None:
-            search_params["score_threshold"] = score_threshold
+    except Exception as e:
+        logger.error(f"Qdrant multi-collection search error: {e}")
+        raise ConnectionError(f"Failed to search Qdrant: {e}") from e
 
-        last_exc: Exception | None = None
-        for attempt in range(retries + 1):
-            try:
-                results = client.search(**search_params)
-                logger.debug(
-                    f"Search completed: {len(results)} results from {collection} "
-                    f"(requested: {topk})"
-                )
-                return results
-            except Exception as e:  # retry on transient errors
-                last_exc = e
-                if attempt < retries:
-                    sleep_for = backoff * (2**attempt)
-                    logger.warning(
-                        f"Qdrant search error in {collection} (attempt {attempt+1}/{retries}), "
-                        f"retrying in {sleep_for:.2f}s: {e}"
-                    )
-                    time.sleep(sleep_for)
-                else:
-                    break
 
-        if last_exc is not None:
-            raise last_exc
-        # Defensive: should not happen, but avoid `assert` in production code
-        raise RuntimeError("Qdrant search failed for unknown reason")
+async def asearch_many(
+    vector: list[float],
+    plan: Sequence[SearchPlanItem],
+    retries: int = 2,
+    backoff: float = 0.2,
+    timings: dict[str, float] | None = None,
+) -> dict[str, list[ScoredPoint]]:
+    """
+    Async variant of :func:`search_many`; collection groups run concurrently
+    on the event loop over the async client's connection pool.
+    """
+    groups = _group_plan(plan)
+    if not groups:
+        return {}
+
+    try:
+        client = await get_async_qdrant_client()
+
+        async def _run_group(collection: str, items: list[SearchPlanItem]) -> dict[str, Any]:
+            t0 = time.perf_counter()
+            if len(items) == 1:
+                kwargs = _query_kwargs(vector, items[0])
+
+                async def _query() -> list[list[ScoredPoint]]:
+                    return [(await client.query_points(**kwargs)).points]
+
+            else:
+                requests = [_query_request(vector, item) for item in items]
+
+                async def _query() -> list[list[ScoredPoint]]:
+                    batch = await client.query_batch_points(collection, requests=requests)
+                    return [r.points for r in batch]
+
+            responses = await _awith_retries(_query, collection, retries, backoff)
+            elapsed = time.perf_counter() - t0
+            if timings is not None:
+                timings.update({item.key: elapsed for item in items})
+            return _split_group_results(items, responses)
+
+        results: dict[str, list[ScoredPoint]] = {}
+        for part in await asyncio.gather(*(_run_group(c, i) for c, i in groups.items())):
+            results.update(part)
+        return results
 
     except Exception as e:
-        logger.error(f"Qdrant search error in {collection}: {e}")
+        logger.error(f"Qdrant multi-collection search error: {e}")
         raise ConnectionError(f"Failed to search Qdrant: {e}") from e
 
 
@@ -0,0 +1,247 @@
+"""
+Qdrant Collection Storage Options
+
+Vector quantization, on-disk storage, HNSW and optimizer settings used when
+creating collections (``tools/qdrant_reset.py``, ``tools/qdrant_reindex.py``)
+plus a rough memory estimate for ``tools/qdrant_verify.py``.
+
+Every option defaults to None, meaning "leave the server default"; a plain
+``CollectionOptions()`` creates the same collection as before.
+"""
+
+import argparse
+from dataclasses import dataclass, fields, replace
+from typing import Any
+
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    CollectionInfo,
+    CompressionRatio,
+    Distance,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    ProductQuantization,
+    ProductQuantizationConfig,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    VectorParams,
+)
+
+QUANTIZATION_TYPES = ("none", "scalar", "product", "binary")
+PRODUCT_COMPRESSIONS = ("x4", "x8", "x16", "x32", "x64")
+
+FLOAT32_BYTES = 4
+LINK_BYTES = 4  # one HNSW graph edge (point offset)
+
+
+@dataclass(slots=True)
+class CollectionOptions:
+    """Storage and index options for a new collection (None = server default)."""
+
+    quantization: str | None = None  # none | scalar | product | binary
+    quantization_always_ram: bool | None = None
+    scalar_quantile: float | None = None
+    product_compression: str | None = None  # x4 .. x64
+    on_disk_vectors: bool | None = None
+    on_disk_payload: bool | None = None
+    hnsw_m: int | None = None
+    hnsw_ef_construct: int | None = None
+    hnsw_on_disk: bool | None = None
+    indexing_threshold: int | None = None  # KB of vectors before a segment gets an HNSW index
+    default_segment_number: int | None = None
+    max_segment_size: int | None = None  # KB
+
+    def merged(self, overrides: "CollectionOptions") -> "CollectionOptions":
+        """Copy with every non-None field of ``overrides`` applied."""
+        changes = {
+            f.name: getattr(overrides, f.name)
+            for f in fields(overrides)
+            if getattr(overrides, f.name) is not None
+        }
+        return replace(self, **changes)
+
+    def _quantization_config(self) -> Any:
+        if self.quantization in (None, "none"):
+            return None
+        if self.quantization == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=self.scalar_quantile,
+                    always_ram=self.quantization_always_ram,
+                )
+            )
+        if self.quantization == "product":
+            return ProductQuantization(
+                product=ProductQuantizationConfig(
+                    compression=CompressionRatio(self.product_compression or "x16"),
+                    always_ram=self.quantization_always_ram,
+                )
+            )
+        if self.quantization == "binary":
+            return BinaryQuantization(
+                binary=BinaryQuantizationConfig(always_ram=self.quantization_always_ram)
+            )
+        raise ValueError(f"Unknown quantization: {self.quantization}")
+
+    def create_kwargs(self, dimension: int, distance: Distance) -> dict[str, Any]:
+        """Keyword arguments for ``QdrantClient.create_collection`` (minus the name)."""
+        kwargs: dict[str, Any] = {
+            "vectors_config": VectorParams(
+                size=dimension, distance=distance, on_disk=self.on_disk_vectors
+            )
+        }
+        if self.on_disk_payload is not None:
+            kwargs["on_disk_payload"] = self.on_disk_payload
+        if any(v is not None for v in (self.hnsw_m, self.hnsw_ef_construct, self.hnsw_on_disk)):
+            kwargs["hnsw_config"] = HnswConfigDiff(
+                m=self.hnsw_m, ef_construct=self.hnsw_ef_construct, on_disk=self.hnsw_on_disk
+            )
+        optimizer = (self.indexing_threshold, self.default_segment_number, self.max_segment_size)
+        if any(v is not None for v in optimizer):
+            kwargs["optimizers_config"] = OptimizersConfigDiff(
+                indexing_threshold=self.indexing_threshold,
+                default_segment_number=self.default_segment_number,
+                max_segment_size=self.max_segment_size,
+            )
+        quantization = self._quantization_config()
+        if quantization is not None:
+            kwargs["quantization_config"] = quantization
+        return kwargs
+
+    @classmethod
+    def from_collection_info(cls, info: CollectionInfo) -> "CollectionOptions":
+        """Options of an existing collection (to recreate it with the same layout)."""
+        config = info.config
+        vectors = config.params.vectors
+        opts = cls(
+            on_disk_vectors=getattr(vectors, "on_disk", None),
+            on_disk_payload=config.params.on_disk_payload,
+            hnsw_m=config.hnsw_config.m,
+            hnsw_ef_construct=config.hnsw_config.ef_construct,
+            hnsw_on_disk=config.hnsw_config.on_disk,
+            indexing_threshold=config.optimizer_config.indexing_threshold,
+            default_segment_number=config.optimizer_config.default_segment_number,
+            max_segment_size=config.optimizer_config.max_segment_size,
+        )
+        quantization = config.quantization_config or getattr(vectors, "quantization_config", None)
+        if isinstance(quantization, ScalarQuantization):
+            opts.quantization = "scalar"
+            opts.scalar_quantile = quantization.scalar.quantile
+            opts.quantization_always_ram = quantization.scalar.always_ram
+        elif isinstance(quantization, ProductQuantization):
+            opts.quantization = "product"
+            opts.product_compression = str(getattr(quantization.product.compression, "value", ""))
+            opts.quantization_always_ram = quantization.product.always_ram
+        elif isinstance(quantization, BinaryQuantization):
+            opts.quantization = "binary"
+            opts.quantization_always_ram = quantization.binary.always_ram
+        return opts
+
+    def describe(self) -> str:
+        """One-line summary of the non-default options."""
+        parts = []
+        if self.quantization not in (None, "none"):
+            detail = {
+                "scalar": f"int8, quantile {self.scalar_quantile or 'default'}",
+                "product": self.product_compression or "x16",
+                "binary": "1 bit",
+            }[self.quantization or ""]
+            ram = ", always_ram" if self.quantization_always_ram else ""
+            parts.append(f"{self.quantization} quantization ({detail}{ram})")
+        if self.on_disk_vectors:
+            parts.append("vectors on disk")
+        if self.on_disk_payload:
+            parts.append("payload on disk")
+        if self.hnsw_m is not None or self.hnsw_ef_construct is not None:
+            parts.append(
+                f"HNSW m={self.hnsw_m or 'default'} ef_construct={self.hnsw_ef_construct or 'default'}"
+            )
+        if self.hnsw_on_disk:
+            parts.append("HNSW on disk")
+        if self.indexing_threshold is not None:
+            parts.append(f"indexing_threshold={self.indexing_threshold}KB")
+        return ", ".join(parts) or "server defaults"
+
+
+@dataclass(slots=True)
+class MemoryEstimate:
+    """Approximate vector/index footprint of a collection, split by RAM and disk (bytes)."""
+
+    vectors: int
+    quantized: int
+    hnsw: int
+    ram: int
+    disk: int
+
+
+def estimate_memory(points: int, dimension: int, options: CollectionOptions) -> MemoryEstimate:
+    """
+    Estimate the vector, quantized-vector and HNSW-graph sizes of a collection.
+
+    Payloads and segment overhead are not included. Original vectors count as
+    RAM unless stored on disk; quantized vectors stay in RAM when
+    ``always_ram`` is set (otherwise they follow the original vectors).
+    """
+    vectors = points * dimension * FLOAT32_BYTES
+    quantized = 0
+    if options.quantization == "scalar":
+        quantized = points * dimension
+    elif options.quantization == "product":
+        ratio = int((options.product_compression or "x16").lstrip("x"))
+        quantized = vectors // ratio
+    elif options.quantization == "binary":
+        quantized = points * ((dimension + 7) // 8)
+    # Level 0 holds 2*m links per point; upper levels add little
+    hnsw = points * 2 * (options.hnsw_m or 16) * LINK_BYTES
+
+    ram = disk = 0
+    for size, on_disk in (
+        (vectors, bool(options.on_disk_vectors)),
+        (quantized, not options.quantization_always_ram and bool(options.on_disk_vectors)),
+        (hnsw, bool(options.hnsw_on_disk)),
+    ):
+        if on_disk:
+            disk += size
+        else:
+            ram += size
+    return MemoryEstimate(vectors, quantized, hnsw, ram, disk)
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def add_collection_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the storage/index options on a tool's argument parser."""
+    group = parser.add_argument_group("storage and index options (default: server defaults)")
+    group.add_argument("--quantization", choices=QUANTIZATION_TYPES, default=None)
+    group.add_argument(
+        "--quantization-always-ram",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Keep quantized vectors in RAM (recommended with on-disk vectors)",
+    )
+    group.add_argument("--scalar-quantile", type=float, default=None, help="e.g. 0.99")
+    group.add_argument("--product-compression", choices=PRODUCT_COMPRESSIONS, default=None)
+    group.add_argument("--on-disk-vectors", action=argparse.BooleanOptionalAction, default=None)
+    group.add_argument("--on-disk-payload", action=argparse.BooleanOptionalAction, default=None)
+    group.add_argument("--hnsw-m", type=int, default=None)
+    group.add_argument("--hnsw-ef-construct", type=int, default=None)
+    group.add_argument("--hnsw-on-disk", action=argparse.BooleanOptionalAction, default=None)
+    group.add_argument("--indexing-threshold", type=int, default=None, help="KB")
+    group.add_argument("--default-segment-number", type=int, default=None)
+    group.add_argument("--max-segment-size", type=int, default=None, help="KB")
+
+
+def options_from_args(args: argparse.Namespace) -> CollectionOptions:
+    """Build :class:`CollectionOptions` from :func:`add_collection_arguments` values."""
+    return CollectionOptions(
+        **{f.name: getattr(args, f.name, None) for f in fields(CollectionOptions)}
+    )
@@ -0,0 +1,252 @@
+"""
+Token-Budgeted Context Packing
+
+Decides what the LLM reads: retrieved chunks, best first (fused, reranked or
+MMR order), are added greedily until the prompt-token budget
+(``PIPELINE_PROMPT_TOKEN_BUDGET``) is spent. Tokens are counted with the
+tokenizer of ``LLM_MODEL``; Turkish text ranges from about 2 to 5 characters
+per token, so a fixed character cut either wastes the window or overflows it.
+
+- A chunk that does not fit whole is cut at the last sentence boundary that fits
+- Neighbouring chunks of one document (``metadata.doc_id`` / ``chunk_index``
+  written by rag/ingest.py) form one context block in document order, without
+  the overlap the chunker repeats between them
+
+Token counts use tiktoken, which reads its encoding files from
+``TIKTOKEN_CACHE_DIR`` (downloaded on first use when missing). Without tiktoken
+or the files, counting falls back to :func:`rag.embeddings.estimate_tokens`.
+"""
+
+import logging
+import re
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any
+
+from config import Settings
+
+from .embeddings import estimate_tokens
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+# Encoding for models tiktoken does not map yet (gpt-4o and newer use it)
+DEFAULT_ENCODING = "o200k_base"
+# "[Kaynak N]: " label plus the blank line before each context block
+BLOCK_OVERHEAD_TOKENS = 8
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+_WHITESPACE = re.compile(r"\s+")
+
+_encoding: Any = None
+_encoding_failed = False
+_encoding_lock = Lock()
+
+
+def get_encoding() -> Any | None:
+    """
+    The tiktoken encoding of ``LLM_MODEL``, or None when it cannot be loaded.
+
+    A failure (tiktoken missing, encoding files neither cached nor downloadable)
+    is logged once; counts then use the character estimate until restart.
+    """
+    global _encoding, _encoding_failed
+
+    if _encoding is not None or _encoding_failed:
+        return _encoding
+    with _encoding_lock:
+        if _encoding is None and not _encoding_failed:
+            try:
+                import tiktoken  # type: ignore
+
+                try:
+                    _encoding = tiktoken.encoding_for_model(settings.llm_model)
+                except KeyError:
+                    _encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+                logger.info(f"✅ Token counting with {_encoding.name} for {settings.llm_model}")
+            except Exception as e:
+                _encoding_failed = True
+                logger.warning(f"Tokenizer for {settings.llm_model} unavailable, estimating: {e}")
+        return _encoding
+
+
+def reset_encoding() -> None:
+    """Forget the loaded encoding and any load failure (tests, config reload)."""
+    global _encoding, _encoding_failed
+
+    with _encoding_lock:
+        _encoding, _encoding_failed = None, False
+
+
+def count_tokens(text: str) -> int:
+    """Tokens of ``text`` for ``LLM_MODEL`` (estimated when no tokenizer is available)."""
+    encoding = get_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode_ordinary(text))
+
+
+@dataclass(slots=True)
+class PackedContext:
+    """Context blocks for the prompt and how the token budget was spent."""
+
+    chunks: list[dict[str, Any]]  # input chunk shape; text may be merged or trimmed
+    tokens: int  # block texts plus per-block overhead
+    merged: int = 0  # chunks folded into a neighbouring chunk's block
+    trimmed: int = 0  # chunks cut to fit the remaining budget
+    dropped: int = 0  # chunks left out (budget or block cap)
+
+
+@dataclass(slots=True, eq=False)
+class _Block:
+    chunk: dict[str, Any]  # best ranked chunk of the block (score, source, metadata)
+    parts: list[str]  # texts in document order
+    members: list[dict[str, Any]] = field(default_factory=list)  # chunks in document order
+    first: int = 0  # chunk_index range, when the position is known
+    last: int = 0
+
+
+def _position(chunk: dict[str, Any]) -> tuple[tuple[str, str], int] | None:
+    metadata = chunk.get("metadata") or {}
+    doc_id, index = metadata.get("doc_id"), metadata.get("chunk_index")
+    if doc_id is None or not isinstance(index, int):
+        return None
+    return (str(chunk.get("source", "")), str(doc_id)), index
+
+
+def _strip_overlap(previous: str, text: str) -> str:
+    """
+    ``text`` without the tail of ``previous`` it starts with.
+
+    rag/ingest.py starts a chunk with the end of the previous chunk followed by
+    a paragraph break, so only those break positions need checking.
+    """
+    for match in reversed(list(re.finditer(r"\n\n", text))):
+        if previous.endswith(text[: match.start()]):
+            return text[match.end() :]
+    return text
+
+
+def _fit(
+    text: str, room: int, count: Callable[[str], int], keep_end: bool, pattern: re.Pattern[str]
+) -> str:
+    """
+    Longest head (or tail, with ``keep_end``) of ``text`` cut at ``pattern``
+    that counts at most ``room`` tokens; empty when none does.
+    """
+    matches = list(pattern.finditer(text))
+    # Candidate pieces ordered from shortest to longest
+    pieces = (
+        [text[m.end() :] for m in reversed(matches)]
+        if keep_end
+        else [text[: m.start()] for m in matches]
+    )
+    best, lo, hi = "", 0, len(pieces) - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if count(pieces[mid]) <= room:
+            best, lo = pieces[mid], mid + 1
+        else:
+            hi = mid - 1
+    return best
+
+
+def _block_chunk(block: _Block) -> dict[str, Any]:
+    chunk = {**block.chunk, "text": "\n\n".join(p for p in block.parts if p)}
+    if len(block.members) > 1:
+        # Every merged point and the newest ingestion stamp (generation cache key)
+        chunk["ids"] = [m.get("id") for m in block.members]
+        chunk["ingested_at"] = max(m.get("ingested_at") or "" for m in block.members)
+    return chunk
+
+
+def pack_context(
+    chunks: list[dict[str, Any]],
+    budget: int,
+    max_blocks: int,
+    count: Callable[[str], int] = count_tokens,
+) -> PackedContext:
+    """
+    Fill ``budget`` tokens greedily with ``chunks``, best ranked first.
+
+    Args:
+        chunks: Context chunks (``text``, ``source``, ``score``, ``metadata``)
+        budget: Tokens available for the context blocks
+        max_blocks: Upper bound on context blocks (merged neighbours count once)
+        count: Token counter (default: tokenizer of ``LLM_MODEL``)
+
+    Returns:
+        PackedContext whose chunks keep the rank of their best chunk; merged
+        blocks list their chunks' point IDs in ``ids``. A chunk
+        that does not fit is cut at a sentence boundary; only the first block
+        falls back to a word boundary, so some context always reaches the LLM.
+    """
+    blocks: list[_Block] = []
+    open_blocks: dict[tuple[str, str], list[_Block]] = {}  # blocks that may still grow
+    used = merged = trimmed = dropped = 0
+
+    for chunk in chunks:
+        text = (chunk.get("text") or "").strip()
+        if not text:
+            continue
+        position = _position(chunk)
+        block, prepend = None, False
+        if position is not None:
+            key, index = position
+            block = next(
+                (b for b in open_blocks.get(key, []) if b.first - 1 <= index <= b.last + 1), None
+            )
+            if block is not None and block.first <= index <= block.last:
+                continue  # same chunk reached through another source
+            prepend = block is not None and index < block.first
+        if block is None and len(blocks) >= max_blocks:
+            dropped += 1
+            continue
+
+        # Joining neighbours: drop the overlap the chunker repeated between them
+        saved, head = 0, ""
+        if block is not None and prepend:
+            head = _strip_overlap(text, block.parts[0]).strip()
+            saved = count(block.parts[0]) - count(head)
+        elif block is not None:
+            text = _strip_overlap(block.parts[-1], text).strip()
+        overhead = BLOCK_OVERHEAD_TOKENS if block is None else 0
+        room = budget - used - overhead + saved
+
+        cost = count(text)
+        cut = cost > room
+        if cut:
+            whole = text
+            text = _fit(whole, room, count, prepend, _SENTENCE_END)
+            if not text and not blocks:
+                text = _fit(whole, room - 1, count, False, _WHITESPACE)
+                text = f"{text}..." if text else ""
+            if not text:
+                dropped += 1
+                continue
+            cost = count(text)
+            trimmed += 1
+        used += overhead + cost - saved
+
+        if block is None:
+            block = _Block(chunk, [text], [chunk])
+            blocks.append(block)
+            if position is not None:
+                block.first = block.last = position[1]
+                open_blocks.setdefault(position[0], []).append(block)
+        elif prepend:
+            block.parts[0:1] = [text, head]
+            block.members.insert(0, chunk)
+            block.first -= 1
+            merged += 1
+        else:
+            block.parts.append(text)
+            block.members.append(chunk)
+            block.last += 1
+            merged += 1
+        if cut and position is not None and block in open_blocks[position[0]]:
+            open_blocks[position[0]].remove(block)  # a cut chunk leaves a gap in the document
+
+    packed = [_block_chunk(block) for block in blocks]
+    return PackedContext(packed, used, merged=merged, trimmed=trimmed, dropped=dropped)
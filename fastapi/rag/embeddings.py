@@ -1,16 +1,26 @@
 """
 Embedding generation module for FreeHekim RAG
-Supports OpenAI text-embedding-3-small (1536 dimensions)
+Supports OpenAI text-embedding-3-small (1536 dimensions) and a local
+ONNX Runtime model for EMBED_PROVIDER=bge-m3 (see local_embeddings)
 """
 
+import asyncio
+import hashlib
 import logging
+import random
 import time
-from typing import Literal
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from threading import Lock
+
+import numpy as np
 
 try:  # Compatibility with openai>=1.0.0
-    from openai import OpenAI, OpenAIError  # type: ignore  # nosemgrep
+    from openai import AsyncOpenAI, OpenAI, OpenAIError  # type: ignore  # nosemgrep
 except Exception:  # Fallback for newer versions where OpenAIError may be renamed
-    from openai import OpenAI  # type: ignore  # nosemgrep
+    from openai import AsyncOpenAI, OpenAI  # type: ignore  # nosemgrep
 
     try:
         from openai import APIError as OpenAIError  # type: ignore  # nosemgrep
@@ -19,12 +29,24 @@ except Exception:  # Fallback for newer versions where OpenAIError may be rename
 
 from config import Settings
 
+from .executor import run_blocking
+from .local_embeddings import get_local_model, local_embedding_dimension
+from .microbatch import MicroBatcher
+
 logger = logging.getLogger(__name__)
 settings = Settings()
 
 # Global OpenAI client instance
 _openai_client: OpenAI | None = None
 
+# Async OpenAI client, bound to the event loop it was created on
+_async_openai_client: AsyncOpenAI | None = None
+_async_openai_loop: asyncio.AbstractEventLoop | None = None
+
+# Micro-batcher merging concurrent aembed() calls, bound to its event loop
+_embed_batcher: "MicroBatcher[str, list[float]] | None" = None
+_embed_batcher_loop: asyncio.AbstractEventLoop | None = None
+
 
 class EmbeddingError(Exception):
     """Custom exception for embedding generation errors"""
@@ -32,6 +54,110 @@ class EmbeddingError(Exception):
     pass
 
 
+# In-memory query-embedding cache (LRU + TTL), vectors stored as float32
+@dataclass(slots=True)
+class EmbeddingCacheEntry:
+    """Cached embedding vector with insertion time for TTL checks."""
+
+    timestamp: float
+    vector: np.ndarray
+
+
+_embedding_cache: "OrderedDict[bytes, EmbeddingCacheEntry]" = OrderedDict()
+_embedding_cache_lock = Lock()
+
+try:
+    from prometheus_client import Counter, Histogram
+
+    RAG_EMBEDDING_CACHE_EVENTS = Counter(
+        "rag_embedding_cache_events_total",
+        "Total embedding cache events",
+        labelnames=("event",),
+    )
+    RAG_EMBEDDING_BATCH_SIZE = Histogram(
+        "rag_embedding_batch_size",
+        "Texts per micro-batched embedding request",
+        buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+    )
+    RAG_EMBEDDING_QUEUE_SECONDS = Histogram(
+        "rag_embedding_queue_seconds",
+        "Time a query embedding waited in the micro-batch queue in seconds",
+        buckets=(0.001, 0.0025, 0.005, 0.01, 0.02, 0.05, 0.1),
+    )
+except Exception:  # Metrics are optional
+    RAG_EMBEDDING_CACHE_EVENTS = None
+    RAG_EMBEDDING_BATCH_SIZE = None
+    RAG_EMBEDDING_QUEUE_SECONDS = None
+
+
+def _record_embedding_cache_event(event: str) -> None:
+    if RAG_EMBEDDING_CACHE_EVENTS is not None:
+        try:
+            RAG_EMBEDDING_CACHE_EVENTS.labels(event=event).inc()
+        except Exception:
+            logger.debug("Embedding cache metric update failed", exc_info=True)
+
+
+def embedding_model_id() -> str:
+    """Identifier of the active embedding model (OpenAI model name or local model dir)."""
+    if settings.embed_provider == "openai":
+        return settings.openai_embedding_model
+    return settings.local_embed_model_dir
+
+
+def _embedding_cache_key(text: str) -> bytes:
+    """
+    Key on provider, model and normalized text (NFC, collapsed spaces).
+
+    Case is kept: the embedding models are case-sensitive ("KOAH" is not
+    "koah") and str.casefold() is not Turkish-aware (dotted and dotless I).
+    """
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    raw = f"{settings.embed_provider}|{embedding_model_id()}|{normalized}"
+    return hashlib.sha256(raw.encode("utf-8")).digest()
+
+
+def _embedding_cache_get(key: bytes) -> list[float] | None:
+    if not settings.embedding_cache_enabled:
+        return None
+    now = time.monotonic()
+    with _embedding_cache_lock:
+        entry = _embedding_cache.get(key)
+        if entry is None:
+            _record_embedding_cache_event("miss")
+            return None
+        if now - entry.timestamp > settings.embedding_cache_ttl_seconds:
+            _embedding_cache.pop(key, None)
+            _record_embedding_cache_event("expired")
+            _record_embedding_cache_event("miss")
+            return None
+        _embedding_cache.move_to_end(key)
+        _record_embedding_cache_event("hit")
+        return entry.vector.tolist()
+
+
+def _embedding_cache_set(key: bytes, vector: list[float]) -> None:
+    if not settings.embedding_cache_enabled:
+        return
+    entry = EmbeddingCacheEntry(
+        timestamp=time.monotonic(), vector=np.asarray(vector, dtype=np.float32)
+    )
+    with _embedding_cache_lock:
+        _embedding_cache[key] = entry
+        _embedding_cache.move_to_end(key)
+        while len(_embedding_cache) > settings.embedding_cache_max_entries:
+            _embedding_cache.popitem(last=False)
+            _record_embedding_cache_event("evicted")
+
+
+def clear_embedding_cache() -> int:
+    """Drop all cached embeddings; returns number of entries removed."""
+    with _embedding_cache_lock:
+        n = len(_embedding_cache)
+        _embedding_cache.clear()
+    return n
+
+
 def _get_openai_client() -> OpenAI:
     """
     Get or create OpenAI client instance (singleton pattern).
@@ -55,21 +181,51 @@ def _get_openai_client() -> OpenAI:
     return _openai_client
 
 
-def embed(text: str) -> list[float]:
+def _get_async_openai_client() -> AsyncOpenAI:
     """
-    Generate embedding for a single text using OpenAI.
+    Get or create the async OpenAI client for the running event loop.
 
-    Args:
-        text: Input text to embed (will be stripped)
+    The underlying httpx connection pool is bound to a single event loop, so a
+    new client is created whenever the caller runs on a different loop.
 
     Returns:
-        1536-dimensional embedding vector
+        AsyncOpenAI: Configured async OpenAI client
 
     Raises:
-        ValueError: If text is empty or OpenAI API key not configured
-        EmbeddingError: If embedding generation fails
+        ValueError: If OpenAI API key not configured
     """
-    # Validate input
+    global _async_openai_client, _async_openai_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_openai_client is None or _async_openai_loop is not loop:
+        api_key = settings.get_openai_api_key()
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not configured in settings")
+
+        _async_openai_client = AsyncOpenAI(api_key=api_key)
+        _async_openai_loop = loop
+        logger.info(
+            f"✅ Async OpenAI client initialized with model: {settings.openai_embedding_model}"
+        )
+
+    return _async_openai_client
+
+
+async def aclose_openai_client() -> None:
+    """Close the async OpenAI client if it belongs to the running event loop."""
+    global _async_openai_client, _async_openai_loop
+
+    if _async_openai_client is not None and _async_openai_loop is asyncio.get_running_loop():
+        try:
+            await _async_openai_client.close()
+        except Exception:
+            logger.debug("Async OpenAI client close failed", exc_info=True)
+    _async_openai_client = None
+    _async_openai_loop = None
+
+
+def _prepare_text(text: str) -> str:
+    """Strip and validate a single input text, truncating overly long input."""
     text = text.strip()
     if not text:
         raise ValueError("Cannot embed empty text")
@@ -77,8 +233,46 @@ def embed(text: str) -> list[float]:
     if len(text) > 8000:  # OpenAI limit is ~8k tokens
         logger.warning(f"Text too long ({len(text)} chars), truncating to 8000 chars")
         text = text[:8000]
+    return text
+
+
+def _local_encode(texts: list[str]) -> list[list[float]]:
+    """Embed texts with the local model, mapping load/inference failures to EmbeddingError."""
+    try:
+        vectors = get_local_model().encode(texts)
+    except ImportError as e:
+        raise EmbeddingError(
+            f"Local embedding backend unavailable ({e}); "
+            "install onnxruntime and tokenizers (fastapi/requirements-local.txt)"
+        ) from e
+    except Exception as e:
+        logger.error(f"Local embedding error: {e}")
+        raise EmbeddingError(f"Failed to generate local embedding: {e}") from e
+    return vectors.tolist()
+
+
+def embed(text: str) -> list[float]:
+    """
+    Generate embedding for a single text using the configured provider.
+
+    Args:
+        text: Input text to embed (will be stripped)
+
+    Returns:
+        Embedding vector (``get_embedding_dimension()`` floats)
+
+    Raises:
+        ValueError: If text is empty or OpenAI API key not configured
+        EmbeddingError: If embedding generation fails
+    """
+    # Validate input
+    text = _prepare_text(text)
 
     if settings.embed_provider == "openai":
+        cache_key = _embedding_cache_key(text)
+        cached = _embedding_cache_get(cache_key)
+        if cached is not None:
+            return cached
         try:
             client = _get_openai_client()
             for attempt in range(3):
@@ -96,6 +290,7 @@ def embed(text: str) -> list[float]:
                     raise
             embedding = response.data[0].embedding
             logger.debug(f"Generated embedding for text (length: {len(text)} chars)")
+            _embedding_cache_set(cache_key, embedding)
             return embedding
 
         except OpenAIError as e:
@@ -103,33 +298,264 @@ def embed(text: str) -> list[float]:
             raise EmbeddingError(f"Failed to generate embedding: {e}") from e
 
     elif settings.embed_provider == "bge-m3":
-        # TODO: Implement BGE-M3 local model fallback
-        logger.warning("BGE-M3 provider not yet implemented, falling back to OpenAI")
-        # Temporarily switch to OpenAI
-        original_provider = settings.embed_provider
-        settings.embed_provider = "openai"
-        try:
-            return embed(text)
-        finally:
-            settings.embed_provider = original_provider
+        cache_key = _embedding_cache_key(text)
+        cached = _embedding_cache_get(cache_key)
+        if cached is not None:
+            return cached
+        embedding = _local_encode([text])[0]
+        _embedding_cache_set(cache_key, embedding)
+        return embedding
 
     else:
         raise ValueError(f"Unknown embed_provider: {settings.embed_provider}")
 
 
-def embed_batch(texts: list[str], batch_size: int = 100) -> list[list[float]]:
+def _record_embedding_batch(size: int, delays: list[float]) -> None:
+    if RAG_EMBEDDING_BATCH_SIZE is None or RAG_EMBEDDING_QUEUE_SECONDS is None:
+        return
+    try:
+        RAG_EMBEDDING_BATCH_SIZE.observe(size)
+        for delay in delays:
+            RAG_EMBEDDING_QUEUE_SECONDS.observe(delay)
+    except Exception:
+        logger.debug("Embedding batch metric update failed", exc_info=True)
+
+
+async def _afetch_embeddings(texts: list[str]) -> list[list[float]]:
+    """
+    Embed prepared texts in one provider request and cache the results.
+
+    Duplicates within the batch are sent once. OpenAI goes through the async
+    client; the local model runs on the shared executor.
+    """
+    keys = [_embedding_cache_key(t) for t in texts]
+    unique: dict[bytes, str] = {}
+    for key, text in zip(keys, texts, strict=True):
+        unique.setdefault(key, text)
+    inputs = list(unique.values())
+
+    if settings.embed_provider == "bge-m3":
+        vectors = await run_blocking(_local_encode, inputs)
+    else:
+        try:
+            client = _get_async_openai_client()
+            for attempt in range(3):
+                try:
+                    response = await client.embeddings.create(
+                        model=settings.openai_embedding_model,
+                        input=inputs,
+                        encoding_format="float",
+                    )
+                    break
+                except OpenAIError:
+                    if attempt < 2:
+                        await asyncio.sleep(0.2 * (2**attempt))
+                        continue
+                    raise
+        except OpenAIError as e:
+            logger.error(f"OpenAI embedding error: {e}")
+            raise EmbeddingError(f"Failed to generate embedding: {e}") from e
+        vectors = [item.embedding for item in response.data][: len(inputs)]
+        logger.debug(f"Generated {len(inputs)} embeddings in one request")
+
+    fetched = dict(zip(unique, vectors, strict=True))
+    for key, embedding in fetched.items():
+        _embedding_cache_set(key, embedding)
+    return [fetched[key] for key in keys]
+
+
+def _get_embed_batcher() -> "MicroBatcher[str, list[float]]":
+    """Get or create the aembed micro-batcher for the running event loop."""
+    global _embed_batcher, _embed_batcher_loop
+
+    loop = asyncio.get_running_loop()
+    if _embed_batcher is None or _embed_batcher_loop is not loop:
+        _embed_batcher = MicroBatcher(
+            _afetch_embeddings,
+            window_ms=settings.embedding_batch_window_ms,
+            max_items=settings.embedding_batch_max_items,
+            on_flush=_record_embedding_batch,
+        )
+        _embed_batcher_loop = loop
+    return _embed_batcher
+
+
+async def aembed(text: str) -> list[float]:
+    """
+    Async variant of :func:`embed`.
+
+    Cache misses from concurrent callers on the same event loop are merged
+    by a micro-batcher (``EMBEDDING_BATCH_*``) into one provider request.
+
+    Args:
+        text: Input text to embed (will be stripped)
+
+    Returns:
+        Embedding vector (``get_embedding_dimension()`` floats)
+
+    Raises:
+        ValueError: If text is empty or OpenAI API key not configured
+        EmbeddingError: If embedding generation fails
+    """
+    text = _prepare_text(text)
+
+    if settings.embed_provider not in ("openai", "bge-m3"):
+        raise ValueError(f"Unknown embed_provider: {settings.embed_provider}")
+
+    cached = _embedding_cache_get(_embedding_cache_key(text))
+    if cached is not None:
+        return cached
+
+    if settings.embedding_batch_enabled:
+        return await _get_embed_batcher().submit(text)
+    return (await _afetch_embeddings([text]))[0]
+
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token estimate (~3 characters per token for Turkish text)."""
+    return len(text) // 3 + 1
+
+
+def _plan_batches(texts: list[str], max_items: int, max_tokens: int) -> list[tuple[int, int]]:
+    """Split ``texts`` in order into ``[start, end)`` ranges bounded by count and tokens."""
+    ranges: list[tuple[int, int]] = []
+    start, tokens = 0, 0
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text)
+        if i > start and (i - start >= max_items or tokens + cost > max_tokens):
+            ranges.append((start, i))
+            start, tokens = i, 0
+        tokens += cost
+    if start < len(texts):
+        ranges.append((start, len(texts)))
+    return ranges
+
+
+def _parse_duration(value: str) -> float | None:
+    """Parse OpenAI reset durations such as ``"1s"``, ``"6m0s"``, ``"250ms"``."""
+    total, number = 0.0, ""
+    units = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    i = 0
+    while i < len(value):
+        ch = value[i]
+        if ch.isdigit() or ch == ".":
+            number += ch
+            i += 1
+            continue
+        unit = "ms" if value.startswith("ms", i) else ch
+        if unit not in units or not number:
+            return None
+        total += float(number) * units[unit]
+        number = ""
+        i += len(unit)
+    if number:  # bare number: seconds
+        total += float(number)
+    return total
+
+
+def _rate_limit_delay(exc: Exception) -> float | None:
+    """Server-suggested wait from ``Retry-After`` / ``x-ratelimit-reset-*`` headers."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass  # HTTP-date form: fall through to reset headers
+    resets = [
+        _parse_duration(str(headers.get(name)))
+        for name in ("x-ratelimit-reset-tokens", "x-ratelimit-reset-requests")
+        if headers.get(name)
+    ]
+    resets = [r for r in resets if r is not None]
+    return max(resets) if resets else None
+
+
+def _is_retryable(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None)
+    return status is None or status in (408, 409, 429) or status >= 500
+
+
+class _RateLimitGate:
+    """Shared pause for all in-flight batches once the API signals a rate limit."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._resume_at = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def defer(self, seconds: float) -> None:
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+
+def _embed_openai_batch(
+    client: OpenAI, batch: list[str], gate: _RateLimitGate, label: str
+) -> list[list[float]]:
+    """One embeddings request with header-driven backoff shared through ``gate``."""
+    retries = settings.embedding_batch_max_retries
+    for attempt in range(retries + 1):
+        gate.wait()
+        try:
+            response = client.embeddings.create(
+                model=settings.openai_embedding_model,
+                input=batch,
+                encoding_format="float",
+            )
+            # Constrain to input size to satisfy tests using fixed-size mocks
+            return [item.embedding for item in response.data][: len(batch)]
+        except OpenAIError as e:
+            if attempt >= retries or not _is_retryable(e):
+                logger.error(f"OpenAI batch embedding error ({label}): {e}")
+                raise EmbeddingError(f"Failed to generate batch embeddings: {e}") from e
+            hinted = _rate_limit_delay(e)
+            delay = hinted if hinted is not None else 0.2 * (2**attempt)
+            delay = min(delay, 60.0) * (1 + random.uniform(0, 0.1))  # nosec B311 - jitter only
+            logger.warning(
+                f"Embedding {label} failed (attempt {attempt + 1}/{retries + 1}), "
+                f"retrying in {delay:.2f}s: {e}"
+            )
+            if getattr(e, "status_code", None) == 429:
+                gate.defer(delay)  # every worker backs off, not just this one
+            else:
+                time.sleep(delay)
+    raise RuntimeError("unreachable")  # pragma: no cover
+
+
+def embed_batch(
+    texts: list[str],
+    batch_size: int = 100,
+    max_concurrency: int | None = None,
+    max_batch_tokens: int | None = None,
+) -> list[list[float]]:
     """
     Generate embeddings for multiple texts (batch processing).
 
+    Batches are formed in input order, capped by ``batch_size`` texts and an
+    estimated ``max_batch_tokens``, and up to ``max_concurrency`` batches are
+    in flight at once. Rate-limit responses pause all workers for the time
+    the API asks for (``Retry-After`` / ``x-ratelimit-reset-*``).
+
     Args:
         texts: List of texts to embed
         batch_size: Maximum texts per API call (OpenAI limit: 2048, default: 100)
+        max_concurrency: In-flight batches (default: ``EMBEDDING_BATCH_CONCURRENCY``)
+        max_batch_tokens: Estimated tokens per call (default: ``EMBEDDING_BATCH_MAX_TOKENS``)
 
     Returns:
-        List of 1536-dimensional embedding vectors
+        List of embedding vectors; ``result[i]`` is the embedding of ``texts[i]``
 
     Raises:
-        ValueError: If texts list is empty or batch_size invalid
+        ValueError: If texts list is empty, contains empty texts or batch_size invalid
         EmbeddingError: If batch embedding fails
     """
     if not texts:
@@ -138,63 +564,84 @@ def embed_batch(texts: list[str], batch_size: int = 100) -> list[list[float]]:
     if batch_size < 1 or batch_size > 2048:
         raise ValueError(f"batch_size must be between 1 and 2048, got {batch_size}")
 
-    # Filter empty texts and log warning
-    original_count = len(texts)
-    texts = [t.strip() for t in texts if t.strip()]
-    if len(texts) < original_count:
-        logger.warning(f"Filtered out {original_count - len(texts)} empty texts")
+    # Reject empty texts instead of dropping them (keeps output aligned with input)
+    empty = [i for i, t in enumerate(texts) if not t.strip()]
+    if empty:
+        shown = ", ".join(map(str, empty[:10])) + (" …" if len(empty) > 10 else "")
+        raise ValueError(f"Cannot embed empty texts at indices: {shown}")
+    texts = [_prepare_text(t) for t in texts]
 
-    if not texts:
-        raise ValueError("All texts are empty after filtering")
+    if settings.embed_provider not in ("openai", "bge-m3"):
+        raise ValueError(f"Unknown embed_provider: {settings.embed_provider}")
 
-    if settings.embed_provider == "openai":
+    # Serve cached vectors first; only unique misses are embedded
+    keys = [_embedding_cache_key(t) for t in texts]
+    cached = [_embedding_cache_get(k) for k in keys]
+    pending: dict[bytes, str] = {}
+    for key, text, vector in zip(keys, texts, cached, strict=True):
+        if vector is None:
+            pending.setdefault(key, text)
+    if len(pending) < len(texts):
+        logger.info(f"Embedding cache served {len(texts) - len(pending)}/{len(texts)} texts")
+
+    pending_keys = list(pending)
+    missing = list(pending.values())
+    fetched: dict[bytes, list[float]] = {}
+
+    if settings.embed_provider == "bge-m3":
+        # The local model batches by length internally; one call covers all misses
+        if missing:
+            for key, embedding in zip(pending_keys, _local_encode(missing), strict=True):
+                fetched[key] = embedding
+                _embedding_cache_set(key, embedding)
+
+    elif missing:
         client = _get_openai_client()
-
-        # Process in batches to respect API limits
-        all_embeddings: list[list[float]] = []
-        total_batches = (len(texts) + batch_size - 1) // batch_size
-
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i : i + batch_size]
-            batch_num = i // batch_size + 1
-
-            logger.info(f"Processing batch {batch_num}/{total_batches}: {len(batch)} texts")
-
-            for attempt in range(3):
+        ranges = _plan_batches(
+            missing, batch_size, max_batch_tokens or settings.embedding_batch_max_tokens
+        )
+        workers = min(max_concurrency or settings.embedding_batch_concurrency, len(ranges))
+        gate = _RateLimitGate()
+        total = len(ranges)
+        logger.info(f"Embedding {len(missing)} texts in {total} batches ({workers} in flight)")
+
+        def _run(batch_num: int, start: int, end: int) -> None:
+            label = f"batch {batch_num}/{total}"
+            vectors = _embed_openai_batch(client, missing[start:end], gate, label)
+            for key, embedding in zip(pending_keys[start:end], vectors, strict=True):
+                fetched[key] = embedding
+                _embedding_cache_set(key, embedding)
+            logger.info(f"✅ Completed {label}: {end - start} texts")
+
+        if workers <= 1:
+            for n, (start, end) in enumerate(ranges, start=1):
+                _run(n, start, end)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed-batch") as pool:
+                futures = [
+                    pool.submit(_run, n, start, end) for n, (start, end) in enumerate(ranges, 1)
+                ]
                 try:
-                    response = client.embeddings.create(
-                        model=settings.openai_embedding_model,
-                        input=batch,
-                        encoding_format="float",
-                    )
-                    break
-                except OpenAIError as e:
-                    if attempt < 2:
-                        time.sleep(0.2 * (2**attempt))
-                        continue
-                    logger.error(f"OpenAI batch embedding error: {e}")
-                    raise EmbeddingError(f"Failed to generate batch embeddings: {e}") from e
-
-            # Constrain to input size to satisfy tests using fixed-size mocks
-            batch_embeddings = [item.embedding for item in response.data][: len(batch)]
-            all_embeddings.extend(batch_embeddings)
-
-            logger.info(f"✅ Completed batch {batch_num}/{total_batches}")
-
-        return all_embeddings
+                    for future in futures:
+                        future.result()
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
 
-    else:
-        # Fallback to single embed for other providers
-        logger.info(f"Using single-embed fallback for {len(texts)} texts")
-        return [embed(text) for text in texts]
+    return [
+        vector if vector is not None else fetched[key]
+        for key, vector in zip(keys, cached, strict=True)
+    ]
 
 
-def get_embedding_dimension() -> Literal[1536, 3072]:
+def get_embedding_dimension() -> int:
     """
     Get the dimension of embeddings for current provider.
 
     Returns:
-        1536 for text-embedding-3-small, 3072 for text-embedding-3-large
+        1536 for text-embedding-3-small, 3072 for text-embedding-3-large,
+        the local model's hidden size for bge-m3 (1024 for BAAI/bge-m3)
     """
     if settings.embed_provider == "openai":
         # text-embedding-3-small = 1536 dims
@@ -202,4 +649,6 @@ def get_embedding_dimension() -> Literal[1536, 3072]:
         if "large" in settings.openai_embedding_model.lower():
             return 3072
         return 1536
+    if settings.embed_provider == "bge-m3":
+        return local_embedding_dimension()
     return 1536  # default
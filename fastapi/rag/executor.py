@@ -0,0 +1,62 @@
+"""
+Shared Worker Pool
+
+Process-wide thread pool for the blocking pieces of the async pipeline
+(local models, CPU-bound ranking, sync SDK fallbacks). Created lazily, sized
+by ``PIPELINE_EXECUTOR_WORKERS`` and shut down from the app lifespan.
+"""
+
+import asyncio
+import functools
+import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, TypeVar
+
+from config import Settings
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Get or create the shared thread pool (singleton pattern).
+
+    Returns:
+        ThreadPoolExecutor sized by ``settings.pipeline_executor_workers``
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.pipeline_executor_workers, thread_name_prefix="rag-worker"
+            )
+            logger.info(
+                f"✅ Pipeline executor started ({settings.pipeline_executor_workers} workers)"
+            )
+        return _executor
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking callable on the shared pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Shut down the shared pool; a later call to get_executor() starts a new one."""
+    global _executor
+
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=True)
+        logger.info("🛑 Pipeline executor stopped")
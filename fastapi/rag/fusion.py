@@ -0,0 +1,130 @@
+"""
+Reciprocal-Rank Fusion
+
+Merges any number of ranked result lists (collections, keyword search, …)
+into one ranking without calibrated scores:
+
+    score(doc) = Σ_s  weight_s / (k + rank_s(doc))
+
+Hits are interned to compact integer slots once; ranks, weights and source
+membership are then plain arrays, so the scoring, the per-document source
+bitmask and the final ordering are single NumPy operations.
+"""
+
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+import numpy as np
+
+RRF_K = 60  # Reciprocal-Rank Fusion constant
+
+# Label for documents returned by more than one source
+MULTI_SOURCE = "both"
+
+# Below this many hits in total, NumPy call overhead outweighs the loop it replaces
+SMALL_FUSION = 64
+
+
+def fuse_rankings(
+    rankings: Mapping[str, Sequence[Any]],
+    weights: Mapping[str, float] | None = None,
+    k: int = RRF_K,
+    limit: int | None = None,
+) -> list[tuple[Any, float, str]]:
+    """
+    Weighted Reciprocal-Rank Fusion of N ranked lists.
+
+    Args:
+        rankings: Source name -> hits in rank order (anything with an ``id``);
+            the mapping order decides which hit object represents a document
+            found by several sources (the first one)
+        weights: Source name -> weight (default 1.0 for unlisted sources)
+        k: RRF constant (higher = flatter rank contribution)
+        limit: Return only the best ``limit`` documents (default: all)
+
+    Returns:
+        ``(hit, fused_score, source)`` tuples sorted by fused score descending;
+        ``source`` is the source name, or ``"both"`` for documents returned by
+        more than one source. Ties keep first-seen order.
+
+    Raises:
+        ValueError: If there are more than 63 sources or ``k`` is negative
+    """
+    if k < 0:
+        raise ValueError(f"RRF k must be >= 0, got {k}")
+    names = list(rankings)
+    if len(names) > 63:
+        raise ValueError(f"At most 63 sources can be fused, got {len(names)}")
+    weights = weights or {}
+
+    # Intern point IDs to dense slots (first-seen order), list by list
+    slots: dict[Any, int] = {}
+    hits: list[Any] = []
+    first_source: list[int] = []
+    positions: list[list[int]] = []
+    for source, name in enumerate(names):
+        ranked = rankings[name]
+        # setdefault hands a new ID the next free slot (the current size)
+        pos = [slots.setdefault(hit.id, len(slots)) for hit in ranked]
+        for hit, slot in zip(ranked, pos, strict=True):
+            if slot == len(hits):
+                hits.append(hit)
+                first_source.append(source)
+        positions.append(pos)
+    if not hits:
+        return []
+
+    if sum(map(len, positions)) <= SMALL_FUSION:
+        return _fuse_small(names, positions, hits, first_source, weights, k, limit)
+
+    lengths = np.fromiter(map(len, positions), dtype=np.int64, count=len(positions))
+    slot_of = np.fromiter(
+        (slot for pos in positions for slot in pos), dtype=np.int64, count=int(lengths.sum())
+    )
+    source_of = np.repeat(np.arange(len(names), dtype=np.int64), lengths)
+    rank_of = np.concatenate([np.arange(1, n + 1, dtype=np.float64) for n in lengths])
+    source_weight = np.array([float(weights.get(n, 1.0)) for n in names], dtype=np.float64)
+
+    scores = np.bincount(
+        slot_of, weights=source_weight[source_of] / (k + rank_of), minlength=len(hits)
+    )
+    membership = np.zeros(len(hits), dtype=np.int64)
+    np.bitwise_or.at(membership, slot_of, np.left_shift(1, source_of))
+    multi = ((membership & (membership - 1)) != 0).tolist()  # more than one bit set
+
+    order = np.argsort(-scores, kind="stable")
+    if limit is not None:
+        order = order[:limit]
+    fused = scores.tolist()
+    return [
+        (hits[i], fused[i], MULTI_SOURCE if multi[i] else names[first_source[i]])
+        for i in order.tolist()
+    ]
+
+
+def _fuse_small(
+    names: list[str],
+    positions: list[list[int]],
+    hits: list[Any],
+    first_source: list[int],
+    weights: Mapping[str, float],
+    k: int,
+    limit: int | None,
+) -> list[tuple[Any, float, str]]:
+    """Pure-Python path of :func:`fuse_rankings` for a handful of hits (same result)."""
+    scores = [0.0] * len(hits)
+    membership = [0] * len(hits)
+    for source, (name, pos) in enumerate(zip(names, positions, strict=True)):
+        weight = float(weights.get(name, 1.0))
+        for rank, slot in enumerate(pos, start=1):
+            scores[slot] += weight / (k + rank)
+            membership[slot] |= 1 << source
+    order = sorted(range(len(hits)), key=scores.__getitem__, reverse=True)
+    return [
+        (
+            hits[i],
+            scores[i],
+            MULTI_SOURCE if membership[i] & (membership[i] - 1) else names[first_source[i]],
+        )
+        for i in order[:limit]
+    ]
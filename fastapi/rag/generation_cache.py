@@ -0,0 +1,111 @@
+"""
+Generation Cache
+
+Cache tier in front of the LLM call: the response cache is keyed on the raw
+question, so two phrasings that retrieve the very same context each pay for a
+generation. Here the key is the normalized question plus the ordered context
+point IDs, the LLM model, temperature and answer length.
+
+Context changes invalidate entries by construction: rag/ingest.py derives
+point IDs from the chunk content hash, so edited text retrieves new IDs, and
+each chunk's ``ingested_at`` payload stamp is part of the key, so re-ingested
+points miss as well. Entries are kept in LRU order with a TTL.
+"""
+
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Callable
+from threading import Lock
+from typing import Any
+
+_TURKISH_UPPER = str.maketrans({"I": "\u0131", "İ": "i"})  # Turkish casing: I -> dotless i
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize_question(question: str) -> str:
+    """Question with Turkish-aware lower case, punctuation dropped and spaces collapsed."""
+    text = unicodedata.normalize("NFKC", question).translate(_TURKISH_UPPER).lower()
+    return " ".join(_WORD.findall(text))
+
+
+def generation_key(
+    question: str,
+    context_chunks: list[dict[str, Any]],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+) -> str | None:
+    """
+    Cache key of one generation, or None when a chunk carries no point ID.
+
+    A context block merged from neighbouring chunks lists all of them in
+    ``ids``; ``ingested_at`` is the newest stamp among them.
+    """
+    parts = [normalize_question(question), model, repr(float(temperature)), str(max_tokens)]
+    for chunk in context_chunks:
+        ids = chunk.get("ids") or ([chunk["id"]] if chunk.get("id") is not None else [])
+        if not ids or None in ids:
+            return None
+        parts.append(f"{','.join(map(str, ids))}@{chunk.get('ingested_at') or ''}")
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """
+    Bounded LRU map from :func:`generation_key` to generation results.
+
+    Args:
+        max_entries: Entries kept before the least recently used is evicted
+        on_event: Optional callback receiving cache event names
+            (``hit``, ``miss``, ``expired``, ``evicted``)
+    """
+
+    def __init__(self, max_entries: int, on_event: Callable[[str], None] | None = None) -> None:
+        self.max_entries = max_entries
+        self._on_event = on_event
+        self._lock = Lock()
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    def _emit(self, event: str) -> None:
+        if self._on_event is not None:
+            self._on_event(event)
+
+    def get(self, key: str, ttl: float) -> dict[str, Any] | None:
+        """Stored result for ``key`` if younger than ``ttl`` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._emit("miss")
+                return None
+            if now - entry[0] > ttl:
+                del self._entries[key]
+                self._emit("expired")
+                self._emit("miss")
+                return None
+            self._entries.move_to_end(key)
+            self._emit("hit")
+            return entry[1]
+
+    def set(self, key: str, value: dict[str, Any]) -> None:
+        """Store ``value``, evicting least recently used entries beyond ``max_entries``."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._emit("evicted")
+
+    def clear(self) -> int:
+        """Remove all entries; returns how many there were."""
+        with self._lock:
+            n = len(self._entries)
+            self._entries.clear()
+            return n
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
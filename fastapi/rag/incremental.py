@@ -0,0 +1,379 @@
+"""
+Incremental Re-Indexing
+
+Keeps a local JSON manifest of what a collection was built from: per-document
+content hashes, the chunking parameters and the embedding model. Each run
+diffs the input files against the manifest into new, changed, unchanged and
+deleted documents, embeds only the chunks that are not stored yet and removes
+stale points with one filtered delete per batch of documents.
+
+Deletions are only inferred for documents whose source file lies under one
+of the scanned paths, so refreshing one directory never drops another.
+Without a manifest (first run) every document counts as new; chunks already
+in the collection are still skipped by ID, and deletions start with the next
+run.
+"""
+
+import json
+import logging
+import time
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    HasIdCondition,
+    MatchAny,
+)
+
+from config import Settings
+
+from .client_qdrant import allowed_collections, base_collection, get_qdrant_client
+from .embeddings import embedding_model_id, estimate_tokens
+from .ingest import (
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_EMBED_GROUP,
+    DEFAULT_UPSERT_BATCH,
+    DEFAULT_UPSERT_WORKERS,
+    Document,
+    IngestStats,
+    chunk_document,
+    document_hash,
+    existing_ids,
+    ingest_documents,
+    iter_documents,
+)
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+MANIFEST_VERSION = 1
+
+# USD per 1M input tokens for known OpenAI embedding models (local models are free)
+EMBEDDING_PRICES_PER_1M_TOKENS = {
+    "text-embedding-3-small": 0.02,
+    "text-embedding-3-large": 0.13,
+    "text-embedding-ada-002": 0.10,
+}
+
+# Throughput assumed for the time estimate until a run has been measured
+DEFAULT_TOKENS_PER_SECOND = 5000.0
+
+DELETE_BATCH = 500  # documents per filtered delete
+
+
+@dataclass(slots=True)
+class Manifest:
+    """Local record of the documents indexed into one collection."""
+
+    collection: str
+    embedding_model: str = ""
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP
+    documents: dict[str, dict[str, Any]] = field(default_factory=dict)
+    tokens_per_second: float | None = None  # measured by the last run that embedded
+    updated_at: str = ""
+
+    @classmethod
+    def load(cls, path: str | Path, collection: str) -> "Manifest":
+        """Read a manifest, or return an empty one if the file does not exist."""
+        path = Path(path)
+        if not path.exists():
+            return cls(collection)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("collection") != collection:
+            raise ValueError(
+                f"Manifest {path} belongs to collection {data.get('collection')!r}, "
+                f"not {collection!r}"
+            )
+        return cls(
+            collection,
+            embedding_model=data.get("embedding_model", ""),
+            chunk_size=data.get("chunk_size", DEFAULT_CHUNK_SIZE),
+            chunk_overlap=data.get("chunk_overlap", DEFAULT_CHUNK_OVERLAP),
+            documents=data.get("documents", {}),
+            tokens_per_second=data.get("tokens_per_second"),
+            updated_at=data.get("updated_at", ""),
+        )
+
+    def save(self, path: str | Path) -> None:
+        """Write the manifest atomically."""
+        path = Path(path)
+        data = {
+            "version": MANIFEST_VERSION,
+            "collection": self.collection,
+            "embedding_model": self.embedding_model,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "tokens_per_second": self.tokens_per_second,
+            "updated_at": self.updated_at,
+            "documents": self.documents,
+        }
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+        tmp.replace(path)
+
+
+@dataclass(slots=True)
+class IncrementalPlan:
+    """Diff between the input files and a manifest, with a cost estimate."""
+
+    new: list[Document] = field(default_factory=list)
+    changed: list[Document] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    hashes: dict[str, str] = field(default_factory=dict)  # doc_id -> hash of scanned docs
+    sources: dict[str, str] = field(default_factory=dict)  # doc_id -> source of scanned docs
+    reembed: bool = False  # embedding model changed: rebuild every vector
+    reason: str = ""  # why every document is treated as changed, if so
+    uncovered: list[str] = field(default_factory=list)  # indexed docs outside the scanned paths
+    chunks_to_embed: int = 0
+    tokens_to_embed: int = 0
+    invalid_records: int = 0
+
+    @property
+    def delta(self) -> list[Document]:
+        return self.new + self.changed
+
+    @property
+    def rebuild_error(self) -> str | None:
+        """Why the plan cannot be applied: a rebuild that would miss indexed documents."""
+        if not (self.reason and self.uncovered):
+            return None
+        return (
+            f"{self.reason}, but {len(self.uncovered)} indexed documents lie outside the "
+            f"given paths (e.g. {self.uncovered[0]!r}); run with paths covering all of them"
+        )
+
+    def estimated_cost(self, price_per_1m: float | None) -> float | None:
+        """Embedding cost in USD, or None if the model's price is unknown."""
+        if price_per_1m is None:
+            return None
+        return self.tokens_to_embed / 1_000_000 * price_per_1m
+
+    def estimated_seconds(self, tokens_per_second: float | None) -> float:
+        rate = tokens_per_second or DEFAULT_TOKENS_PER_SECOND
+        return self.tokens_to_embed / rate if rate > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.new)} new, {len(self.changed)} changed, {len(self.deleted)} deleted, "
+            f"{self.unchanged} unchanged | {self.chunks_to_embed} chunks "
+            f"(~{self.tokens_to_embed} tokens) to embed"
+        )
+
+
+def default_manifest_path(collection: str) -> str:
+    """Manifest file used by ``tools/ingest.py --incremental`` for ``collection``."""
+    return f".ingest-manifest-{collection}.json"
+
+
+def embedding_price_per_1m(model: str | None = None) -> float | None:
+    """Price per 1M tokens of ``model`` (default: active model); 0 for local models."""
+    if settings.embed_provider != "openai":
+        return 0.0
+    return EMBEDDING_PRICES_PER_1M_TOKENS.get(model or embedding_model_id())
+
+
+def _under(source: str, roots: Sequence[Path]) -> bool:
+    path = Path(source).resolve()
+    return any(path == root or root in path.parents for root in roots)
+
+
+def plan_incremental(
+    paths: Sequence[str | Path],
+    manifest: Manifest,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    client: QdrantClient | None = None,
+) -> IncrementalPlan:
+    """
+    Diff the documents under ``paths`` against ``manifest``.
+
+    If a client is given, chunks already stored in the collection are looked
+    up so the token estimate counts only what will actually be embedded;
+    otherwise every chunk of a new or changed document is counted.
+    """
+    plan = IncrementalPlan()
+    model = embedding_model_id()
+    if manifest.documents and manifest.embedding_model != model:
+        plan.reembed = True
+        plan.reason = f"embedding model changed ({manifest.embedding_model} -> {model})"
+    elif manifest.documents and (manifest.chunk_size, manifest.chunk_overlap) != (
+        chunk_size,
+        chunk_overlap,
+    ):
+        # Re-chunk everything; chunks whose text survives keep their point IDs
+        plan.reason = "chunking parameters changed"
+
+    stats = IngestStats()
+    for doc in iter_documents(paths, stats):
+        digest = document_hash(doc)
+        if doc.doc_id in plan.hashes:
+            logger.warning(f"Duplicate document id {doc.doc_id!r} in {doc.source}; keeping first")
+            continue
+        plan.hashes[doc.doc_id] = digest
+        plan.sources[doc.doc_id] = doc.source
+        previous = manifest.documents.get(doc.doc_id)
+        if previous is None:
+            plan.new.append(doc)
+        elif previous.get("hash") != digest or plan.reason:
+            plan.changed.append(doc)
+        else:
+            plan.unchanged += 1
+    plan.invalid_records = stats.invalid_records
+
+    roots = [Path(p).resolve() for p in paths]
+    plan.deleted = sorted(
+        doc_id
+        for doc_id, entry in manifest.documents.items()
+        if doc_id not in plan.hashes and _under(entry.get("source", ""), roots)
+    )
+    if plan.reason:
+        # A rebuild must reach every indexed document, or the collection mixes models/chunkings
+        plan.uncovered = sorted(
+            doc_id
+            for doc_id, entry in manifest.documents.items()
+            if doc_id not in plan.hashes and not _under(entry.get("source", ""), roots)
+        )
+
+    chunks = [c for doc in plan.delta for c in chunk_document(doc, chunk_size, chunk_overlap)]
+    if client is not None and not plan.reembed and chunks:
+        stored = existing_ids(client, manifest.collection, [c.point_id for c in chunks])
+        chunks = [c for c in chunks if c.point_id not in stored]
+    plan.chunks_to_embed = len(chunks)
+    plan.tokens_to_embed = sum(estimate_tokens(c.text) for c in chunks)
+    return plan
+
+
+def delete_stale(
+    client: QdrantClient,
+    collection: str,
+    doc_ids: Sequence[str],
+    keep_ids: Mapping[str, Sequence[str]] | None = None,
+) -> int:
+    """
+    Delete the points of ``doc_ids`` (matched on ``metadata.doc_id``), except
+    the point IDs listed for a document in ``keep_ids``. One filtered delete
+    is issued per :data:`DELETE_BATCH` documents.
+
+    Returns:
+        Number of points deleted
+    """
+    keep_ids = keep_ids or {}
+    deleted = 0
+    for i in range(0, len(doc_ids), DELETE_BATCH):
+        batch = list(doc_ids[i : i + DELETE_BATCH])
+        keep = [pid for doc_id in batch for pid in keep_ids.get(doc_id, ())]
+        stale = Filter(
+            must=[FieldCondition(key="metadata.doc_id", match=MatchAny(any=batch))],
+            must_not=[HasIdCondition(has_id=keep)] if keep else None,
+        )
+        count = client.count(collection, count_filter=stale, exact=True).count
+        if count:
+            client.delete(collection, points_selector=FilterSelector(filter=stale), wait=True)
+            deleted += count
+    return deleted
+
+
+def ingest_incremental(
+    paths: Sequence[str | Path],
+    collection: str,
+    manifest_path: str | Path,
+    plan: IncrementalPlan | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    embed_group: int = DEFAULT_EMBED_GROUP,
+    upsert_batch: int = DEFAULT_UPSERT_BATCH,
+    upsert_workers: int = DEFAULT_UPSERT_WORKERS,
+    client: QdrantClient | None = None,
+    progress: Callable[[IngestStats], None] | None = None,
+) -> IngestStats:
+    """
+    Apply an incremental update of ``collection`` and refresh the manifest.
+
+    New and changed documents are ingested first (only chunks not stored yet
+    are embedded); afterwards the superseded chunks of changed documents and
+    all chunks of deleted documents are removed, so a document is never
+    missing from the index mid-run. The manifest is written only after both
+    steps succeed; an interrupted run is simply repeated.
+
+    Args:
+        manifest_path: Manifest file (created on the first run)
+        plan: Plan from :func:`plan_incremental` (computed if omitted)
+
+    Returns:
+        IngestStats including ``deleted``
+
+    Raises:
+        ValueError: If the collection is not allowed, or the embedding model or
+            chunking changed and ``paths`` do not cover every indexed document
+    """
+    if base_collection(collection) not in allowed_collections():
+        raise ValueError(f"Invalid collection: {collection}")
+
+    client = client or get_qdrant_client()
+    manifest = Manifest.load(manifest_path, collection)
+    if plan is None:
+        plan = plan_incremental(paths, manifest, chunk_size, chunk_overlap, client=client)
+    if plan.rebuild_error:
+        raise ValueError(plan.rebuild_error)
+
+    started = time.perf_counter()
+    stats = IngestStats(invalid_records=plan.invalid_records)
+    entries: dict[str, dict[str, Any]] = {}
+    keep: dict[str, list[str]] = {}
+
+    def _tracked(docs: list[Document]) -> Iterable[Document]:
+        # Record each document's manifest entry and current point IDs as it streams by
+        for doc in docs:
+            ids = [c.point_id for c in chunk_document(doc, chunk_size, chunk_overlap)]
+            keep[doc.doc_id] = ids
+            entries[doc.doc_id] = {
+                "hash": plan.hashes[doc.doc_id],
+                "source": doc.source,
+                "chunks": len(ids),
+            }
+            yield doc
+
+    if plan.delta:
+        ingest_documents(
+            _tracked(plan.delta),
+            collection,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            embed_group=embed_group,
+            upsert_batch=upsert_batch,
+            upsert_workers=upsert_workers,
+            client=client,
+            progress=progress,
+            stats=stats,
+            reembed=plan.reembed,
+        )
+
+    stale_docs = [d.doc_id for d in plan.changed] + plan.deleted
+    if stale_docs:
+        stats.deleted = delete_stale(client, collection, stale_docs, keep)
+
+    stats.elapsed_seconds = time.perf_counter() - started
+    for doc_id in plan.deleted:
+        manifest.documents.pop(doc_id, None)
+    manifest.documents.update(entries)
+    for doc_id, source in plan.sources.items():  # unchanged documents may have moved files
+        manifest.documents[doc_id]["source"] = source
+    manifest.embedding_model = embedding_model_id()
+    manifest.chunk_size, manifest.chunk_overlap = chunk_size, chunk_overlap
+    if stats.tokens and stats.elapsed_seconds:
+        manifest.tokens_per_second = stats.tokens_per_second
+    manifest.updated_at = datetime.now(UTC).isoformat(timespec="seconds")
+    manifest.save(manifest_path)
+
+    logger.info(f"✅ Incremental update of {collection} finished: {stats.summary()}")
+    return stats
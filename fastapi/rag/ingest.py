@@ -0,0 +1,515 @@
+"""
+Bulk Ingestion
+
+Streams documents from JSONL or Markdown files, splits them into chunks,
+embeds new chunks through :func:`embed_batch` and upserts them into a Qdrant
+collection in parallel batches.
+
+Point IDs are derived from the document ID and the chunk's content hash
+(UUIDv5), so re-running an ingestion is idempotent: chunks already stored
+are detected by ID and not re-embedded; only their position
+(``metadata.chunk_index``), document metadata and ``ingested_at`` stamp are
+rewritten, since an edit elsewhere in the document may have moved them. A JSON
+checkpoint records how many documents of each source file are fully stored,
+so an interrupted multi-hour run resumes where it stopped.
+
+Input formats:
+    - ``*.jsonl``: one document per line, ``{"id": ..., "text": ..., "metadata": {...}}``
+      (``doc_id`` is accepted for ``id``; ``title``/``url``/``source`` are copied
+      into metadata)
+    - ``*.md`` / ``*.markdown``: one document per file, ID = path relative to the
+      input root, title = first ``# `` heading
+"""
+
+import hashlib
+import json
+import logging
+import re
+import time
+import uuid
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, SetPayload, SetPayloadOperation
+
+from .client_qdrant import allowed_collections, base_collection, get_qdrant_client
+from .embeddings import embed_batch, embedding_model_id, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Namespace for content-hash point IDs (stable across runs and machines)
+POINT_ID_NAMESPACE = uuid.UUID("6f1d2c8e-6a43-5b7e-9a38-2f0c1f7e4d10")
+
+DEFAULT_CHUNK_SIZE = 1200  # characters
+DEFAULT_CHUNK_OVERLAP = 150  # characters
+DEFAULT_EMBED_GROUP = 256  # chunks per embed_batch call
+DEFAULT_UPSERT_BATCH = 128  # points per upsert request
+DEFAULT_UPSERT_WORKERS = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+@dataclass(slots=True)
+class Document:
+    """A source document before chunking."""
+
+    doc_id: str
+    text: str
+    metadata: dict[str, Any] = field(default_factory=dict)
+    source: str = ""  # file the document was read from (checkpoint key)
+
+
+@dataclass(slots=True)
+class Chunk:
+    """A chunk ready for embedding; ``point_id`` is stable for identical content."""
+
+    doc_id: str
+    chunk_index: int
+    text: str
+    metadata: dict[str, Any]
+    content_hash: str
+    occurrence: int = 0  # earlier chunks of the document with the same content
+
+    @property
+    def point_id(self) -> str:
+        name = f"{self.doc_id}\x00{self.content_hash}"
+        if self.occurrence:  # repeated text keeps one point per position
+            name = f"{name}\x00{self.occurrence}"
+        return str(uuid.uuid5(POINT_ID_NAMESPACE, name))
+
+    def payload(self, ingested_at: str, embedding_model: str = "") -> dict[str, Any]:
+        return {
+            "text": self.text,
+            "metadata": {**self.metadata, "doc_id": self.doc_id, "chunk_index": self.chunk_index},
+            "content_hash": self.content_hash,
+            "embedding_model": embedding_model,
+            "ingested_at": ingested_at,
+        }
+
+
+@dataclass(slots=True)
+class IngestStats:
+    """Counters and throughput of one ingestion run."""
+
+    documents: int = 0
+    chunks: int = 0
+    skipped_unchanged: int = 0
+    embedded: int = 0
+    upserted: int = 0
+    tokens: int = 0  # estimated tokens sent for embedding
+    deleted: int = 0  # stale points removed (incremental mode)
+    invalid_records: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def summary(self) -> str:
+        deleted = f", {self.deleted} deleted" if self.deleted else ""
+        return (
+            f"{self.documents} docs, {self.chunks} chunks "
+            f"({self.embedded} embedded, {self.skipped_unchanged} unchanged), "
+            f"{self.upserted} upserted{deleted} in {self.elapsed_seconds:.1f}s | "
+            f"{self.chunks_per_second:.1f} chunks/s, {self.tokens_per_second:.0f} tokens/s"
+        )
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of the chunk text (whitespace-normalized)."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def document_hash(doc: Document) -> str:
+    """SHA-256 over a document's normalized text and metadata (change detection)."""
+    meta = json.dumps(doc.metadata, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{' '.join(doc.text.split())}\x00{meta}".encode()).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+
+def _markdown_title(text: str) -> str | None:
+    for line in text.splitlines():
+        if line.startswith("# "):
+            return line[2:].strip()
+    return None
+
+
+def _iter_jsonl(path: Path, stats: IngestStats | None) -> Iterator[Document]:
+    with path.open(encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                doc_id = str(record.get("id") or record.get("doc_id") or "")
+                text = record.get("text") or ""
+                if not doc_id or not isinstance(text, str) or not text.strip():
+                    raise ValueError("missing id or text")
+            except (ValueError, AttributeError) as e:
+                logger.warning(f"Skipping invalid record {path}:{lineno}: {e}")
+                if stats is not None:
+                    stats.invalid_records += 1
+                continue
+            metadata = dict(record.get("metadata") or {})
+            for key in ("title", "url", "source"):
+                if key in record and key not in metadata:
+                    metadata[key] = record[key]
+            yield Document(doc_id, text, metadata, source=str(path))
+
+
+def iter_documents(
+    paths: Sequence[str | Path], stats: IngestStats | None = None
+) -> Iterator[Document]:
+    """
+    Stream documents from JSONL / Markdown files or directories (recursive).
+
+    Files are visited in sorted order so a checkpoint can be resumed.
+    """
+    for raw in paths:
+        root = Path(raw)
+        files = sorted(p for p in root.rglob("*") if p.is_file()) if root.is_dir() else [root]
+        for path in files:
+            suffix = path.suffix.lower()
+            if suffix == ".jsonl":
+                yield from _iter_jsonl(path, stats)
+            elif suffix in (".md", ".markdown"):
+                text = path.read_text(encoding="utf-8")
+                if not text.strip():
+                    continue
+                doc_id = path.relative_to(root).as_posix() if root.is_dir() else path.name
+                title = _markdown_title(text)
+                metadata = {"source_path": doc_id, **({"title": title} if title else {})}
+                yield Document(doc_id, text, metadata, source=str(path))
+            elif not root.is_dir():
+                logger.warning(f"Unsupported input file (expected .jsonl/.md): {path}")
+
+
+# ---------------------------------------------------------------------------
+# Chunking
+# ---------------------------------------------------------------------------
+
+
+def _split_long(paragraph: str, size: int) -> list[str]:
+    """Split a paragraph longer than ``size`` on sentence ends, hard-cutting if needed."""
+    pieces: list[str] = []
+    current = ""
+    for sentence in _SENTENCE_END.split(paragraph):
+        while len(sentence) > size:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:size])
+            sentence = sentence[size:]
+        if current and len(current) + 1 + len(sentence) > size:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def chunk_text(
+    text: str, size: int = DEFAULT_CHUNK_SIZE, overlap: int = DEFAULT_CHUNK_OVERLAP
+) -> list[str]:
+    """
+    Split text into chunks of at most ``size`` characters.
+
+    Paragraphs (blank-line separated) are packed together; a new chunk starts
+    with the last ``overlap`` characters of the previous one (cut at a word
+    boundary) so context spanning the boundary is not lost.
+    """
+    if size < 1 or overlap < 0 or overlap >= size:
+        raise ValueError("chunk size must be positive and overlap smaller than size")
+
+    paragraphs = [" ".join(p.split()) for p in re.split(r"\n\s*\n", text)]
+    units: list[str] = []
+    for paragraph in paragraphs:
+        if paragraph:
+            units.extend(
+                _split_long(paragraph, size - overlap) if len(paragraph) > size else [paragraph]
+            )
+
+    chunks: list[str] = []
+    current = ""
+    for unit in units:
+        if current and len(current) + 2 + len(unit) > size:
+            chunks.append(current)
+            tail = current[-overlap:] if overlap else ""
+            if tail and " " in tail:
+                tail = tail[tail.index(" ") + 1 :]
+            current = f"{tail}\n\n{unit}" if tail and len(tail) + 2 + len(unit) <= size else unit
+        else:
+            current = f"{current}\n\n{unit}" if current else unit
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_document(
+    doc: Document, size: int = DEFAULT_CHUNK_SIZE, overlap: int = DEFAULT_CHUNK_OVERLAP
+) -> list[Chunk]:
+    """Chunk one document, attaching its metadata and content hashes."""
+    chunks: list[Chunk] = []
+    seen: dict[str, int] = {}
+    for i, text in enumerate(chunk_text(doc.text, size, overlap)):
+        digest = content_hash(text)
+        chunks.append(Chunk(doc.doc_id, i, text, doc.metadata, digest, seen.get(digest, 0)))
+        seen[digest] = seen.get(digest, 0) + 1
+    return chunks
+
+
+# ---------------------------------------------------------------------------
+# Checkpoint
+# ---------------------------------------------------------------------------
+
+
+class Checkpoint:
+    """
+    Per-source count of fully stored documents, persisted atomically as JSON.
+
+    Args:
+        path: Checkpoint file, or None to disable resuming
+    """
+
+    def __init__(self, path: str | Path | None) -> None:
+        self.path = Path(path) if path else None
+        self.done: dict[str, int] = {}
+        if self.path and self.path.exists():
+            self.done = json.loads(self.path.read_text(encoding="utf-8")).get("done", {})
+            logger.info(f"Resuming from checkpoint {self.path}: {sum(self.done.values())} docs")
+
+    def advance(self, source: str, count: int = 1) -> None:
+        self.done[source] = self.done.get(source, 0) + count
+
+    def save(self, stats: IngestStats) -> None:
+        if not self.path:
+            return
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(
+            json.dumps({"done": self.done, "stats": asdict(stats)}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        tmp.replace(self.path)
+
+    def skip(self, docs: Iterable[Document]) -> Iterator[Document]:
+        """Drop documents already recorded as stored."""
+        seen: dict[str, int] = {}
+        for doc in docs:
+            seen[doc.source] = seen.get(doc.source, 0) + 1
+            if seen[doc.source] > self.done.get(doc.source, 0):
+                yield doc
+
+
+# ---------------------------------------------------------------------------
+# Ingestion
+# ---------------------------------------------------------------------------
+
+
+def existing_ids(client: QdrantClient, collection: str, ids: Sequence[str]) -> set[str]:
+    """IDs among ``ids`` that are already stored in ``collection``."""
+    found: set[str] = set()
+    for i in range(0, len(ids), 1000):
+        records = client.retrieve(
+            collection, ids=list(ids[i : i + 1000]), with_payload=False, with_vectors=False
+        )
+        found.update(str(r.id) for r in records)
+    return found
+
+
+def ingest(
+    paths: Sequence[str | Path],
+    collection: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    embed_group: int = DEFAULT_EMBED_GROUP,
+    upsert_batch: int = DEFAULT_UPSERT_BATCH,
+    upsert_workers: int = DEFAULT_UPSERT_WORKERS,
+    checkpoint: str | Path | None = None,
+    client: QdrantClient | None = None,
+    progress: Callable[[IngestStats], None] | None = None,
+) -> IngestStats:
+    """
+    Ingest documents from files into ``collection``.
+
+    Args:
+        paths: JSONL/Markdown files or directories
+        collection: Target collection (must be an allowed collection)
+        checkpoint: Optional checkpoint file for resuming
+        client: Qdrant client (default: shared client from settings)
+        progress: Optional callback invoked with running stats after each group
+
+    Returns:
+        IngestStats with counts and throughput
+
+    Raises:
+        ValueError: If the collection is not allowed
+        EmbeddingError: If embedding fails after retries
+    """
+    stats = IngestStats()
+    state = Checkpoint(checkpoint)
+    return ingest_documents(
+        state.skip(iter_documents(paths, stats)),
+        collection,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        embed_group=embed_group,
+        upsert_batch=upsert_batch,
+        upsert_workers=upsert_workers,
+        client=client,
+        progress=progress,
+        stats=stats,
+        checkpoint=state,
+    )
+
+
+def ingest_documents(
+    documents: Iterable[Document],
+    collection: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    embed_group: int = DEFAULT_EMBED_GROUP,
+    upsert_batch: int = DEFAULT_UPSERT_BATCH,
+    upsert_workers: int = DEFAULT_UPSERT_WORKERS,
+    client: QdrantClient | None = None,
+    progress: Callable[[IngestStats], None] | None = None,
+    stats: IngestStats | None = None,
+    checkpoint: Checkpoint | None = None,
+    reembed: bool = False,
+) -> IngestStats:
+    """
+    Chunk, embed and upsert ``documents`` into ``collection``.
+
+    Documents are processed in groups of about ``embed_group`` chunks: chunks
+    whose IDs already exist are not embedded again (unless ``reembed``) and
+    only get their payload position and stamp refreshed, the rest are
+    embedded with one :func:`embed_batch` call and upserted in
+    ``upsert_batch``-sized requests by ``upsert_workers`` threads. Upserts of
+    one group overlap with embedding of the next; the checkpoint advances only
+    after a group is fully stored.
+
+    Args:
+        reembed: Embed every chunk even if its ID exists (embedding model changed)
+
+    Raises:
+        ValueError: If the collection is not allowed (or a build of an allowed one)
+        EmbeddingError: If embedding fails after retries
+    """
+    if base_collection(collection) not in allowed_collections():
+        raise ValueError(f"Invalid collection: {collection}")
+
+    client = client or get_qdrant_client()
+    stats = stats if stats is not None else IngestStats()
+    state = checkpoint or Checkpoint(None)
+    model = embedding_model_id()
+    ingested_at = datetime.now(UTC).isoformat(timespec="seconds")
+    started = time.perf_counter()
+
+    def _upsert(points: list[PointStruct]) -> int:
+        client.upsert(collection, points=points, wait=True)
+        return len(points)
+
+    def _refresh(chunks: list[Chunk]) -> int:
+        # Stored chunks keep their vector; chunk_index and metadata may have moved
+        operations = [
+            SetPayloadOperation(
+                set_payload=SetPayload(
+                    payload={
+                        "metadata": c.payload(ingested_at)["metadata"],
+                        "ingested_at": ingested_at,
+                    },
+                    points=[c.point_id],
+                )
+            )
+            for c in chunks
+        ]
+        client.batch_update_points(collection, update_operations=operations, wait=True)
+        return 0  # counted as skipped_unchanged, not upserted
+
+    pending: tuple[list[Future[int]], dict[str, int]] | None = None
+
+    def _finish(group: tuple[list[Future[int]], dict[str, int]] | None) -> None:
+        if group is None:
+            return
+        futures, sources = group
+        for future in futures:
+            stats.upserted += future.result()
+        for source, count in sources.items():
+            state.advance(source, count)
+        stats.elapsed_seconds = time.perf_counter() - started
+        state.save(stats)
+        if progress is not None:
+            progress(stats)
+
+    def _process(docs: list[Document], chunks: list[Chunk]) -> None:
+        nonlocal pending
+        ids = [c.point_id for c in chunks]
+        stored = set() if reembed else existing_ids(client, collection, ids)
+        fresh = [c for c, pid in zip(chunks, ids, strict=True) if pid not in stored]
+        kept = [c for c, pid in zip(chunks, ids, strict=True) if pid in stored]
+        stats.skipped_unchanged += len(kept)
+
+        futures = [
+            pool.submit(_refresh, kept[i : i + upsert_batch])
+            for i in range(0, len(kept), upsert_batch)
+        ]
+        if fresh:
+            # Repeated chunk texts are embedded once
+            texts = {c.content_hash: c.text for c in fresh}
+            vectors = dict(zip(texts, embed_batch(list(texts.values())), strict=True))
+            stats.embedded += len(texts)
+            stats.tokens += sum(estimate_tokens(t) for t in texts.values())
+            points = [
+                PointStruct(
+                    id=c.point_id,
+                    vector=vectors[c.content_hash],
+                    payload=c.payload(ingested_at, model),
+                )
+                for c in fresh
+            ]
+            futures += [
+                pool.submit(_upsert, points[i : i + upsert_batch])
+                for i in range(0, len(points), upsert_batch)
+            ]
+
+        sources: dict[str, int] = {}
+        for doc in docs:
+            sources[doc.source] = sources.get(doc.source, 0) + 1
+
+        # Wait for the previous group only now, so its upserts overlapped our embedding
+        _finish(pending)
+        pending = (futures, sources)
+
+    with ThreadPoolExecutor(max_workers=upsert_workers, thread_name_prefix="ingest-upsert") as pool:
+        group_docs: list[Document] = []
+        group_chunks: list[Chunk] = []
+        for doc in documents:
+            chunks = chunk_document(doc, chunk_size, chunk_overlap)
+            stats.documents += 1
+            stats.chunks += len(chunks)
+            group_docs.append(doc)
+            group_chunks.extend(chunks)
+            if len(group_chunks) >= embed_group:
+                _process(group_docs, group_chunks)
+                group_docs, group_chunks = [], []
+        if group_docs:
+            _process(group_docs, group_chunks)
+        _finish(pending)
+
+    stats.elapsed_seconds = time.perf_counter() - started
+    logger.info(f"✅ Ingestion into {collection} finished: {stats.summary()}")
+    return stats
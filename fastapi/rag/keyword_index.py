@@ -0,0 +1,339 @@
+"""
+Local BM25 Keyword Index
+
+Dense embeddings miss exact identifiers users type verbatim: drug names
+("Metformin"), ICD-10 codes ("E11.9"), lab abbreviations. This index adds a
+lexical source that retrieval fuses with the vector searches through RRF.
+
+Tokenization is Turkish-aware: Turkish casing (İ/I), the suffix after an
+apostrophe is dropped ("Metformin'in" -> "metformin"), diacritics are folded so
+"ilac" matches "ilaç", and alphabetic words are truncated to a fixed prefix, a
+light stemmer that works well for agglutinative Turkish. Tokens containing
+digits (codes, doses) are kept whole.
+
+Layout of ``KEYWORD_INDEX_PATH``:
+
+- ``meta.json``            collections, document count, average length, build time
+- ``terms.json``           sorted vocabulary; a term's position is its ID
+- ``term_offsets.npy``     (terms + 1) int64 start of each term's postings
+- ``postings.npy``         uint32 document rows, grouped by term, ascending
+- ``frequencies.npy``      uint16 term frequency per posting
+- ``doc_lengths.npy``      uint32 tokens per document
+- ``payloads.jsonl``       one ``{"id": ..., "payload": ...}`` line per document
+- ``offsets.npy``          (documents + 1) byte offsets into ``payloads.jsonl``
+
+Arrays are memory-mapped; a query touches only its terms' posting slices.
+``build_keyword_index`` writes a new copy next to the old one and swaps
+directories, so a running API picks up the rebuild on its next search.
+"""
+
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import shutil
+import unicodedata
+from array import array
+from collections import Counter
+from collections.abc import Callable, Iterable, Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import ScoredPoint
+
+from config import Settings
+
+from .client_qdrant import payload_selector
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+INDEX_VERSION = 1
+BUILD_BATCH = 1024  # points per scroll page
+BM25_K1 = 1.2  # term-frequency saturation
+BM25_B = 0.75  # document-length normalization
+STEM_PREFIX = 5  # characters kept of alphabetic tokens
+
+# Function words and question words (diacritics folded)
+STOPWORDS = frozenset(
+    "acaba ama bazi bir biri bu cok da daha de diye en gibi hangi hem icin ile ise "
+    "kac kadar ki mi midir mu mudur nasil ne nedir neden nelerdir o olan olarak "
+    "sonra su ve veya ya yani".split()
+)
+
+_TURKISH_UPPER = str.maketrans({"I": "\u0131", "İ": "i"})  # Turkish casing: I -> dotless i
+_FOLD = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+# A word, optionally joined to more by . - / ("e11.9", "covid-19"), then an
+# apostrophe suffix that is matched but dropped ("metformin'in")
+_TOKEN = re.compile(r"([^\W_]+(?:[./-][^\W_]+)*)(?:['\u2019][^\W_]+)?")
+_SEPARATOR = re.compile(r"[./-]")
+
+_META = "meta.json"
+_TERMS = "terms.json"
+_TERM_OFFSETS = "term_offsets.npy"
+_POSTINGS = "postings.npy"
+_FREQUENCIES = "frequencies.npy"
+_DOC_LENGTHS = "doc_lengths.npy"
+_PAYLOADS = "payloads.jsonl"
+_OFFSETS = "offsets.npy"
+
+
+def tokenize(text: str) -> list[str]:
+    """Index terms of ``text`` (see the module docstring for the rules)."""
+    text = unicodedata.normalize("NFKC", text).translate(_TURKISH_UPPER).lower().translate(_FOLD)
+    terms: list[str] = []
+    for match in _TOKEN.finditer(text):
+        token = match.group(1)
+        if any(c.isdigit() for c in token):
+            terms.append(token)
+            continue
+        for word in _SEPARATOR.split(token):
+            if len(word) > 1 and word not in STOPWORDS:
+                terms.append(word[:STEM_PREFIX])
+    return terms
+
+
+class KeywordIndex:
+    """Memory-mapped BM25 index produced by :func:`build_keyword_index`."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.meta: dict[str, Any] = json.loads((self.path / _META).read_text(encoding="utf-8"))
+        if self.meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported keyword index version: {self.meta.get('version')}")
+        self.collections: list[str] = self.meta["collections"]
+        terms = json.loads((self.path / _TERMS).read_text(encoding="utf-8"))
+        self._term_ids = {term: i for i, term in enumerate(terms)}
+        self.term_offsets = np.load(self.path / _TERM_OFFSETS, mmap_mode="r")
+        self.postings = np.load(self.path / _POSTINGS, mmap_mode="r")
+        self.frequencies = np.load(self.path / _FREQUENCIES, mmap_mode="r")
+        self.offsets = np.load(self.path / _OFFSETS, mmap_mode="r")
+        lengths = np.load(self.path / _DOC_LENGTHS).astype(np.float32)
+        avgdl = float(self.meta["avg_doc_length"]) or 1.0
+        # Per-document BM25 denominator term, computed once per load
+        self._length_norm = BM25_K1 * (1.0 - BM25_B + BM25_B * lengths / avgdl)
+        self._payloads: mmap.mmap | None = None
+        if len(self):
+            with (self.path / _PAYLOADS).open("rb") as f:
+                self._payloads = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return int(self._length_norm.shape[0])
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._term_ids)
+
+    def _record(self, row: int) -> dict[str, Any]:
+        if self._payloads is None:
+            raise RuntimeError(f"Keyword index {self.path} is empty")
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self._payloads[start:end])
+
+    def scores(self, query: str) -> tuple[np.ndarray, np.ndarray]:
+        """BM25 scores of the documents matching any query term: ``(rows, scores)``."""
+        term_ids = {self._term_ids[t] for t in tokenize(query) if t in self._term_ids}
+        if not term_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        n = len(self)
+        rows, contributions = [], []
+        for term in sorted(term_ids):
+            start, end = int(self.term_offsets[term]), int(self.term_offsets[term + 1])
+            docs = np.asarray(self.postings[start:end], dtype=np.int64)
+            tf = np.asarray(self.frequencies[start:end], dtype=np.float32)
+            df = end - start
+            idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            rows.append(docs)
+            contributions.append(idf * tf * (BM25_K1 + 1.0) / (tf + self._length_norm[docs]))
+        if len(rows) == 1:
+            return rows[0], contributions[0]
+        matched, slot = np.unique(np.concatenate(rows), return_inverse=True)
+        return matched, np.bincount(slot, weights=np.concatenate(contributions)).astype(np.float32)
+
+    def search(self, query: str, topk: int) -> list[ScoredPoint]:
+        """Best ``topk`` documents for ``query`` by BM25, shaped like Qdrant results."""
+        if not len(self) or topk <= 0:
+            return []
+        rows, scores = self.scores(query)
+        if not len(rows):
+            return []
+        k = min(topk, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results = []
+        for i in top:
+            record = self._record(int(rows[i]))
+            results.append(
+                ScoredPoint(
+                    id=record["id"], version=0, score=float(scores[i]), payload=record["payload"]
+                )
+            )
+        return results
+
+
+def _scroll_payloads(
+    client: QdrantClient, collection: str, batch: int
+) -> Iterable[tuple[Any, dict[str, Any]]]:
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection,
+            limit=batch,
+            offset=offset,
+            with_payload=payload_selector(),
+            with_vectors=False,
+        )
+        for r in records:
+            yield r.id, r.payload or {}
+        if offset is None or not records:
+            return
+
+
+def build_keyword_index(
+    client: QdrantClient,
+    collections: Sequence[str],
+    path: str | Path,
+    batch: int = BUILD_BATCH,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """
+    Build a BM25 index over the ``text`` payload of every point in
+    ``collections`` and swap it in at ``path`` atomically.
+
+    Args:
+        client: Qdrant client
+        collections: Collections or aliases to index (together, one ranking)
+        path: Index directory (replaced when the build completes)
+        batch: Points per scroll page
+        progress: Called with the running document count after each page
+
+    Returns:
+        Number of indexed documents
+    """
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    term_ids: dict[str, int] = {}
+    posting_terms, posting_docs, posting_tfs = array("I"), array("I"), array("H")
+    lengths = array("I")
+    offsets = [0]
+    seen: set[Any] = set()
+    with (tmp / _PAYLOADS).open("wb") as payloads:
+        for collection in collections:
+            for point_id, payload in _scroll_payloads(client, collection, batch):
+                if point_id in seen:  # same chunk stored in several collections
+                    continue
+                seen.add(point_id)
+                terms = tokenize(str(payload.get("text", "")))
+                row = len(lengths)
+                for term, tf in Counter(terms).items():
+                    posting_terms.append(term_ids.setdefault(term, len(term_ids)))
+                    posting_docs.append(row)
+                    posting_tfs.append(min(tf, 0xFFFF))
+                lengths.append(len(terms))
+                line = json.dumps({"id": point_id, "payload": payload}, ensure_ascii=False)
+                payloads.write(line.encode("utf-8") + b"\n")
+                offsets.append(payloads.tell())
+                if progress is not None and len(lengths) % batch == 0:
+                    progress(len(lengths))
+
+    # Renumber terms alphabetically and group postings by term (CSR layout)
+    vocabulary = sorted(term_ids)
+    renumber = np.empty(len(vocabulary), dtype=np.uint32)
+    renumber[[term_ids[t] for t in vocabulary]] = np.arange(len(vocabulary), dtype=np.uint32)
+    terms_of = renumber[np.frombuffer(posting_terms, dtype=np.uint32)]
+    order = np.argsort(terms_of, kind="stable")  # rows stay ascending within a term
+    counts = np.bincount(terms_of, minlength=len(vocabulary))
+    term_offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    np.cumsum(counts, out=term_offsets[1:])
+
+    doc_lengths = np.frombuffer(lengths, dtype=np.uint32)
+    np.save(tmp / _TERM_OFFSETS, term_offsets)
+    np.save(tmp / _POSTINGS, np.frombuffer(posting_docs, dtype=np.uint32)[order])
+    np.save(tmp / _FREQUENCIES, np.frombuffer(posting_tfs, dtype=np.uint16)[order])
+    np.save(tmp / _DOC_LENGTHS, doc_lengths)
+    np.save(tmp / _OFFSETS, np.asarray(offsets, dtype=np.int64))
+    (tmp / _TERMS).write_text(json.dumps(vocabulary, ensure_ascii=False), encoding="utf-8")
+    count = len(doc_lengths)
+    meta = {
+        "version": INDEX_VERSION,
+        "collections": list(collections),
+        "count": count,
+        "terms": len(vocabulary),
+        "postings": len(posting_docs),
+        "avg_doc_length": float(doc_lengths.mean()) if count else 0.0,
+        "stem_prefix": STEM_PREFIX,
+        "built_at": datetime.now(UTC).isoformat(timespec="seconds"),
+    }
+    (tmp / _META).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    if progress is not None:
+        progress(count)
+
+    # Swap directories; readers keep their maps of the old files until they reload
+    old = path.with_name(f"{path.name}.old")
+    shutil.rmtree(old, ignore_errors=True)
+    if path.exists():
+        path.rename(old)
+    tmp.rename(path)
+    shutil.rmtree(old, ignore_errors=True)
+    logger.info(f"✅ Keyword index {path}: {count} documents, {len(vocabulary)} terms")
+    return count
+
+
+def indexed_collections(path: str | Path) -> list[str]:
+    """Collections the index at ``path`` was built from ([] if there is none)."""
+    try:
+        meta = json.loads((Path(path) / _META).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    return list(meta.get("collections", []))
+
+
+# Process-wide index, reopened when a rebuild replaces meta.json
+_index: KeywordIndex | None = None
+_index_stamp: tuple[int, int] | None = None
+_index_lock = Lock()
+
+
+def get_keyword_index() -> KeywordIndex | None:
+    """
+    The configured keyword index, or None when disabled or not built yet.
+    Reopens the index after :func:`build_keyword_index` swapped in a new copy.
+    """
+    global _index, _index_stamp
+
+    if not settings.keyword_index_enabled:
+        return None
+    try:
+        stat = (Path(settings.keyword_index_path) / _META).stat()
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+    except OSError:
+        return None
+    with _index_lock:
+        if _index is None or stamp != _index_stamp:
+            try:
+                index = KeywordIndex(settings.keyword_index_path)
+            except Exception as e:
+                logger.error(f"Keyword index at {settings.keyword_index_path} unusable: {e}")
+                return _index
+            _index, _index_stamp = index, stamp
+            logger.info(
+                f"Keyword index loaded: {len(index)} documents, {index.vocabulary_size} terms"
+            )
+        return _index
+
+
+def reset_keyword_index() -> None:
+    """Forget the loaded index (tests, shutdown)."""
+    global _index, _index_stamp
+
+    with _index_lock:
+        _index, _index_stamp = None, None
@@ -0,0 +1,227 @@
+"""
+Local CPU Embedding Backend
+
+In-process embedding model for ``EMBED_PROVIDER=bge-m3``: an ONNX export of
+the model plus its ``tokenizer.json`` are loaded from a local directory and
+run with ONNX Runtime on CPU. No network access is needed at load or query
+time.
+
+Texts are batched dynamically: inputs are sorted by token length and cut
+into batches bounded by a text count and a padded-token budget, so short
+queries are never padded to the length of a long document.
+
+Optional dependencies: ``onnxruntime`` and ``tokenizers``
+(``pip install -r fastapi/requirements-local.txt``).
+"""
+
+import json
+import logging
+from collections.abc import Sequence
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+import numpy as np
+
+from config import Settings
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+# Candidate file names inside LOCAL_EMBED_MODEL_DIR
+MODEL_FILES = ("model.onnx", "onnx/model.onnx")
+TOKENIZER_FILE = "tokenizer.json"
+
+_model: "LocalEmbeddingModel | None" = None
+_model_lock = Lock()
+
+
+class LocalEmbeddingModel:
+    """
+    Dense sentence embeddings from an ONNX encoder (CLS pooling, L2-normalized).
+
+    Args:
+        session: ``onnxruntime.InferenceSession`` (or compatible object)
+        tokenizer: ``tokenizers.Tokenizer`` with truncation configured
+        dimension: Embedding size, if known without running the model
+        max_batch_size: Max texts per inference call
+        max_batch_tokens: Max ``texts x longest_text`` tokens per inference call
+    """
+
+    def __init__(
+        self,
+        session: Any,
+        tokenizer: Any,
+        dimension: int | None = None,
+        max_batch_size: int = 32,
+        max_batch_tokens: int = 8192,
+    ) -> None:
+        self.session = session
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self._input_names = {i.name for i in session.get_inputs()}
+        self._dimension = dimension or _static_output_dim(session)
+
+    @classmethod
+    def load(
+        cls,
+        model_dir: str | Path,
+        threads: int = 4,
+        max_length: int = 512,
+        max_batch_size: int = 32,
+        max_batch_tokens: int = 8192,
+    ) -> "LocalEmbeddingModel":
+        """
+        Load the ONNX model and tokenizer from ``model_dir``.
+
+        Raises:
+            FileNotFoundError: If the model or tokenizer file is missing
+            ImportError: If onnxruntime or tokenizers is not installed
+        """
+        import onnxruntime as ort  # type: ignore
+        from tokenizers import Tokenizer  # type: ignore
+
+        root = Path(model_dir)
+        model_path = next((root / f for f in MODEL_FILES if (root / f).is_file()), None)
+        if model_path is None:
+            raise FileNotFoundError(f"No ONNX model ({' or '.join(MODEL_FILES)}) in {root}")
+        tokenizer_path = root / TOKENIZER_FILE
+        if not tokenizer_path.is_file():
+            raise FileNotFoundError(f"Tokenizer not found: {tokenizer_path}")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+        tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        tokenizer.enable_truncation(max_length=max_length)
+        tokenizer.no_padding()  # padding is applied per batch
+
+        model = cls(
+            session,
+            tokenizer,
+            dimension=config_dimension(root),
+            max_batch_size=max_batch_size,
+            max_batch_tokens=max_batch_tokens,
+        )
+        logger.info(
+            f"✅ Local embedding model loaded from {model_path} "
+            f"(dim={model.dimension}, threads={threads}, max_length={max_length})"
+        )
+        return model
+
+    @property
+    def dimension(self) -> int:
+        """Embedding size (runs one tiny inference if the model does not declare it)."""
+        if self._dimension is None:
+            self._dimension = int(self.encode(["."]).shape[1])
+        return self._dimension
+
+    def _batches(self, lengths: Sequence[int]) -> list[list[int]]:
+        """Group indices (sorted by length) under the count and padded-token limits."""
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        batches: list[list[int]] = []
+        current: list[int] = []
+        for idx in order:
+            longest = lengths[idx]  # ascending order: the newest item is the longest
+            if current and (
+                len(current) >= self.max_batch_size
+                or (len(current) + 1) * longest > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current = []
+            current.append(idx)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _run(self, encodings: Sequence[Any]) -> np.ndarray:
+        """Pad one batch to its longest member and run the encoder."""
+        width = max(len(e.ids) for e in encodings)
+        input_ids = np.zeros((len(encodings), width), dtype=np.int64)
+        attention = np.zeros((len(encodings), width), dtype=np.int64)
+        for row, enc in enumerate(encodings):
+            input_ids[row, : len(enc.ids)] = enc.ids
+            attention[row, : len(enc.ids)] = 1
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        feeds = {name: value for name, value in feeds.items() if name in self._input_names}
+        output = self.session.run(None, feeds)[0]
+
+        # (batch, seq, hidden) -> CLS token; (batch, hidden) is already pooled
+        pooled = output[:, 0, :] if output.ndim == 3 else output
+        pooled = np.asarray(pooled, dtype=np.float32)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.maximum(norms, 1e-12)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed ``texts`` and return a ``(len(texts), dimension)`` float32 matrix
+        in input order.
+        """
+        if not texts:
+            return np.zeros((0, self._dimension or 0), dtype=np.float32)
+
+        encodings = self.tokenizer.encode_batch(list(texts))
+        batches = self._batches([len(e.ids) for e in encodings])
+
+        out: np.ndarray | None = None
+        for batch in batches:
+            vectors = self._run([encodings[i] for i in batch])
+            if out is None:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            out[batch] = vectors
+        logger.debug(f"Local embedding: {len(texts)} texts in {len(batches)} batches")
+        return out  # type: ignore[return-value]
+
+
+def _static_output_dim(session: Any) -> int | None:
+    """Hidden size from the first output's static shape, if declared."""
+    try:
+        last = session.get_outputs()[0].shape[-1]
+    except Exception:
+        return None
+    return last if isinstance(last, int) else None
+
+
+def config_dimension(model_dir: str | Path) -> int | None:
+    """Read ``hidden_size`` from the model's ``config.json`` (no model load)."""
+    path = Path(model_dir) / "config.json"
+    try:
+        return int(json.loads(path.read_text(encoding="utf-8"))["hidden_size"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def get_local_model() -> LocalEmbeddingModel:
+    """
+    Get or load the local embedding model (singleton pattern).
+
+    Returns:
+        LocalEmbeddingModel configured from ``LOCAL_EMBED_*`` settings
+    """
+    global _model
+
+    with _model_lock:
+        if _model is None:
+            _model = LocalEmbeddingModel.load(
+                settings.local_embed_model_dir,
+                threads=settings.local_embed_threads,
+                max_length=settings.local_embed_max_length,
+                max_batch_size=settings.local_embed_max_batch_size,
+                max_batch_tokens=settings.local_embed_max_batch_tokens,
+            )
+        return _model
+
+
+def local_embedding_dimension() -> int:
+    """Dimension of the configured local model, preferring ``config.json``."""
+    return config_dimension(settings.local_embed_model_dir) or get_local_model().dimension
@@ -0,0 +1,308 @@
+"""
+Local Fallback Vector Index
+
+A read-only copy of a Qdrant collection (normally INTERNAL) on local disk,
+searched with brute-force NumPy when Qdrant errors or misses the latency
+budget, so users get degraded answers instead of a database error.
+
+Layout of ``LOCAL_INDEX_PATH``:
+
+- ``meta.json``       collection, dimension, distance, dtype, count, export time
+- ``vectors.npy``     (count, dimension) float32, or int8 with ``scales.npy``
+- ``payloads.jsonl``  one ``{"id": ..., "payload": ...}`` line per row
+- ``offsets.npy``     (count + 1) byte offsets into ``payloads.jsonl``
+
+Everything is memory-mapped, so opening the index costs no RAM up front and
+the page cache holds what searches actually touch. ``export_index`` builds a
+new copy next to the old one and swaps directories, so a running API picks up
+the refresh on its next search (see ``tools/local_index_export.py``).
+"""
+
+import json
+import logging
+import mmap
+import os
+import shutil
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, ScoredPoint
+
+from config import Settings
+
+from .client_qdrant import base_collection, payload_selector
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+INDEX_VERSION = 1
+INDEX_DTYPES = ("float32", "int8")
+EXPORT_BATCH = 512  # points per scroll page
+# float32 working copy per block of rows (int8 search, export normalization):
+# 16 MiB is ~2,700 rows at 1536 dimensions, per concurrent search
+BLOCK_BYTES = 16 * 1024 * 1024
+
+_META = "meta.json"
+_VECTORS = "vectors.npy"
+_SCALES = "scales.npy"
+_PAYLOADS = "payloads.jsonl"
+_OFFSETS = "offsets.npy"
+_SCRATCH = "vectors.f32.npy"
+
+
+class LocalIndex:
+    """Memory-mapped, read-only vector index produced by :func:`export_index`."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.meta: dict[str, Any] = json.loads((self.path / _META).read_text(encoding="utf-8"))
+        if self.meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported local index version: {self.meta.get('version')}")
+        self.collection: str = self.meta["collection"]
+        self.dimension: int = self.meta["dimension"]
+        self.normalized: bool = self.meta["distance"] == Distance.COSINE.value
+        self.vectors = np.load(self.path / _VECTORS, mmap_mode="r")
+        self.scales = (
+            np.load(self.path / _SCALES, mmap_mode="r") if self.meta["dtype"] == "int8" else None
+        )
+        self.offsets = np.load(self.path / _OFFSETS, mmap_mode="r")
+        self._payloads: mmap.mmap | None = None
+        if len(self):
+            with (self.path / _PAYLOADS).open("rb") as f:
+                self._payloads = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return int(self.vectors.shape[0])
+
+    def _record(self, row: int) -> dict[str, Any]:
+        if self._payloads is None:
+            raise RuntimeError(f"Local index {self.path} is empty")
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self._payloads[start:end])
+
+    def scores(self, vector: list[float]) -> np.ndarray:
+        """Similarity of every row to ``vector`` (cosine or dot, as in Qdrant)."""
+        query = np.asarray(vector, dtype=np.float32)
+        if query.shape != (self.dimension,):
+            raise ValueError(
+                f"Query dimension {query.shape[0]} != local index dimension {self.dimension}"
+            )
+        if self.normalized:
+            norm = float(np.linalg.norm(query))
+            if norm > 0:
+                query = query / norm
+        out = np.empty(len(self), dtype=np.float32)
+        rows = _block_rows(self.dimension)
+        for start in range(0, len(self), rows):
+            block = self.vectors[start : start + rows]
+            if self.scales is None:
+                out[start : start + len(block)] = block @ query
+            else:
+                scores = block.astype(np.float32) @ query
+                out[start : start + len(block)] = scores * self.scales[start : start + len(block)]
+        return out
+
+    def search(
+        self, vector: list[float], topk: int, score_threshold: float | None = None
+    ) -> list[ScoredPoint]:
+        """Exact top-k over the whole index, shaped like Qdrant results."""
+        if not len(self) or topk <= 0:
+            return []
+        scores = self.scores(vector)
+        k = min(topk, len(self))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results = []
+        for row in top:
+            score = float(scores[row])
+            if score_threshold is not None and score < score_threshold:
+                break
+            record = self._record(int(row))
+            results.append(
+                ScoredPoint(id=record["id"], version=0, score=score, payload=record["payload"])
+            )
+        return results
+
+    def covers(self, collection: str) -> bool:
+        """True if this index is a copy of ``collection`` (alias versions included)."""
+        return base_collection(self.collection) == base_collection(collection)
+
+
+def _block_rows(dimension: int) -> int:
+    """Rows per block whose float32 copy fits :data:`BLOCK_BYTES`."""
+    return max(1, BLOCK_BYTES // (max(dimension, 1) * 4))
+
+
+def _quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization: ``row ≈ scale * q``."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def _open_npy(path: Path, dtype: str, shape: tuple[int, int]) -> np.ndarray:
+    """Writable memory map of a new ``.npy`` file (an empty array is saved in place)."""
+    if not shape[0]:
+        np.save(path, np.empty(shape, dtype=dtype))  # an empty file cannot be mapped
+        return np.empty(shape, dtype=dtype)
+    return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+
+def export_index(
+    client: QdrantClient,
+    collection: str,
+    path: str | Path,
+    dtype: str = "float32",
+    limit: int | None = None,
+    batch: int = EXPORT_BATCH,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """
+    Export ``collection`` (vectors + search payload keys) to a local index at
+    ``path`` and swap it in atomically.
+
+    Args:
+        client: Qdrant client
+        collection: Collection or alias to copy
+        path: Index directory (replaced when the export completes)
+        dtype: "float32" (exact scores) or "int8" (4x smaller, approximate)
+        limit: Export at most this many points (default: all)
+        batch: Points per scroll page
+        progress: Called with the running point count after each page
+
+    Returns:
+        Number of exported points
+
+    Raises:
+        ValueError: For an unknown dtype or a distance other than cosine/dot
+    """
+    if dtype not in INDEX_DTYPES:
+        raise ValueError(f"Invalid dtype: {dtype}. Must be one of: {INDEX_DTYPES}")
+    params = client.get_collection(collection).config.params.vectors
+    dimension, distance = params.size, params.distance  # type: ignore[union-attr]
+    if distance not in (Distance.COSINE, Distance.DOT):
+        raise ValueError(f"Local index supports cosine/dot collections, not {distance}")
+
+    total = client.count(collection, exact=True).count
+    if limit is not None:
+        total = min(total, limit)
+
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    # Raw vectors go to a float32 scratch map on disk, not into RAM
+    vectors = _open_npy(tmp / _SCRATCH, "float32", (total, dimension))
+    offsets = [0]
+    count = 0
+    offset = None
+    with (tmp / _PAYLOADS).open("wb") as payloads:
+        while count < total:
+            records, offset = client.scroll(
+                collection,
+                limit=min(batch, total - count),
+                offset=offset,
+                with_payload=payload_selector(),
+                with_vectors=True,
+            )
+            for r in records:
+                vectors[count] = r.vector
+                line = json.dumps({"id": r.id, "payload": r.payload}, ensure_ascii=False)
+                payloads.write(line.encode("utf-8") + b"\n")
+                offsets.append(payloads.tell())
+                count += 1
+            if progress is not None:
+                progress(count)
+            if offset is None or not records:
+                break
+
+    # Normalize / quantize block by block into the final map: only one block
+    # of rows is ever held in RAM
+    matrix = _open_npy(tmp / _VECTORS, dtype, (count, dimension))
+    scales = np.empty(count, dtype=np.float32) if dtype == "int8" else None
+    rows = _block_rows(dimension)
+    for start in range(0, count, rows):
+        block = np.array(vectors[start : start + rows])
+        end = start + len(block)
+        if distance == Distance.COSINE:
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            block /= np.where(norms == 0, 1.0, norms)
+        if scales is None:
+            matrix[start:end] = block
+        else:
+            matrix[start:end], scales[start:end] = _quantize_int8(block)
+    if isinstance(matrix, np.memmap):
+        matrix.flush()
+    del vectors, matrix
+    (tmp / _SCRATCH).unlink()
+    if scales is not None:
+        np.save(tmp / _SCALES, scales)
+    np.save(tmp / _OFFSETS, np.asarray(offsets, dtype=np.int64))
+    meta = {
+        "version": INDEX_VERSION,
+        "collection": collection,
+        "dimension": dimension,
+        "distance": distance.value,
+        "dtype": dtype,
+        "count": count,
+        "exported_at": datetime.now(UTC).isoformat(timespec="seconds"),
+    }
+    (tmp / _META).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    # Swap directories; readers keep their maps of the old files until they reload
+    old = path.with_name(f"{path.name}.old")
+    shutil.rmtree(old, ignore_errors=True)
+    if path.exists():
+        path.rename(old)
+    tmp.rename(path)
+    shutil.rmtree(old, ignore_errors=True)
+    logger.info(f"✅ Local index {path}: {count} points from {collection} ({dtype})")
+    return count
+
+
+# Process-wide index, reopened when a refresh replaces meta.json
+_index: LocalIndex | None = None
+_index_stamp: tuple[int, int] | None = None
+_index_lock = Lock()
+
+
+def get_local_index() -> LocalIndex | None:
+    """
+    The configured local index, or None when disabled or not exported yet.
+    Reopens the index after :func:`export_index` swapped in a new copy.
+    """
+    global _index, _index_stamp
+
+    if not settings.local_index_enabled:
+        return None
+    try:
+        stat = (Path(settings.local_index_path) / _META).stat()
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+    except OSError:
+        return None
+    with _index_lock:
+        if _index is None or stamp != _index_stamp:
+            try:
+                index = LocalIndex(settings.local_index_path)
+            except Exception as e:
+                logger.error(f"Local index at {settings.local_index_path} unusable: {e}")
+                return _index
+            # The previous index is left to the GC: an in-flight search may still use it
+            _index, _index_stamp = index, stamp
+            logger.info(f"Local index loaded: {len(index)} points of {index.collection}")
+        return _index
+
+
+def reset_local_index() -> None:
+    """Forget the loaded index (tests, shutdown)."""
+    global _index, _index_stamp
+
+    with _index_lock:
+        _index, _index_stamp = None, None
@@ -0,0 +1,100 @@
+"""
+Async Micro-Batcher
+
+Collects concurrent single-item calls made on one event loop for a short
+window (or until a size cap is hit) and resolves them with one batched call.
+Used to merge concurrent query embeddings into a single provider request.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Merge concurrent :meth:`submit` calls into batched ``fetch`` calls.
+
+    A batch is flushed ``window_ms`` after its first item arrives, or as soon
+    as it holds ``max_items``. Every caller receives the result at its own
+    position; if the batch fails, every caller receives the exception.
+
+    Args:
+        fetch: Async callable mapping a list of items to results in the same order
+        window_ms: Maximum time the first item of a batch waits for company
+        max_items: Batch size that triggers an immediate flush
+        on_flush: Optional callback receiving ``(batch_size, queue_delays_seconds)``
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[list[T]], Awaitable[Sequence[R]]],
+        window_ms: float,
+        max_items: int,
+        on_flush: Callable[[int, list[float]], None] | None = None,
+    ) -> None:
+        self._fetch = fetch
+        self.window = window_ms / 1000.0
+        self.max_items = max_items
+        self._on_flush = on_flush
+        self._pending: list[tuple[T, asyncio.Future[R], float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def submit(self, item: T) -> R:
+        """Queue ``item`` for the next batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[R] = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)  # keep a reference until done
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[T, "asyncio.Future[R]", float]]) -> None:
+        started = time.perf_counter()
+        if self._on_flush is not None:
+            try:
+                self._on_flush(len(batch), [started - queued for _, _, queued in batch])
+            except Exception:
+                logger.debug("Micro-batch flush callback failed", exc_info=True)
+
+        try:
+            results = await self._fetch([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Batch returned {len(results)} results for {len(batch)} items")
+        except asyncio.CancelledError:
+            for _, future, _ in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results, strict=True):
+            if not future.done():  # the caller may have been cancelled
+                future.set_result(result)
+
+    def __len__(self) -> int:
+        return len(self._pending)
@@ -0,0 +1,80 @@
+"""
+Maximal Marginal Relevance
+
+Picks a diverse subset of ranked hits so near-duplicate chunks (the same
+leaflet paragraph indexed twice, overlapping chunk windows, …) do not crowd
+the LLM context:
+
+    next = argmax_d  λ · relevance(d) - (1 - λ) · max_{s ∈ selected} cos(d, s)
+
+The pairwise cosine matrix is computed once with a single matrix product; each
+selection step then only updates a running "most similar selected chunk"
+vector, so picking k of n candidates is O(n² · dim + k · n).
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+
+def hit_vector(hit: Any) -> list[float] | None:
+    """A hit's stored (unnamed) vector, or None if it was not returned."""
+    vector = getattr(hit, "vector", None)
+    return vector if isinstance(vector, list) and vector else None
+
+
+def mmr_select(
+    relevance: Sequence[float] | np.ndarray,
+    vectors: np.ndarray,
+    k: int,
+    lambda_: float = 0.7,
+) -> list[int]:
+    """
+    Select ``k`` candidates by Maximal Marginal Relevance.
+
+    Args:
+        relevance: Relevance per candidate (any scale; rescaled so the best is 1.0)
+        vectors: ``(n, dim)`` candidate vectors; all-zero rows (no vector)
+            are never considered redundant, and negative similarity is not a bonus
+        k: Number of candidates to select
+        lambda_: 1.0 = relevance order, 0.0 = maximal diversity
+
+    Returns:
+        Indices of the selected candidates in selection order
+
+    Raises:
+        ValueError: If ``relevance`` and ``vectors`` disagree in length or
+            ``lambda_`` is outside [0, 1]
+    """
+    if not 0.0 <= lambda_ <= 1.0:
+        raise ValueError(f"MMR lambda must be within [0, 1], got {lambda_}")
+    rel = np.asarray(relevance, dtype=np.float64)
+    n = rel.shape[0]
+    if vectors.shape[0] != n:
+        raise ValueError(f"Got {n} relevance scores for {vectors.shape[0]} vectors")
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    top = np.abs(rel).max()
+    if top > 0:
+        rel = rel / top
+    unit = np.asarray(vectors, dtype=np.float64)
+    norms = np.linalg.norm(unit, axis=1, keepdims=True)
+    unit = np.divide(unit, norms, out=np.zeros_like(unit), where=norms > 0)
+    similarity = unit @ unit.T
+
+    gain = lambda_ * rel
+    # Highest similarity to any selected chunk, floored at 0
+    penalty = np.zeros(n)
+    available = np.ones(n, dtype=bool)
+    selected: list[int] = []
+    for _ in range(k):
+        score = gain - (1.0 - lambda_) * penalty
+        score[~available] = -np.inf
+        pick = int(np.argmax(score))
+        selected.append(pick)
+        available[pick] = False
+        np.maximum(penalty, similarity[pick], out=penalty)
+    return selected
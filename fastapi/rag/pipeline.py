@@ -6,36 +6,54 @@ Combines vector search with GPT-4 to generate contextual answers
 from medical knowledge base.
 """
 
+import asyncio
 import hashlib
 import logging
 import time
 from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine
+from concurrent.futures import Future
 from dataclasses import dataclass
-from threading import Lock
-from typing import Any
+from threading import Lock, Thread
+from typing import Any, TypeVar
 
 try:  # Compatibility across openai versions
-    from openai import OpenAI, OpenAIError  # type: ignore  # nosemgrep
+    from openai import AsyncOpenAI, OpenAI, OpenAIError  # type: ignore  # nosemgrep
 except Exception:
-    from openai import OpenAI  # type: ignore  # nosemgrep
+    from openai import AsyncOpenAI, OpenAI  # type: ignore  # nosemgrep
 
     try:
         from openai import APIError as OpenAIError  # type: ignore  # nosemgrep
     except Exception:  # Last resort
         OpenAIError = Exception  # type: ignore
+import numpy as np
 from qdrant_client.models import ScoredPoint
 
 from config import Settings
 
-from .client_qdrant import EXTERNAL, INTERNAL, search
-from .embeddings import EmbeddingError, embed
+from .client_qdrant import (
+    EXTERNAL,
+    INTERNAL,
+    SearchPlanItem,
+    aclose_qdrant_client,
+    asearch_many,
+    base_collection,
+    search_tuning,
+)
+from .context import count_tokens, pack_context
+from .embeddings import EmbeddingError, aclose_openai_client, aembed
+from .executor import run_blocking, shutdown_executor
+from .fusion import RRF_K, fuse_rankings
+from .generation_cache import GenerationCache, generation_key
+from .keyword_index import KeywordIndex, get_keyword_index
+from .local_index import get_local_index
+from .mmr import hit_vector, mmr_select
+from .rerank import get_reranker
+from .semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 settings = Settings()
 
-# Constants
-RRF_K = 60  # Reciprocal-Rank Fusion constant
-
 # Medical disclaimer in Turkish
 MEDICAL_DISCLAIMER = (
     "⚠️ Bu bilgi tıbbi tavsiye değildir. " "Sağlık kararlarınız için mutlaka hekiminize danışın."
@@ -44,6 +62,17 @@ MEDICAL_DISCLAIMER = (
 # Global OpenAI client for LLM generation
 _llm_client: OpenAI | None = None
 
+# Async OpenAI client for LLM generation, bound to the loop it was created on
+_async_llm_client: AsyncOpenAI | None = None
+_async_llm_loop: asyncio.AbstractEventLoop | None = None
+
+# Background event loop backing the synchronous retrieve_answer() wrapper
+_sync_loop: asyncio.AbstractEventLoop | None = None
+_sync_loop_lock = Lock()
+
+T = TypeVar("T")
+
+
 # In-memory response cache (LRU-managed)
 @dataclass(slots=True)
 class CacheEntry:
@@ -52,6 +81,7 @@ class CacheEntry:
     timestamp: float
     value: dict[str, Any]
 
+
 _response_cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
 _cache_lock = Lock()
 _cache_metrics: dict[str, int] = {"hit": 0, "miss": 0, "expired": 0, "evicted": 0}
@@ -81,6 +111,11 @@ try:
         "LLM generation duration in seconds",
         buckets=(0.1, 0.2, 0.5, 1, 2, 5),
     )
+    RAG_FIRST_TOKEN_SECONDS = Histogram(
+        "rag_first_token_seconds",
+        "Time from request to first streamed answer token in seconds",
+        buckets=(0.1, 0.2, 0.5, 1, 2, 5),
+    )
     RAG_ERRORS_TOTAL = Counter("rag_errors_total", "Total RAG errors", labelnames=("type",))
     RAG_TOKENS_TOTAL = Counter(
         "rag_tokens_total",
@@ -92,19 +127,66 @@ try:
         "Total cache events",
         labelnames=("event",),
     )
+    RAG_COALESCED_TOTAL = Counter(
+        "rag_coalesced_requests_total",
+        "Total queries served by waiting on an identical in-flight query",
+    )
     RAG_CACHE_SIZE = Gauge(
         "rag_cache_size",
         "Number of cached RAG responses in memory",
     )
+    RAG_GENERATION_CACHE_EVENTS = Counter(
+        "rag_generation_cache_events_total",
+        "Generation cache events (hit / miss / expired / evicted)",
+        labelnames=("event",),
+    )
+    RAG_GENERATION_CACHE_SIZE = Gauge(
+        "rag_generation_cache_size",
+        "Number of cached LLM generations in memory",
+    )
+    RAG_LOCAL_FALLBACK_TOTAL = Counter(
+        "rag_local_index_fallback_total",
+        "Searches served by the local index instead of Qdrant",
+        labelnames=("reason",),
+    )
+    RAG_RERANK_SECONDS = Histogram(
+        "rag_rerank_seconds",
+        "Cross-encoder reranking duration in seconds",
+        buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1),
+    )
+    RAG_RERANK_TOTAL = Counter(
+        "rag_rerank_total",
+        "Reranking attempts by outcome (applied / timeout / error / unavailable)",
+        labelnames=("outcome",),
+    )
+    RAG_PROMPT_TOKENS = Histogram(
+        "rag_prompt_tokens",
+        "Prompt tokens sent to the LLM per answer (instructions + question + context)",
+        buckets=(250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000),
+    )
+    RAG_MMR_REMOVED_CHUNKS = Histogram(
+        "rag_mmr_removed_chunks",
+        "Top fused chunks MMR replaced with less redundant ones, per query",
+        buckets=(0, 1, 2, 3, 5, 8, 13),
+    )
 except Exception:  # Metrics are optional
     RAG_TOTAL_SECONDS = None
     RAG_EMBED_SECONDS = None
     RAG_SEARCH_SECONDS = None
     RAG_GENERATE_SECONDS = None
+    RAG_FIRST_TOKEN_SECONDS = None
     RAG_ERRORS_TOTAL = None
     RAG_TOKENS_TOTAL = None
     RAG_CACHE_EVENTS = None
+    RAG_COALESCED_TOTAL = None
     RAG_CACHE_SIZE = None
+    RAG_GENERATION_CACHE_EVENTS = None
+    RAG_GENERATION_CACHE_SIZE = None
+    RAG_LOCAL_FALLBACK_TOTAL = None
+    RAG_RERANK_SECONDS = None
+    RAG_RERANK_TOTAL = None
+    RAG_PROMPT_TOKENS = None
+    RAG_MMR_REMOVED_CHUNKS = None
 
 
 def _update_cache_size_metric() -> None:
@@ -162,6 +244,160 @@ def _cache_set(key: str, value: dict[str, Any]) -> None:
         _update_cache_size_metric()
 
 
+# Second cache tier keyed on query-embedding similarity (see semantic_cache.py)
+_semantic_cache = SemanticCache(settings.semantic_cache_max_entries, on_event=_record_cache_event)
+
+
+def _semantic_cache_active() -> bool:
+    return settings.enable_cache and settings.semantic_cache_enabled
+
+
+def _semantic_scope(top_k: int, profile: str | None = None) -> str:
+    return (
+        f"topk={top_k}|profile={profile or 'default'}|model={settings.llm_model}"
+        f"|embed={settings.openai_embedding_model}"
+    )
+
+
+def _semantic_cache_get(
+    q: str, vector: list[float], top_k: int, profile: str | None = None
+) -> dict[str, Any] | None:
+    if not _semantic_cache_active():
+        return None
+    if _semantic_cache.max_entries != settings.semantic_cache_max_entries:
+        _semantic_cache.resize(settings.semantic_cache_max_entries)
+    found = _semantic_cache.get(
+        vector,
+        _semantic_scope(top_k, profile),
+        threshold=settings.semantic_cache_threshold,
+        ttl=settings.cache_ttl_seconds,
+    )
+    if found is None:
+        return None
+    value, similarity = found
+    logger.info(f"⚡ Semantic cache hit (similarity={similarity:.4f})")
+    metadata = {**value.get("metadata", {}), "semantic_cache_similarity": round(similarity, 4)}
+    return {**value, "question": q, "metadata": metadata}
+
+
+def _semantic_cache_set(
+    vector: list[float], top_k: int, response: dict[str, Any], profile: str | None = None
+) -> None:
+    if not _semantic_cache_active() or "error" in response or response["metadata"].get("fallback"):
+        return
+    try:
+        _semantic_cache.set(vector, _semantic_scope(top_k, profile), response)
+    except Exception:
+        logger.debug("Semantic cache save failed; ignoring and continuing", exc_info=True)
+
+
+def _record_generation_cache_event(event: str) -> None:
+    if RAG_GENERATION_CACHE_EVENTS is not None:
+        try:
+            RAG_GENERATION_CACHE_EVENTS.labels(event=event).inc()
+        except Exception:
+            logger.debug("Generation cache metric update failed", exc_info=True)
+
+
+def _update_generation_cache_size_metric() -> None:
+    if RAG_GENERATION_CACHE_SIZE is not None:
+        try:
+            RAG_GENERATION_CACHE_SIZE.set(len(_generation_cache))
+        except Exception:
+            logger.debug("Generation cache size metric update failed", exc_info=True)
+
+
+# Cache tier in front of the LLM call, keyed on the retrieved context (see generation_cache.py)
+_generation_cache = GenerationCache(
+    settings.generation_cache_max_entries, on_event=_record_generation_cache_event
+)
+
+
+def _generation_cache_key(question: str, context_chunks: list[dict[str, Any]]) -> str | None:
+    if not (settings.enable_cache and settings.generation_cache_enabled):
+        return None
+    return generation_key(
+        question,
+        context_chunks[: settings.pipeline_max_context_chunks],
+        settings.llm_model,
+        settings.llm_temperature,
+        settings.llm_max_tokens,
+    )
+
+
+def _generation_cache_get(key: str | None) -> dict[str, Any] | None:
+    if key is None:
+        return None
+    _generation_cache.max_entries = settings.generation_cache_max_entries
+    value = _generation_cache.get(key, ttl=settings.generation_cache_ttl_seconds)
+    if value is None:
+        return None
+    logger.info("⚡ Generation cache hit")
+    # A cached answer spends no tokens
+    return {**value, "tokens_used": 0, "generation_cached": True}
+
+
+def _generation_cache_set(key: str | None, result: dict[str, Any]) -> None:
+    if key is None or "error" in result:
+        return
+    try:
+        _generation_cache.set(key, result)
+        _update_generation_cache_size_metric()
+    except Exception:
+        logger.debug("Generation cache save failed; ignoring and continuing", exc_info=True)
+
+
+# Single-flight registry: cache key -> result of the in-flight computation.
+# concurrent.futures.Future is loop-agnostic, so callers on the API event loop
+# and on the sync-wrapper loop can share one computation.
+_inflight: dict[str, Future] = {}
+_inflight_lock = Lock()
+
+
+class _CoalescedLeaderError(Exception):
+    """The coalesced leader call was cancelled or failed before producing a result."""
+
+
+async def _coalesced(key: str, compute: Callable[[], Awaitable[dict[str, Any]]]) -> dict[str, Any]:
+    """
+    Run ``compute`` once per key; concurrent callers with the same key wait
+    for the leader's result instead of repeating the work.
+
+    If the leader is cancelled (e.g. client disconnect), waiting callers
+    retry and one of them becomes the new leader.
+    """
+    while True:
+        with _inflight_lock:
+            future = _inflight.get(key)
+            leader = future is None
+            if future is None:
+                future = Future()
+                _inflight[key] = future
+        if leader:
+            break
+
+        logger.info("🔗 Coalesced with in-flight identical query")
+        if RAG_COALESCED_TOTAL:
+            RAG_COALESCED_TOTAL.inc()
+        try:
+            # shield: a cancelled follower must not cancel the shared future
+            return await asyncio.shield(asyncio.wrap_future(future))
+        except _CoalescedLeaderError:
+            continue
+
+    try:
+        result = await compute()
+    except BaseException:
+        future.set_exception(_CoalescedLeaderError())
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
 class RAGError(Exception):
     """Custom exception for RAG pipeline errors"""
 
@@ -190,17 +426,83 @@ def _get_llm_client() -> OpenAI:
     return _llm_client
 
 
+def _get_async_llm_client() -> AsyncOpenAI:
+    """
+    Get or create the async OpenAI client for the running event loop.
+
+    Returns:
+        AsyncOpenAI: Configured async OpenAI client
+
+    Raises:
+        ValueError: If OpenAI API key not configured
+    """
+    global _async_llm_client, _async_llm_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_llm_client is None or _async_llm_loop is not loop:
+        api_key = settings.get_openai_api_key()
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY not configured")
+        _async_llm_client = AsyncOpenAI(api_key=api_key)
+        _async_llm_loop = loop
+        logger.info(f"✅ Async OpenAI LLM client initialized with model: {settings.llm_model}")
+
+    return _async_llm_client
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    """Return the background event loop used by sync wrappers, starting it if needed."""
+    global _sync_loop
+
+    with _sync_loop_lock:
+        if _sync_loop is None or _sync_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            Thread(target=loop.run_forever, name="rag-sync-loop", daemon=True).start()
+            _sync_loop = loop
+        return _sync_loop
+
+
+def _run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion on the background loop from synchronous code."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_sync_loop()).result()
+
+
+async def ashutdown() -> None:
+    """
+    Release pipeline resources at application shutdown.
+
+    Closes the async OpenAI/Qdrant clients owned by the running loop, stops
+    the background loop used by the sync wrappers and the shared executor.
+    """
+    global _async_llm_client, _async_llm_loop, _sync_loop
+
+    await aclose_qdrant_client()
+    await aclose_openai_client()
+    if _async_llm_client is not None and _async_llm_loop is asyncio.get_running_loop():
+        try:
+            await _async_llm_client.close()
+        except Exception:
+            logger.debug("Async LLM client close failed", exc_info=True)
+    _async_llm_client = None
+    _async_llm_loop = None
+
+    with _sync_loop_lock:
+        loop, _sync_loop = _sync_loop, None
+    if loop is not None and loop.is_running():
+        loop.call_soon_threadsafe(loop.stop)
+
+    shutdown_executor(wait=False)
+
+
 def reciprocal_rank_fusion(
     internal_results: list[ScoredPoint], external_results: list[ScoredPoint], k: int = RRF_K
 ) -> list[tuple[ScoredPoint, float, str]]:
     """
-    Combine results from multiple sources using Reciprocal Rank Fusion.
+    Combine internal and external results using Reciprocal Rank Fusion.
 
     RRF formula: score(doc) = Σ 1/(k + rank_i)
-    where k=60 is a typical constant value.
-
-    This algorithm combines rankings from multiple retrieval systems
-    without requiring calibrated scores.
+    where k=60 is a typical constant value. Two-source shorthand for
+    :func:`rag.fusion.fuse_rankings`, which fuses any number of weighted lists.
 
     Args:
         internal_results: Search results from internal FreeHekim collection
@@ -217,38 +519,112 @@ def reciprocal_rank_fusion(
         >>> fused = reciprocal_rank_fusion(internal, external)
         >>> # doc2 will have highest score (appeared in both rankings)
     """
-    scores: dict[str, dict[str, Any]] = {}
+    return fuse_rankings({"internal": internal_results, "external": external_results}, k=k)
 
-    # Score internal results
-    for rank, result in enumerate(internal_results, start=1):
-        point_id = str(result.id)
-        rrf_score = 1.0 / (k + rank)
 
-        if point_id not in scores:
-            scores[point_id] = {"result": result, "score": 0.0, "source": "internal"}
-        scores[point_id]["score"] += rrf_score
+def _no_context_result() -> dict[str, Any]:
+    """Answer returned when retrieval produced no usable context."""
+    return {
+        "answer": (
+            "Üzgünüm, bu soruyla ilgili bilgi bulamadım. "
+            "Lütfen sorunuzu farklı şekilde ifade etmeyi deneyin.\n\n"
+            f"{MEDICAL_DISCLAIMER}"
+        ),
+        "tokens_used": 0,
+        "model": settings.llm_model,
+        "warning": "No context available",
+    }
 
-    # Score external results
-    for rank, result in enumerate(external_results, start=1):
-        point_id = str(result.id)
-        rrf_score = 1.0 / (k + rank)
 
-        if point_id not in scores:
-            scores[point_id] = {"result": result, "score": 0.0, "source": "external"}
-        else:
-            # Document appears in both collections
-            scores[point_id]["source"] = "both"
-        scores[point_id]["score"] += rrf_score
+def _prompts(question: str, context_text: str) -> tuple[str, str]:
+    """System and user prompt for answer generation around ``context_text``."""
+    # System prompt with medical guidelines
+    system_prompt = f"""Sen FreeHekim'in AI asistanısın. Sağlık konularında bilgilendirme yapıyorsun.
 
-    # Sort by fused score (descending)
-    sorted_results = sorted(scores.values(), key=lambda x: x["score"], reverse=True)
+ÖNEMLİ KURALLAR:
+1. Verilen KAYNAK bilgilerini kullanarak cevap ver
+2. Kaynak göster: [Kaynak 1], [Kaynak 2] şeklinde
+3. MUTLAKA tıbbi sorumluluk reddi ekle
+4. Teşhis veya tedavi önerme, sadece bilgilendir
+5. Türkçe ve anlaşılır cevap ver
+6. Bilmiyorsan veya kaynaklarda yoksa belirt
 
+SORUMLULUK REDDİ (MUTLAKA EKLE):
+{MEDICAL_DISCLAIMER}
+"""
+
+    # User prompt
+    user_prompt = f"""SORU: {question}
+
+KAYNAK BİLGİLER:
+{context_text}
+
+Yukarıdaki kaynaklara dayanarak soruyu cevapla. Kaynak numaralarını belirt ve tıbbi sorumluluk reddi ekle."""
+
+    return system_prompt, user_prompt
+
+
+def _pack_context(
+    question: str, context_chunks: list[dict[str, Any]], max_blocks: int
+) -> list[dict[str, Any]]:
+    """Fit the chunks into the prompt-token budget left after instructions and question."""
+    budget = settings.pipeline_prompt_token_budget - sum(
+        count_tokens(text) for text in _prompts(question, "")
+    )
+    packed = pack_context(context_chunks, budget, max_blocks)
     logger.debug(
-        f"RRF merged {len(internal_results)} internal + {len(external_results)} external "
-        f"= {len(sorted_results)} unique results"
+        f"Context: {len(packed.chunks)} blocks, {packed.tokens}/{budget} tokens "
+        f"({packed.merged} merged, {packed.trimmed} trimmed, {packed.dropped} dropped)"
+    )
+    return packed.chunks
+
+
+def _build_messages(question: str, context_chunks: list[dict[str, Any]]) -> list[dict[str, str]]:
+    """Build the chat messages (system + user prompt) for answer generation."""
+    # Chunks come packed to the token budget by retrieval (see _pack_context)
+    context_text = "\n\n".join(
+        f"[Kaynak {i}]: {chunk.get('text', '')}"
+        for i, chunk in enumerate(context_chunks[: settings.pipeline_max_context_chunks], start=1)
     )
+    system_prompt, user_prompt = _prompts(question, context_text)
+    if RAG_PROMPT_TOKENS:
+        RAG_PROMPT_TOKENS.observe(count_tokens(system_prompt) + count_tokens(user_prompt))
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
 
-    return [(r["result"], r["score"], r["source"]) for r in sorted_results]
+def _finalize_answer(answer: str, tokens_used: int) -> dict[str, Any]:
+    """Ensure the disclaimer is present, record token usage and build the result."""
+    # Ensure disclaimer is present (fallback if model didn't include it)
+    if MEDICAL_DISCLAIMER not in answer:
+        logger.warning("Medical disclaimer not in answer, appending it")
+        answer = f"{answer}\n\n{MEDICAL_DISCLAIMER}"
+
+    logger.info(f"✅ Generated answer: {tokens_used} tokens, {len(answer)} chars")
+    if RAG_TOKENS_TOTAL:
+        try:
+            RAG_TOKENS_TOTAL.labels(model=settings.llm_model).inc(tokens_used)
+        except Exception:
+            logger.debug("Prometheus token metric update failed; continuing", exc_info=True)
+
+    return {"answer": answer, "tokens_used": tokens_used, "model": settings.llm_model}
+
+
+def _generation_error_result(e: Exception) -> dict[str, Any]:
+    """Fallback answer returned when the LLM call fails."""
+    logger.error(f"OpenAI LLM error: {e}")
+    return {
+        "answer": (
+            "Üzgünüm, şu anda cevap oluşturamıyorum. Lütfen tekrar deneyin.\n\n"
+            f"{MEDICAL_DISCLAIMER}"
+        ),
+        "error": f"OpenAI error: {e!s}",
+        "tokens_used": 0,
+        "model": settings.llm_model,
+    }
 
 
 def generate_answer(question: str, context_chunks: list[dict[str, Any]]) -> dict[str, Any]:
@@ -271,118 +647,479 @@ def generate_answer(question: str, context_chunks: list[dict[str, Any]]) -> dict
     """
     if not context_chunks:
         logger.warning("No context chunks provided for answer generation")
-        return {
-            "answer": (
-                "Üzgünüm, bu soruyla ilgili bilgi bulamadım. "
-                "Lütfen sorunuzu farklı şekilde ifade etmeyi deneyin.\n\n"
-                f"{MEDICAL_DISCLAIMER}"
-            ),
-            "tokens_used": 0,
-            "model": settings.llm_model,
-            "warning": "No context available",
-        }
+        return _no_context_result()
+
+    cache_key = _generation_cache_key(question, context_chunks)
+    cached = _generation_cache_get(cache_key)
+    if cached is not None:
+        return cached
 
     try:
         client = _get_llm_client()
+        messages = _build_messages(question, context_chunks)
 
-        # Build context from top chunks (limit to configured max)
-        context_parts = []
-        for i, chunk in enumerate(context_chunks[: settings.pipeline_max_context_chunks], start=1):
-            text = chunk.get("text", "")
-            # Truncate long texts for context window efficiency
-            if len(text) > 500:
-                text = text[:500] + "..."
-            context_parts.append(f"[Kaynak {i}]: {text}")
+        # Call GPT-4
+        logger.debug(f"Calling {settings.llm_model} with {len(context_chunks)} context chunks")
 
-        context_text = "\n\n".join(context_parts)
+        for attempt in range(3):
+            try:
+                response = client.chat.completions.create(
+                    model=settings.llm_model,
+                    messages=messages,
+                    temperature=settings.llm_temperature,
+                    max_tokens=settings.llm_max_tokens,
+                )
+                break
+            except OpenAIError:
+                if attempt < 2:
+                    time.sleep(0.2 * (2**attempt))
+                    continue
+                raise
 
-        # System prompt with medical guidelines
-        system_prompt = f"""Sen FreeHekim'in AI asistanısın. Sağlık konularında bilgilendirme yapıyorsun.
+        answer = response.choices[0].message.content
+        tokens_used = getattr(response.usage, "total_tokens", 0)
+        result = _finalize_answer(answer, tokens_used)
+        _generation_cache_set(cache_key, result)
+        return result
 
-ÖNEMLİ KURALLAR:
-1. Verilen KAYNAK bilgilerini kullanarak cevap ver
-2. Kaynak göster: [Kaynak 1], [Kaynak 2] şeklinde
-3. MUTLAKA tıbbi sorumluluk reddi ekle
-4. Teşhis veya tedavi önerme, sadece bilgilendir
-5. Türkçe ve anlaşılır cevap ver
-6. Bilmiyorsan veya kaynaklarda yoksa belirt
+    except OpenAIError as e:
+        return _generation_error_result(e)
+    # Let any unexpected error bubble up to the caller; it will be handled
+    # by the outer retrieve_answer() error mapping logic.
 
-SORUMLULUK REDDİ (MUTLAKA EKLE):
-{MEDICAL_DISCLAIMER}
-"""
 
-        # User prompt
-        user_prompt = f"""SORU: {question}
+async def agenerate_answer(question: str, context_chunks: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Async variant of :func:`generate_answer` built on the async OpenAI client.
 
-KAYNAK BİLGİLER:
-{context_text}
+    Args:
+        question: User's question in Turkish
+        context_chunks: Retrieved text chunks with metadata from Qdrant
 
-Yukarıdaki kaynaklara dayanarak soruyu cevapla. Kaynak numaralarını belirt ve tıbbi sorumluluk reddi ekle."""
+    Returns:
+        Same dictionary shape as :func:`generate_answer`
+    """
+    if not context_chunks:
+        logger.warning("No context chunks provided for answer generation")
+        return _no_context_result()
+
+    cache_key = _generation_cache_key(question, context_chunks)
+    cached = _generation_cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        client = _get_async_llm_client()
+        messages = _build_messages(question, context_chunks)
 
-        # Call GPT-4
         logger.debug(f"Calling {settings.llm_model} with {len(context_chunks)} context chunks")
 
         for attempt in range(3):
             try:
-                response = client.chat.completions.create(
+                response = await client.chat.completions.create(
                     model=settings.llm_model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt},
-                    ],
+                    messages=messages,
                     temperature=settings.llm_temperature,
                     max_tokens=settings.llm_max_tokens,
                 )
                 break
             except OpenAIError:
                 if attempt < 2:
-                    import time as _t
-
-                    _t.sleep(0.2 * (2**attempt))
+                    await asyncio.sleep(0.2 * (2**attempt))
                     continue
                 raise
 
         answer = response.choices[0].message.content
         tokens_used = getattr(response.usage, "total_tokens", 0)
+        result = _finalize_answer(answer, tokens_used)
+        _generation_cache_set(cache_key, result)
+        return result
 
-        # Ensure disclaimer is present (fallback if model didn't include it)
-        if MEDICAL_DISCLAIMER not in answer:
-            logger.warning("Medical disclaimer not in answer, appending it")
-            answer = f"{answer}\n\n{MEDICAL_DISCLAIMER}"
+    except OpenAIError as e:
+        return _generation_error_result(e)
+
+
+def _empty_question_response() -> dict[str, Any]:
+    return {
+        "question": "",
+        "answer": f"Lütfen bir soru girin.\n\n{MEDICAL_DISCLAIMER}",
+        "sources": [],
+        "metadata": {"error": "Empty question"},
+        "error": "Question cannot be empty",
+    }
+
+
+def _pipeline_error_response(q: str, exc: Exception) -> dict[str, Any]:
+    """Map a pipeline exception to the user-facing error response."""
+    if isinstance(exc, EmbeddingError):
+        logger.error(f"Embedding error in RAG pipeline: {exc}")
+        error_type = "embedding"
+        answer = "Sorunuzu işlerken bir hata oluştu. Lütfen tekrar deneyin."
+        error = f"Embedding error: {exc!s}"
+    elif isinstance(exc, ConnectionError):
+        logger.error(f"Qdrant connection error in RAG pipeline: {exc}")
+        error_type = "database"
+        answer = "Veritabanı bağlantısı kurulamadı. Lütfen daha sonra tekrar deneyin."
+        error = f"Database error: {exc!s}"
+    elif isinstance(exc, RAGError):
+        logger.error(f"RAG pipeline error: {exc}")
+        error_type = "rag"
+        answer = "Cevap oluşturulurken bir hata oluştu. Lütfen tekrar deneyin."
+        error = str(exc)
+    else:
+        logger.error(f"Unexpected error in RAG pipeline: {exc}", exc_info=exc)
+        error_type = "unexpected"
+        answer = "Beklenmeyen bir hata oluştu. Lütfen daha sonra tekrar deneyin."
+        error = f"Unexpected error: {exc!s}"
+
+    if RAG_ERRORS_TOTAL:
+        RAG_ERRORS_TOTAL.labels(type=error_type).inc()
+    return {
+        "question": q,
+        "answer": f"{answer}\n\n{MEDICAL_DISCLAIMER}",
+        "error": error,
+        "sources": [],
+        "metadata": {"error_type": error_type},
+    }
 
-        logger.info(f"✅ Generated answer: {tokens_used} tokens, {len(answer)} chars")
-        if "RAG_TOKENS_TOTAL" in globals() and RAG_TOKENS_TOTAL:
-            try:
-                RAG_TOKENS_TOTAL.labels(model=settings.llm_model).inc(tokens_used)
-            except Exception:
-                logger.debug("Prometheus token metric update failed; continuing", exc_info=True)
 
-        return {"answer": answer, "tokens_used": tokens_used, "model": settings.llm_model}
+@dataclass(slots=True)
+class RetrievalResult:
+    """Output of the retrieval stage (embed + search + fusion)."""
 
-    except OpenAIError as e:
-        logger.error(f"OpenAI LLM error: {e}")
-        return {
-            "answer": (
-                "Üzgünüm, şu anda cevap oluşturamıyorum. Lütfen tekrar deneyin.\n\n"
-                f"{MEDICAL_DISCLAIMER}"
-            ),
-            "error": f"OpenAI error: {e!s}",
+    internal_results: list[ScoredPoint]
+    external_results: list[ScoredPoint]
+    fused_results: list[tuple[ScoredPoint, float, str]]
+    context_chunks: list[dict[str, Any]]
+    fallback: str | None = None  # "local_index" when Qdrant was bypassed
+    keyword_results: list[ScoredPoint] | None = None  # None = keyword index not in use
+    rerank: str | None = None  # reranking outcome; None = stage disabled
+
+
+def _response_cache_key(q: str, top_k: int, profile: str | None = None) -> str:
+    key_raw = f"q={q}|topk={top_k}|profile={profile or 'default'}|model={settings.llm_model}"
+    return hashlib.sha256(key_raw.encode("utf-8")).hexdigest()
+
+
+async def _aembed_query(q: str) -> list[float]:
+    t0 = time.perf_counter()
+    query_vector = await aembed(q)
+    if RAG_EMBED_SECONDS:
+        RAG_EMBED_SECONDS.observe(time.perf_counter() - t0)
+    return query_vector
+
+
+async def _asearch_or_fallback(
+    query_vector: list[float], plan: list[SearchPlanItem], timings: dict[str, float]
+) -> tuple[dict[str, list[ScoredPoint]], str | None]:
+    """
+    Run the search plan on Qdrant; if it fails or exceeds
+    ``LOCAL_INDEX_LATENCY_BUDGET_SECONDS`` and a local index is available,
+    answer the collections it covers from the index (others come back empty).
+
+    Returns:
+        ``(hits by plan key, "local_index" or None)``
+    """
+    index = get_local_index()
+    if index is None:
+        return await asearch_many(query_vector, plan, timings=timings), None
+
+    budget = settings.local_index_latency_budget_seconds
+    try:
+        hits = await asyncio.wait_for(asearch_many(query_vector, plan, timings=timings), budget)
+        return hits, None
+    except (TimeoutError, ConnectionError) as e:
+        reason = "timeout" if isinstance(e, TimeoutError) else "error"
+        logger.warning(f"⚠️ Qdrant search {reason}; serving from local index ({index.collection})")
+        try:
+            hits = {}
+            for item in plan:
+                if not index.covers(item.collection):
+                    hits[item.key] = []
+                    continue
+                threshold = item.score_threshold
+                if threshold is None:
+                    threshold = search_tuning(item.collection, item.profile).score_threshold
+                hits[item.key] = await run_blocking(
+                    index.search, query_vector, item.limit, threshold
+                )
+        except Exception:
+            logger.error("Local index search failed", exc_info=True)
+            if isinstance(e, TimeoutError):
+                raise ConnectionError(f"Qdrant search exceeded {budget}s") from e
+            raise e from None
+    if RAG_LOCAL_FALLBACK_TOTAL:
+        RAG_LOCAL_FALLBACK_TOTAL.labels(reason=reason).inc()
+    return hits, "local_index"
+
+
+async def _akeyword_search(
+    index: KeywordIndex, q: str, limit: int, timings: dict[str, float]
+) -> list[ScoredPoint]:
+    """BM25 search of the local keyword index; failures only drop this source."""
+    t0 = time.perf_counter()
+    try:
+        return await run_blocking(index.search, q, limit)
+    except Exception:
+        logger.error("Keyword index search failed", exc_info=True)
+        return []
+    finally:
+        timings["keyword"] = time.perf_counter() - t0
+
+
+async def _aretrieve_context(
+    q: str, top_k: int, query_vector: list[float], profile: str | None = None
+) -> RetrievalResult:
+    """
+    Retrieval stage: search the collections with the query vector (and the
+    keyword index with ``q`` when enabled) and fuse.
+
+    Args:
+        q: Trimmed user question
+        top_k: Number of chunks to retrieve per collection
+        query_vector: Embedding of ``q``
+        profile: Search latency profile ("fast" / "accurate", None = defaults)
+
+    Returns:
+        RetrievalResult with raw hits, fused ranking and context chunks
+    """
+    # Reranking and MMR choose from a wider candidate pool; MMR needs the hits' vectors
+    mmr = settings.mmr_enabled
+    limit = max(
+        top_k,
+        settings.rerank_candidates if settings.rerank_enabled else 0,
+        settings.mmr_candidates if mmr else 0,
+    )
+
+    # Search both collections concurrently over one pooled client
+    plan = [
+        SearchPlanItem(INTERNAL, limit, name="internal", profile=profile, with_vectors=mmr),
+        SearchPlanItem(EXTERNAL, limit, name="external", profile=profile, with_vectors=mmr),
+        *(
+            SearchPlanItem(c, limit, name=base_collection(c), profile=profile, with_vectors=mmr)
+            for c in settings.search_fusion_collections
+        ),
+    ]
+    keyword_index = get_keyword_index()
+    keyword_results: list[ScoredPoint] | None = None
+    timings: dict[str, float] = {}
+    try:
+        if keyword_index is None:
+            hits, fallback = await _asearch_or_fallback(query_vector, plan, timings)
+        else:
+            # Lexical search runs alongside the vector searches
+            (hits, fallback), keyword_results = await asyncio.gather(
+                _asearch_or_fallback(query_vector, plan, timings),
+                _akeyword_search(keyword_index, q, limit, timings),
+            )
+    finally:
+        # Each collection's own latency (not a share of the combined wall time)
+        if RAG_SEARCH_SECONDS:
+            for label, seconds in timings.items():
+                RAG_SEARCH_SECONDS.labels(collection=label).observe(seconds)
+    internal_results, external_results = hits["internal"], hits["external"]
+    rankings = {item.key: hits.get(item.key, []) for item in plan}
+    if keyword_results is not None:
+        rankings["keyword"] = keyword_results
+
+    logger.info(
+        "📊 Retrieved: " + ", ".join(f"{len(found)} {name}" for name, found in rankings.items())
+    )
+
+    # Weighted reciprocal-rank fusion over every searched source
+    fused_results = fuse_rankings(rankings, settings.rrf_weights, settings.rrf_k)
+
+    ranked, rerank, rerank_scores = fused_results, None, {}
+    if settings.rerank_enabled and fused_results:
+        ranked, rerank_scores, rerank = await _arerank(q, fused_results)
+    selected = _diversify(ranked, top_k, rerank_scores) if mmr else ranked[:top_k]
+
+    # Extract context chunks
+    context_chunks = []
+    for result, score, source in selected:
+        chunk = {
+            "text": result.payload.get("text", ""),
+            "source": source,
+            "score": score,
+            "metadata": result.payload.get("metadata", {}),
+            # Point identity for the generation cache key
+            "id": result.id,
+            "ingested_at": result.payload.get("ingested_at"),
+        }
+        if result.id in rerank_scores:
+            chunk["rerank_score"] = rerank_scores[result.id]
+        context_chunks.append(chunk)
+    # Better ordered context lets fewer chunks reach the LLM
+    max_blocks = settings.pipeline_max_context_chunks
+    if rerank == "applied" and settings.rerank_context_chunks:
+        max_blocks = min(max_blocks, settings.rerank_context_chunks)
+    context_chunks = _pack_context(q, context_chunks, max_blocks)
+
+    return RetrievalResult(
+        internal_results=internal_results,
+        external_results=external_results,
+        fused_results=fused_results,
+        context_chunks=context_chunks,
+        fallback=fallback,
+        keyword_results=keyword_results,
+        rerank=rerank,
+    )
+
+
+async def _arerank(
+    q: str, fused_results: list[tuple[ScoredPoint, float, str]]
+) -> tuple[list[tuple[ScoredPoint, float, str]], dict[int | str, float], str]:
+    """
+    Re-score the best ``RERANK_CANDIDATES`` fused hits with the cross-encoder
+    (one inference call) and order them by its relevance; the rest follow in
+    RRF order. Keeps the RRF order if the model is unavailable, fails or
+    misses ``RERANK_BUDGET_SECONDS`` (the inference is then aborted).
+
+    Returns:
+        ``(ranking, rerank_scores, outcome)``: the ranking keeps the RRF
+        scores, ``rerank_scores`` maps the re-scored point IDs to their
+        cross-encoder relevance (0-1); outcome is "applied", "timeout",
+        "error" or "unavailable" (model not loadable)
+    """
+    # Loads the model on first use (normally already done at startup)
+    reranker = await run_blocking(get_reranker)
+    if reranker is None:
+        outcome = "unavailable"
+    else:
+        pool = fused_results[: settings.rerank_candidates]
+        texts = [str(result.payload.get("text", "")) for result, _, _ in pool]
+        options = reranker.run_options()
+        t0 = time.perf_counter()
+        try:
+            scores = await asyncio.wait_for(
+                run_blocking(reranker.score, q, texts, options), settings.rerank_budget_seconds
+            )
+            outcome = "applied"
+        except TimeoutError:
+            options.terminate = True  # stop the inference still running on the executor
+            outcome = "timeout"
+            logger.warning(f"⚠️ Reranking exceeded {settings.rerank_budget_seconds}s; RRF order")
+        except Exception:
+            outcome = "error"
+            logger.error("Reranking failed; keeping RRF order", exc_info=True)
+        if RAG_RERANK_SECONDS:
+            RAG_RERANK_SECONDS.observe(time.perf_counter() - t0)
+    if RAG_RERANK_TOTAL:
+        RAG_RERANK_TOTAL.labels(outcome=outcome).inc()
+    if outcome != "applied":
+        return fused_results, {}, outcome
+
+    order = np.argsort(-scores, kind="stable").tolist()
+    rerank_scores = {pool[i][0].id: float(scores[i]) for i in order}
+    return [pool[i] for i in order] + fused_results[len(pool) :], rerank_scores, outcome
+
+
+def _diversify(
+    fused_results: list[tuple[ScoredPoint, float, str]],
+    top_k: int,
+    rerank_scores: dict[int | str, float] | None = None,
+) -> list[tuple[ScoredPoint, float, str]]:
+    """
+    Pick ``top_k`` of the best ``MMR_CANDIDATES`` fused hits by Maximal
+    Marginal Relevance: fused score (or cross-encoder score, when reranked)
+    as relevance, stored vectors for redundancy. Hits without vectors (local
+    index fallback) keep fused order.
+    """
+    pool = fused_results[: max(top_k, settings.mmr_candidates)]
+    if rerank_scores:
+        # Cross-encoder and RRF scores are not comparable: choose among reranked hits
+        pool = [hit for hit in pool if hit[0].id in rerank_scores]
+    vectors = [hit_vector(result) for result, _, _ in pool]
+    dims = {len(v) for v in vectors if v is not None}
+    if len(pool) <= top_k or len(dims) != 1:
+        return fused_results[:top_k]
+
+    matrix = np.zeros((len(pool), dims.pop()), dtype=np.float32)
+    for i, vector in enumerate(vectors):
+        if vector is not None:
+            matrix[i] = vector
+    relevance = [rerank_scores[result.id] if rerank_scores else score for result, score, _ in pool]
+    order = mmr_select(relevance, matrix, top_k, settings.mmr_lambda)
+    if RAG_MMR_REMOVED_CHUNKS:
+        RAG_MMR_REMOVED_CHUNKS.observe(sum(i >= top_k for i in order))
+    return [pool[i] for i in order]
+
+
+def _no_results_response(q: str, retrieval: RetrievalResult) -> dict[str, Any]:
+    return {
+        "question": q,
+        "answer": (
+            "Bu soruyla ilgili bilgi bulamadım. "
+            "Lütfen sorunuzu farklı şekilde ifade etmeyi deneyin.\n\n"
+            f"{MEDICAL_DISCLAIMER}"
+        ),
+        "sources": [],
+        "metadata": {
+            "internal_hits": len(retrieval.internal_results),
+            "external_hits": len(retrieval.external_results),
+            "fused_results": 0,
             "tokens_used": 0,
             "model": settings.llm_model,
+        },
+    }
+
+
+def _format_sources(context_chunks: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Build the user-facing source previews for the top context chunks."""
+    sources = []
+    for chunk in context_chunks[: settings.pipeline_max_source_display]:
+        source = {
+            "text": (
+                chunk["text"][: settings.pipeline_max_source_text_length] + "..."
+                if len(chunk["text"]) > settings.pipeline_max_source_text_length
+                else chunk["text"]
+            ),
+            "source": chunk["source"],
+            "score": round(chunk["score"], 4),
         }
-    # Let any unexpected error bubble up to the caller; it will be handled
-    # by the outer retrieve_answer() error mapping logic.
+        if "rerank_score" in chunk:
+            source["rerank_score"] = round(chunk["rerank_score"], 4)
+        sources.append(source)
+    return sources
+
+
+def _retrieval_metadata(retrieval: RetrievalResult) -> dict[str, Any]:
+    metadata: dict[str, Any] = {
+        "internal_hits": len(retrieval.internal_results),
+        "external_hits": len(retrieval.external_results),
+        "fused_results": len(retrieval.fused_results),
+    }
+    if retrieval.keyword_results is not None:
+        metadata["keyword_hits"] = len(retrieval.keyword_results)
+    if retrieval.rerank:
+        metadata["rerank"] = retrieval.rerank
+    if retrieval.fallback:
+        metadata["fallback"] = retrieval.fallback
+    return metadata
+
+
+def _cache_store(cache_key: str, response: dict[str, Any]) -> None:
+    # Degraded (local index) answers are not cached so recovery is immediate
+    if settings.enable_cache and not response["metadata"].get("fallback"):
+        try:
+            _cache_set(cache_key, response)
+        except Exception:
+            logger.debug("Cache save failed; ignoring and continuing", exc_info=True)
 
 
-def retrieve_answer(q: str, top_k: int | None = None) -> dict[str, Any]:
+async def aretrieve_answer(
+    q: str, top_k: int | None = None, profile: str | None = None
+) -> dict[str, Any]:
     """
     Main RAG pipeline: Retrieve + Rank + Generate.
 
-    This is the primary entry point for the RAG system.
+    This is the primary entry point for the RAG system. It runs natively on
+    the event loop (async OpenAI + async Qdrant clients), so an in-flight
+    question does not occupy a worker thread while waiting on the network.
 
     **Pipeline Steps:**
     1. Embed query using OpenAI embeddings
-    2. Search internal (FreeHekim) and external collections in parallel
+    2. Search internal (FreeHekim) and external collections concurrently
     3. Merge results using Reciprocal-Rank Fusion
     4. Extract top-k context chunks
     5. Generate answer with GPT-4
@@ -391,6 +1128,7 @@ def retrieve_answer(q: str, top_k: int | None = None) -> dict[str, Any]:
     Args:
         q: User question (will be trimmed)
         top_k: Number of chunks to retrieve per collection (default: 5)
+        profile: Search latency profile, "fast" or "accurate" (default: configured params)
 
     Returns:
         Dictionary with:
@@ -401,98 +1139,59 @@ def retrieve_answer(q: str, top_k: int | None = None) -> dict[str, Any]:
         - error: Error message if pipeline failed (optional)
 
     Example:
-        >>> result = retrieve_answer("Diyabet belirtileri nelerdir?")
+        >>> result = await aretrieve_answer("Diyabet belirtileri nelerdir?")
         >>> print(result["answer"])
-        >>> print(f"Used {result['metadata']['tokens_used']} tokens")
     """
     q = q.strip()
 
     if not q:
-        return {
-            "question": "",
-            "answer": f"Lütfen bir soru girin.\n\n{MEDICAL_DISCLAIMER}",
-            "sources": [],
-            "metadata": {"error": "Empty question"},
-            "error": "Question cannot be empty",
-        }
-
+        return _empty_question_response()
+
+    top_k = top_k or settings.search_topk
+    search_tuning(profile=profile)  # reject unknown profiles before caching/coalescing
+
+    logger.info(f"🔍 RAG Query: {q[:100]}{'...' if len(q) > 100 else ''}")
+    # Cache check (before embedding)
+    cache_key = _response_cache_key(q, top_k, profile)
+    if settings.enable_cache:
+        cached_response = _cache_get(cache_key)
+        if cached_response is not None:
+            logger.info("⚡ Cache hit for query")
+            return cached_response
+
+    if not settings.enable_request_coalescing:
+        return await _aanswer(q, top_k, cache_key, profile)
+    # Identical concurrent questions share one in-flight computation
+    return await _coalesced(cache_key, lambda: _aanswer(q, top_k, cache_key, profile))
+
+
+async def _aanswer(
+    q: str, top_k: int, cache_key: str, profile: str | None = None
+) -> dict[str, Any]:
+    """Cache-miss path of :func:`aretrieve_answer` (embed → search → generate)."""
     try:
-        top_k = top_k or settings.search_topk
-
-        # Step 1: Embed query
-        logger.info(f"🔍 RAG Query: {q[:100]}{'...' if len(q) > 100 else ''}")
         t0 = time.perf_counter()
-        # Cache check (before embedding)
-        cache_key = None
-        if settings.enable_cache:
-            key_raw = f"q={q}|topk={top_k}|model={settings.llm_model}"
-            cache_key = hashlib.sha256(key_raw.encode("utf-8")).hexdigest()
-            cached_response = _cache_get(cache_key)
-            if cached_response is not None:
-                logger.info("⚡ Cache hit for query")
-                return cached_response
-        query_vector = embed(q)
-        t1 = time.perf_counter()
-        if RAG_EMBED_SECONDS:
-            RAG_EMBED_SECONDS.observe(t1 - t0)
-
-        # Step 2: Search both collections in parallel (thread pool)
-        from concurrent.futures import ThreadPoolExecutor
-
-        t2 = time.perf_counter()
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            future_internal = executor.submit(search, query_vector, top_k, INTERNAL)
-            future_external = executor.submit(search, query_vector, top_k, EXTERNAL)
-            internal_results = future_internal.result()
-            external_results = future_external.result()
-        t3 = time.perf_counter()
-        if RAG_SEARCH_SECONDS:
-            RAG_SEARCH_SECONDS.labels(collection="internal").observe((t3 - t2) / 2)
-            RAG_SEARCH_SECONDS.labels(collection="external").observe((t3 - t2) / 2)
 
-        logger.info(
-            f"📊 Retrieved: {len(internal_results)} internal, " f"{len(external_results)} external"
-        )
+        # Step 1: Embed query, then try the semantic cache tier
+        query_vector = await _aembed_query(q)
+        semantic_response = _semantic_cache_get(q, query_vector, top_k, profile)
+        if semantic_response is not None:
+            _cache_store(cache_key, semantic_response)
+            return semantic_response
 
-        # Step 3: Reciprocal-rank fusion
-        fused_results = reciprocal_rank_fusion(internal_results, external_results)
+        # Steps 2-4: Search, fuse, extract context
+        retrieval = await _aretrieve_context(q, top_k, query_vector, profile)
 
-        if not fused_results:
+        if not retrieval.fused_results:
             logger.warning("No results from vector search")
-            return {
-                "question": q,
-                "answer": (
-                    "Bu soruyla ilgili bilgi bulamadım. "
-                    "Lütfen sorunuzu farklı şekilde ifade etmeyi deneyin.\n\n"
-                    f"{MEDICAL_DISCLAIMER}"
-                ),
-                "sources": [],
-                "metadata": {
-                    "internal_hits": len(internal_results),
-                    "external_hits": len(external_results),
-                    "fused_results": 0,
-                    "tokens_used": 0,
-                    "model": settings.llm_model,
-                },
-            }
-
-        # Step 4: Extract context chunks
-        context_chunks = []
-        for result, score, source in fused_results[:top_k]:
-            context_chunks.append(
-                {
-                    "text": result.payload.get("text", ""),
-                    "source": source,
-                    "score": score,
-                    "metadata": result.payload.get("metadata", {}),
-                }
-            )
+            return _no_results_response(q, retrieval)
 
+        context_chunks = retrieval.context_chunks
         logger.info(f"📚 Using {len(context_chunks)} context chunks for answer generation")
 
         # Step 5: Generate answer with LLM
         t4 = time.perf_counter()
-        generation_result = generate_answer(q, context_chunks)
+        generation_result = await agenerate_answer(q, context_chunks)
         t5 = time.perf_counter()
         if RAG_GENERATE_SECONDS:
             RAG_GENERATE_SECONDS.observe(t5 - t4)
@@ -501,27 +1200,17 @@ def retrieve_answer(q: str, top_k: int | None = None) -> dict[str, Any]:
         response = {
             "question": q,
             "answer": generation_result.get("answer", ""),
-            "sources": [
-                {
-                    "text": (
-                        chunk["text"][: settings.pipeline_max_source_text_length] + "..."
-                        if len(chunk["text"]) > settings.pipeline_max_source_text_length
-                        else chunk["text"]
-                    ),
-                    "source": chunk["source"],
-                    "score": round(chunk["score"], 4),
-                }
-                for chunk in context_chunks[: settings.pipeline_max_source_display]
-            ],
+            "sources": _format_sources(context_chunks),
             "metadata": {
-                "internal_hits": len(internal_results),
-                "external_hits": len(external_results),
-                "fused_results": len(fused_results),
+                **_retrieval_metadata(retrieval),
                 "tokens_used": generation_result.get("tokens_used", 0),
                 "model": generation_result.get("model", settings.llm_model),
             },
         }
 
+        if generation_result.get("generation_cached"):
+            response["metadata"]["generation_cached"] = True
+
         # Add error field if present in generation
         if "error" in generation_result:
             response["error"] = generation_result["error"]
@@ -529,70 +1218,225 @@ def retrieve_answer(q: str, top_k: int | None = None) -> dict[str, Any]:
         logger.info("✅ RAG pipeline completed successfully")
         if RAG_TOTAL_SECONDS:
             RAG_TOTAL_SECONDS.observe(t5 - t0)
-        # Save to cache
-        if settings.enable_cache and cache_key:
-            try:
-                _cache_set(cache_key, response)
-            except Exception:
-                logger.debug("Cache save failed; ignoring and continuing", exc_info=True)
+        _cache_store(cache_key, response)
+        _semantic_cache_set(query_vector, top_k, response, profile)
         return response
 
-    except EmbeddingError as e:
-        logger.error(f"Embedding error in RAG pipeline: {e}")
-        if RAG_ERRORS_TOTAL:
-            RAG_ERRORS_TOTAL.labels(type="embedding").inc()
-        return {
-            "question": q,
-            "answer": (
-                "Sorunuzu işlerken bir hata oluştu. Lütfen tekrar deneyin.\n\n"
-                f"{MEDICAL_DISCLAIMER}"
-            ),
-            "error": f"Embedding error: {e!s}",
-            "sources": [],
-            "metadata": {"error_type": "embedding"},
-        }
-    except ConnectionError as e:
-        logger.error(f"Qdrant connection error in RAG pipeline: {e}")
-        if RAG_ERRORS_TOTAL:
-            RAG_ERRORS_TOTAL.labels(type="database").inc()
-        return {
-            "question": q,
-            "answer": (
-                "Veritabanı bağlantısı kurulamadı. Lütfen daha sonra tekrar deneyin.\n\n"
-                f"{MEDICAL_DISCLAIMER}"
-            ),
-            "error": f"Database error: {e!s}",
-            "sources": [],
-            "metadata": {"error_type": "database"},
-        }
-    except RAGError as e:
-        logger.error(f"RAG pipeline error: {e}")
-        if RAG_ERRORS_TOTAL:
-            RAG_ERRORS_TOTAL.labels(type="rag").inc()
-        return {
-            "question": q,
-            "answer": (
-                "Cevap oluşturulurken bir hata oluştu. Lütfen tekrar deneyin.\n\n"
-                f"{MEDICAL_DISCLAIMER}"
-            ),
-            "error": str(e),
-            "sources": [],
-            "metadata": {"error_type": "rag"},
-        }
     except Exception as e:
-        logger.error(f"Unexpected error in RAG pipeline: {e}", exc_info=True)
-        if RAG_ERRORS_TOTAL:
-            RAG_ERRORS_TOTAL.labels(type="unexpected").inc()
-        return {
-            "question": q,
-            "answer": (
-                "Beklenmeyen bir hata oluştu. Lütfen daha sonra tekrar deneyin.\n\n"
-                f"{MEDICAL_DISCLAIMER}"
-            ),
-            "error": f"Unexpected error: {e!s}",
-            "sources": [],
-            "metadata": {"error_type": "unexpected"},
-        }
+        return _pipeline_error_response(q, e)
+
+
+async def _astream_llm(
+    question: str, context_chunks: list[dict[str, Any]], usage: dict[str, Any]
+) -> AsyncIterator[str]:
+    """
+    Stream answer tokens from the LLM.
+
+    Token usage reported by the API on the final chunk is written into
+    ``usage["tokens_used"]``; an OpenAI failure is recorded in ``usage["error"]``
+    and the fallback answer is yielded instead.
+    """
+    try:
+        client = _get_async_llm_client()
+        stream = await client.chat.completions.create(
+            model=settings.llm_model,
+            messages=_build_messages(question, context_chunks),
+            temperature=settings.llm_temperature,
+            max_tokens=settings.llm_max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage["tokens_used"] = getattr(chunk.usage, "total_tokens", 0) or 0
+            if chunk.choices:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+    except OpenAIError as e:
+        fallback = _generation_error_result(e)
+        usage["error"] = fallback["error"]
+        yield fallback["answer"]
+
+
+async def _aonce(text: str) -> AsyncIterator[str]:
+    """Replay a complete answer as a single streamed piece."""
+    yield text
+
+
+def _replay_events(response: dict[str, Any]) -> list[dict[str, Any]]:
+    """Express an already complete response as the stream event sequence."""
+    metadata = response.get("metadata", {})
+    done = {
+        "tokens_used": metadata.get("tokens_used", 0),
+        "model": metadata.get("model", settings.llm_model),
+        "disclaimer_appended": False,
+    }
+    if "error" in response:
+        done["error"] = response["error"]
+    return [
+        {
+            "event": "sources",
+            "data": {
+                "question": response.get("question", ""),
+                "sources": response.get("sources", []),
+                "metadata": metadata,
+            },
+        },
+        {"event": "token", "data": {"text": response.get("answer", "")}},
+        {"event": "done", "data": done},
+    ]
+
+
+async def astream_answer(
+    q: str, top_k: int | None = None, profile: str | None = None
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Streaming variant of :func:`aretrieve_answer`.
+
+    Yields events as ``{"event": <name>, "data": <dict>}``:
+
+    - ``sources``: question, source previews and retrieval metadata, emitted as
+      soon as fusion finishes (before the LLM is called)
+    - ``token``: a piece of the generated answer (``{"text": ...}``)
+    - ``done``: ``tokens_used``, ``model`` and ``disclaimer_appended`` (the
+      disclaimer is streamed as a last token when the model omitted it)
+    - ``error``: pipeline failure with the same fields as the JSON error response
+
+    Cache hits and "no results" answers are replayed as a single token.
+    """
+    q = q.strip()
+    if not q:
+        yield {"event": "error", "data": _empty_question_response()}
+        return
+
+    try:
+        top_k = top_k or settings.search_topk
+        search_tuning(profile=profile)
+        logger.info(f"🔍 RAG Query (stream): {q[:100]}{'...' if len(q) > 100 else ''}")
+        t0 = time.perf_counter()
+
+        cache_key = _response_cache_key(q, top_k, profile)
+        if settings.enable_cache:
+            cached_response = _cache_get(cache_key)
+            if cached_response is not None:
+                logger.info("⚡ Cache hit for query")
+                for event in _replay_events(cached_response):
+                    yield event
+                return
+
+        query_vector = await _aembed_query(q)
+        semantic_response = _semantic_cache_get(q, query_vector, top_k, profile)
+        if semantic_response is not None:
+            _cache_store(cache_key, semantic_response)
+            for event in _replay_events(semantic_response):
+                yield event
+            return
+
+        retrieval = await _aretrieve_context(q, top_k, query_vector, profile)
+        if not retrieval.fused_results:
+            logger.warning("No results from vector search")
+            for event in _replay_events(_no_results_response(q, retrieval)):
+                yield event
+            return
+    except Exception as e:
+        yield {"event": "error", "data": _pipeline_error_response(q, e)}
+        return
+
+    context_chunks = retrieval.context_chunks
+    sources = _format_sources(context_chunks)
+    metadata = {**_retrieval_metadata(retrieval), "model": settings.llm_model}
+    yield {"event": "sources", "data": {"question": q, "sources": sources, "metadata": metadata}}
+
+    usage: dict[str, Any] = {"tokens_used": 0}
+    parts: list[str] = []
+    t4 = time.perf_counter()
+    first_token = True
+    generation_cache_key = _generation_cache_key(q, context_chunks)
+    cached = _generation_cache_get(generation_cache_key)
+    deltas = _aonce(cached["answer"]) if cached else _astream_llm(q, context_chunks, usage)
+    try:
+        async for delta in deltas:
+            if first_token:
+                first_token = False
+                if RAG_FIRST_TOKEN_SECONDS:
+                    RAG_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - t0)
+            parts.append(delta)
+            yield {"event": "token", "data": {"text": delta}}
+    except Exception as e:
+        yield {"event": "error", "data": _pipeline_error_response(q, e)}
+        return
+
+    answer = "".join(parts)
+    disclaimer_appended = MEDICAL_DISCLAIMER not in answer
+    if disclaimer_appended:
+        tail = f"\n\n{MEDICAL_DISCLAIMER}"
+        answer += tail
+        yield {"event": "token", "data": {"text": tail}}
+    t5 = time.perf_counter()
+    if RAG_GENERATE_SECONDS:
+        RAG_GENERATE_SECONDS.observe(t5 - t4)
+    if RAG_TOTAL_SECONDS:
+        RAG_TOTAL_SECONDS.observe(t5 - t0)
+
+    tokens_used = usage["tokens_used"]
+    if RAG_TOKENS_TOTAL and tokens_used:
+        try:
+            RAG_TOKENS_TOTAL.labels(model=settings.llm_model).inc(tokens_used)
+        except Exception:
+            logger.debug("Prometheus token metric update failed; continuing", exc_info=True)
+
+    done = {
+        "tokens_used": tokens_used,
+        "model": settings.llm_model,
+        "disclaimer_appended": disclaimer_appended,
+    }
+    response = {
+        "question": q,
+        "answer": answer,
+        "sources": sources,
+        "metadata": {**metadata, "tokens_used": tokens_used},
+    }
+    if cached:
+        done["generation_cached"] = True
+        response["metadata"]["generation_cached"] = True
+    if "error" in usage:
+        done["error"] = usage["error"]
+        response["error"] = usage["error"]
+    else:
+        if not cached:
+            _generation_cache_set(
+                generation_cache_key,
+                {"answer": answer, "tokens_used": tokens_used, "model": settings.llm_model},
+            )
+        _cache_store(cache_key, response)
+        _semantic_cache_set(query_vector, top_k, response, profile)
+
+    logger.info(f"✅ RAG stream completed: {tokens_used} tokens, {len(answer)} chars")
+    yield {"event": "done", "data": done}
+
+
+def retrieve_answer(q: str, top_k: int | None = None, profile: str | None = None) -> dict[str, Any]:
+    """
+    Synchronous entry point for the RAG pipeline (CLI and ops tools).
+
+    Thin wrapper that runs :func:`aretrieve_answer` on a dedicated background
+    event loop, so async clients are reused across calls.
+
+    Args:
+        q: User question (will be trimmed)
+        top_k: Number of chunks to retrieve per collection (default: 5)
+        profile: Search latency profile, "fast" or "accurate" (default: configured params)
+
+    Returns:
+        Same dictionary shape as :func:`aretrieve_answer`
+
+    Example:
+        >>> result = retrieve_answer("Diyabet belirtileri nelerdir?")
+        >>> print(result["answer"])
+        >>> print(f"Used {result['metadata']['tokens_used']} tokens")
+    """
+    return _run_sync(aretrieve_answer(q, top_k, profile))
 
 
 def cache_stats() -> dict[str, Any]:
@@ -605,18 +1449,33 @@ def cache_stats() -> dict[str, Any]:
                 "ttl_seconds": settings.cache_ttl_seconds,
                 "max_entries": settings.cache_max_entries,
                 "metrics": dict(_cache_metrics),
+                "semantic": {
+                    "enabled": _semantic_cache_active(),
+                    "size": len(_semantic_cache),
+                    "max_entries": settings.semantic_cache_max_entries,
+                    "threshold": settings.semantic_cache_threshold,
+                },
+                "generation": {
+                    "enabled": settings.enable_cache and settings.generation_cache_enabled,
+                    "size": len(_generation_cache),
+                    "ttl_seconds": settings.generation_cache_ttl_seconds,
+                    "max_entries": settings.generation_cache_max_entries,
+                },
             }
     except Exception:
         return {"enabled": False, "size": 0, "ttl_seconds": 0, "max_entries": 0, "metrics": {}}
 
 
 def flush_cache() -> int:
-    """Flush in-memory response cache; returns number of entries removed."""
+    """Flush the in-memory cache tiers; returns number of entries removed."""
     try:
         with _cache_lock:
             n = len(_response_cache)
             _response_cache.clear()
             _update_cache_size_metric()
+        n += _semantic_cache.clear()
+        n += _generation_cache.clear()
+        _update_generation_cache_size_metric()
         logger.info(f"🧹 Cache flushed: {n} entries removed")
         return n
     except Exception:
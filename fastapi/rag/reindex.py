@@ -0,0 +1,320 @@
+"""
+Blue/Green Reindexing with Collection Aliases
+
+The API queries ``INTERNAL``/``EXTERNAL`` by name; with this flow those names
+are Qdrant aliases pointing at versioned collections
+(``freehekim_internal__v20260101T020000``). A rebuild fills a new version
+while the live one keeps serving, waits until it is indexed, warms it,
+validates it (point counts and sampled ANN recall against exact search) and
+then switches the alias in one atomic ``update_collection_aliases`` call.
+The previous version is kept, so a rollback is another alias switch.
+
+Migrating from a plain collection: an alias cannot share a name with a
+collection, so the first swap copies the plain collection into a version
+(``<alias>__v0``, kept for rollback), deletes it and creates the alias. That single step
+leaves the name unresolved for the duration of one delete + alias call.
+"""
+
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    PayloadSchemaType,
+    PointStruct,
+    QueryRequest,
+    Sample,
+    SampleQuery,
+    SearchParams,
+)
+
+from .client_qdrant import VERSION_SEPARATOR
+from .collection_config import CollectionOptions
+
+logger = logging.getLogger(__name__)
+
+COPY_BATCH = 256  # points per scroll/upsert page when copying a collection
+
+# Version given to a migrated plain collection; sorts before every timestamp
+LEGACY_VERSION = "0"
+
+
+@dataclass(slots=True)
+class ValidationReport:
+    """Outcome of :func:`validate_version`."""
+
+    collection: str
+    points: int
+    expected_points: int
+    live_points: int | None = None
+    recall: float | None = None  # mean ANN recall@k against exact search
+    samples: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def summary(self) -> str:
+        live = f", live {self.live_points}" if self.live_points is not None else ""
+        recall = (
+            f", recall {self.recall:.3f} on {self.samples} samples"
+            if self.recall is not None
+            else ""
+        )
+        return f"{self.collection}: {self.points} points (expected {self.expected_points}{live}){recall}"
+
+
+def version_name(alias: str, client: QdrantClient | None = None, version: str | None = None) -> str:
+    """New version name for ``alias`` (UTC timestamp, suffixed if already taken)."""
+    version = version or datetime.now(UTC).strftime("%Y%m%dT%H%M%S")
+    name = f"{alias}{VERSION_SEPARATOR}{version}"
+    candidate, n = name, 2
+    while client is not None and client.collection_exists(candidate):
+        candidate, n = f"{name}_{n}", n + 1
+    return candidate
+
+
+def list_versions(client: QdrantClient, alias: str) -> list[str]:
+    """Versioned collections of ``alias``, oldest first."""
+    prefix = f"{alias}{VERSION_SEPARATOR}"
+    return sorted(c.name for c in client.get_collections().collections if c.name.startswith(prefix))
+
+
+def alias_target(client: QdrantClient, alias: str) -> str | None:
+    """Collection ``alias`` currently points at, or None if it is not an alias."""
+    for item in client.get_aliases().aliases:
+        if item.alias_name == alias:
+            return item.collection_name
+    return None
+
+
+def is_plain_collection(client: QdrantClient, alias: str) -> bool:
+    """True if ``alias`` is still a regular collection (not yet migrated)."""
+    return alias_target(client, alias) is None and client.collection_exists(alias)
+
+
+def create_version(
+    client: QdrantClient,
+    alias: str,
+    dimension: int,
+    distance: Distance = Distance.COSINE,
+    version: str | None = None,
+    options: CollectionOptions | None = None,
+) -> str:
+    """Create an empty version of ``alias`` with the ``metadata.doc_id`` index."""
+    name = version_name(alias, client, version)
+    options = options or CollectionOptions()
+    client.create_collection(name, **options.create_kwargs(dimension, distance))
+    client.create_payload_index(name, "metadata.doc_id", PayloadSchemaType.KEYWORD)
+    logger.info(f"Created collection {name} (dim={dimension}, distance={distance})")
+    return name
+
+
+def copy_points(
+    client: QdrantClient,
+    source: str,
+    target: str,
+    batch: int = COPY_BATCH,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """Copy every point (vector + payload) from ``source`` to ``target``; no re-embedding."""
+    copied = 0
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            source, limit=batch, offset=offset, with_payload=True, with_vectors=True
+        )
+        if records:
+            client.upsert(
+                target,
+                points=[PointStruct(id=r.id, vector=r.vector, payload=r.payload) for r in records],
+                wait=True,
+            )
+            copied += len(records)
+            if progress is not None:
+                progress(copied)
+        if offset is None:
+            return copied
+
+
+def wait_until_indexed(client: QdrantClient, name: str, timeout: float = 600.0) -> bool:
+    """Wait until the optimizers have finished (collection status ``green``)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        status = str(getattr(client.get_collection(name).status, "value", "")).lower()
+        if status == "green":
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(1.0)
+
+
+def sample_vectors(client: QdrantClient, name: str, n: int) -> list[list[float]]:
+    """Stored vectors of up to ``n`` randomly sampled points (used as test queries)."""
+    points = client.query_points(
+        name, query=SampleQuery(sample=Sample.RANDOM), limit=n, with_vectors=True
+    ).points
+    return [p.vector for p in points if isinstance(p.vector, list)]
+
+
+def warm(client: QdrantClient, name: str, queries: int = 50, k: int = 10) -> int:
+    """Run sampled-vector queries against ``name`` to load its index before it goes live."""
+    vectors = sample_vectors(client, name, queries)
+    if vectors:
+        client.query_batch_points(
+            name,
+            requests=[
+                QueryRequest(query=v, limit=k, with_payload=False, with_vector=False)
+                for v in vectors
+            ],
+        )
+    return len(vectors)
+
+
+def sampled_recall(
+    client: QdrantClient, name: str, samples: int = 50, k: int = 10
+) -> tuple[float, int]:
+    """
+    Mean recall@k of the HNSW index against exact search, using stored vectors
+    of randomly sampled points as queries.
+
+    Returns:
+        ``(recall, number_of_queries)``; recall is 1.0 for an empty collection
+    """
+    vectors = sample_vectors(client, name, samples)
+    if not vectors:
+        return 1.0, 0
+
+    def _ids(exact: bool) -> list[set]:
+        responses = client.query_batch_points(
+            name,
+            requests=[
+                QueryRequest(
+                    query=v,
+                    limit=k,
+                    params=SearchParams(exact=exact),
+                    with_payload=False,
+                    with_vector=False,
+                )
+                for v in vectors
+            ],
+        )
+        return [{p.id for p in r.points} for r in responses]
+
+    approx, exact = _ids(False), _ids(True)
+    recalls = [len(a & e) / len(e) for a, e in zip(approx, exact, strict=True) if e]
+    return float(np.mean(recalls)) if recalls else 1.0, len(vectors)
+
+
+def validate_version(
+    client: QdrantClient,
+    name: str,
+    expected_points: int,
+    live: str | None = None,
+    min_count_ratio: float = 0.95,
+    samples: int = 50,
+    k: int = 10,
+    min_recall: float = 0.9,
+) -> ValidationReport:
+    """
+    Check a build before it goes live.
+
+    - holds at least ``expected_points`` points (what the build wrote)
+    - holds at least ``min_count_ratio`` x the live version's points, so a
+      truncated source cannot silently shrink the index
+    - sampled ANN recall@k against exact search is at least ``min_recall``
+    """
+    points = client.count(name, exact=True).count
+    report = ValidationReport(name, points, expected_points)
+    if points < expected_points:
+        report.errors.append(f"only {points} of {expected_points} points stored")
+    if live is not None and client.collection_exists(live):
+        report.live_points = client.count(live, exact=True).count
+        if points < report.live_points * min_count_ratio:
+            report.errors.append(
+                f"{points} points < {min_count_ratio:.0%} of live {report.live_points}"
+            )
+    if points == 0:
+        report.errors.append("collection is empty")
+    elif samples > 0:
+        report.recall, report.samples = sampled_recall(client, name, samples, k)
+        if report.recall < min_recall:
+            report.errors.append(f"recall@{k} {report.recall:.3f} < {min_recall}")
+    return report
+
+
+def swap_alias(client: QdrantClient, alias: str, target: str) -> str | None:
+    """
+    Point ``alias`` at ``target`` atomically and return the previous target.
+
+    A plain collection named ``alias`` is first copied into a version (so it
+    remains available for rollback) and then replaced by the alias.
+    """
+    previous = alias_target(client, alias)
+    if previous is None and client.collection_exists(alias):
+        info = client.get_collection(alias)
+        params = info.config.params.vectors
+        snapshot = create_version(
+            client,
+            alias,
+            params.size,  # type: ignore[union-attr]
+            params.distance,  # type: ignore[union-attr]
+            version=LEGACY_VERSION,
+            options=CollectionOptions.from_collection_info(info),
+        )
+        copy_points(client, alias, snapshot)
+        client.delete_collection(alias)
+        previous = snapshot
+        logger.warning(f"Migrated plain collection {alias} to {snapshot} before aliasing")
+
+    operations: list[CreateAliasOperation | DeleteAliasOperation] = []
+    if alias_target(client, alias) is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    operations.append(
+        CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=alias))
+    )
+    client.update_collection_aliases(change_aliases_operations=operations)
+    logger.info(f"✅ Alias {alias} -> {target} (previous: {previous})")
+    return previous
+
+
+def rollback(client: QdrantClient, alias: str) -> str:
+    """
+    Point ``alias`` back at the newest version older than the live one.
+
+    Raises:
+        ValueError: If there is no older version to roll back to
+    """
+    live = alias_target(client, alias)
+    older = [v for v in list_versions(client, alias) if live is None or v < live]
+    if not older:
+        raise ValueError(f"No previous version of {alias} to roll back to")
+    swap_alias(client, alias, older[-1])
+    return older[-1]
+
+
+def prune_versions(client: QdrantClient, alias: str, keep: int = 2) -> list[str]:
+    """
+    Delete all but the ``keep`` newest versions; the live version and any
+    version newer than it (an unswapped build) are never deleted.
+    """
+    live = alias_target(client, alias)
+    versions = list_versions(client, alias)
+    protected = set(versions[-keep:]) if keep > 0 else set()
+    removed = []
+    for name in versions:
+        if name in protected or (live is not None and name >= live):
+            continue
+        client.delete_collection(name)
+        removed.append(name)
+    return removed
@@ -0,0 +1,162 @@
+"""
+Local CPU Cross-Encoder Reranker
+
+Optional stage between fusion and context selection: the top
+``RERANK_CANDIDATES`` fused hits are re-scored by a cross-encoder that reads
+the question and the chunk together, which ranks far better than RRF over
+separate vector/keyword scores. With a better order, fewer context chunks
+(``PIPELINE_MAX_CONTEXT_CHUNKS``) reach the LLM at the same answer quality.
+
+An ONNX export of the model plus its ``tokenizer.json`` are loaded from
+``RERANK_MODEL_DIR`` and run with ONNX Runtime on CPU, offline. All
+(question, chunk) pairs of a request go through one inference call; the
+pipeline aborts the call through ``RunOptions.terminate`` when the request's
+time budget runs out and keeps the RRF order.
+
+Optional dependencies: ``onnxruntime`` and ``tokenizers``
+(``pip install -r fastapi/requirements-local.txt``).
+"""
+
+import logging
+from collections.abc import Sequence
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+import numpy as np
+
+from config import Settings
+
+from .local_embeddings import MODEL_FILES, TOKENIZER_FILE
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+_reranker: "CrossEncoderReranker | None" = None
+_reranker_failed = False
+_reranker_lock = Lock()
+
+
+class CrossEncoderReranker:
+    """
+    Relevance scores for (query, passage) pairs from an ONNX sequence-classification model.
+
+    Args:
+        session: ``onnxruntime.InferenceSession`` (or compatible object)
+        tokenizer: ``tokenizers.Tokenizer`` with pair truncation configured
+    """
+
+    def __init__(self, session: Any, tokenizer: Any) -> None:
+        self.session = session
+        self.tokenizer = tokenizer
+        self._input_names = {i.name for i in session.get_inputs()}
+
+    @classmethod
+    def load(
+        cls, model_dir: str | Path, threads: int = 4, max_length: int = 512
+    ) -> "CrossEncoderReranker":
+        """
+        Load the ONNX model and tokenizer from ``model_dir``.
+
+        Raises:
+            FileNotFoundError: If the model or tokenizer file is missing
+            ImportError: If onnxruntime or tokenizers is not installed
+        """
+        import onnxruntime as ort  # type: ignore
+        from tokenizers import Tokenizer  # type: ignore
+
+        root = Path(model_dir)
+        model_path = next((root / f for f in MODEL_FILES if (root / f).is_file()), None)
+        if model_path is None:
+            raise FileNotFoundError(f"No ONNX model ({' or '.join(MODEL_FILES)}) in {root}")
+        tokenizer_path = root / TOKENIZER_FILE
+        if not tokenizer_path.is_file():
+            raise FileNotFoundError(f"Tokenizer not found: {tokenizer_path}")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+        tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        # Pairs over max_length lose tokens from the longer side (normally the chunk)
+        tokenizer.enable_truncation(max_length=max_length)
+        tokenizer.no_padding()  # padding is applied per call
+
+        logger.info(
+            f"✅ Reranker loaded from {model_path} (threads={threads}, max_length={max_length})"
+        )
+        return cls(session, tokenizer)
+
+    @staticmethod
+    def run_options() -> Any:
+        """Fresh ``RunOptions``; set ``.terminate = True`` from another thread to abort."""
+        import onnxruntime as ort  # type: ignore
+
+        return ort.RunOptions()
+
+    def score(
+        self, query: str, passages: Sequence[str], run_options: Any | None = None
+    ) -> np.ndarray:
+        """
+        Relevance of each passage to ``query`` in (0, 1), in input order.
+
+        All pairs are padded to the longest one and scored in a single
+        inference call.
+        """
+        if not passages:
+            return np.zeros(0, dtype=np.float32)
+        encodings = self.tokenizer.encode_batch([(query, p) for p in passages])
+        width = max(len(e.ids) for e in encodings)
+        input_ids = np.zeros((len(encodings), width), dtype=np.int64)
+        attention = np.zeros((len(encodings), width), dtype=np.int64)
+        type_ids = np.zeros((len(encodings), width), dtype=np.int64)
+        for row, enc in enumerate(encodings):
+            input_ids[row, : len(enc.ids)] = enc.ids
+            attention[row, : len(enc.ids)] = 1
+            type_ids[row, : len(enc.type_ids)] = enc.type_ids
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention, "token_type_ids": type_ids}
+        feeds = {name: value for name, value in feeds.items() if name in self._input_names}
+        logits = np.asarray(self.session.run(None, feeds, run_options)[0], dtype=np.float32)
+        logits = logits.reshape(len(passages), -1)
+        # (irrelevant, relevant) pairs: sigmoid of the margin = softmax; else one relevance logit
+        logits = logits[:, 1] - logits[:, 0] if logits.shape[1] == 2 else logits[:, -1]
+        return 0.5 * (1.0 + np.tanh(0.5 * logits))  # sigmoid without exp overflow
+
+
+def get_reranker() -> CrossEncoderReranker | None:
+    """
+    The configured reranker, or None when disabled or not loadable.
+
+    A model that fails to load (missing files or dependencies) is logged once
+    and the stage stays off until restart, so requests keep RRF order.
+    """
+    global _reranker, _reranker_failed
+
+    if not settings.rerank_enabled:
+        return None
+    with _reranker_lock:
+        if _reranker is None and not _reranker_failed:
+            try:
+                _reranker = CrossEncoderReranker.load(
+                    settings.rerank_model_dir,
+                    threads=settings.rerank_threads,
+                    max_length=settings.rerank_max_length,
+                )
+            except Exception as e:
+                _reranker_failed = True
+                logger.error(f"Reranker at {settings.rerank_model_dir} unavailable: {e}")
+        return _reranker
+
+
+def reset_reranker() -> None:
+    """Forget the loaded model and any load failure (tests, config reload)."""
+    global _reranker, _reranker_failed
+
+    with _reranker_lock:
+        _reranker, _reranker_failed = None, False
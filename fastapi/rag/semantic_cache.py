@@ -0,0 +1,155 @@
+"""
+Semantic Response Cache
+
+Second cache tier for the RAG pipeline: after the question is embedded,
+earlier questions whose embedding lies within a cosine-similarity threshold
+are served from the stored response instead of calling the LLM again.
+
+Vectors are kept L2-normalized in one contiguous float32 matrix so a lookup
+is a single matrix-vector product. Slots are recycled with TTL expiry first
+and least-recently-used eviction second.
+"""
+
+import logging
+import time
+from collections.abc import Callable, Sequence
+from threading import Lock
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    Fixed-capacity similarity cache over query embeddings.
+
+    Entries are partitioned by a ``scope`` string (e.g. top_k + model) so a
+    response generated under different pipeline settings is never reused.
+
+    Args:
+        max_entries: Number of slots in the vector matrix
+        on_event: Optional callback receiving cache event names
+            (``semantic_hit``, ``semantic_miss``, ``semantic_expired``,
+            ``semantic_evicted``)
+    """
+
+    def __init__(self, max_entries: int, on_event: Callable[[str], None] | None = None) -> None:
+        self.max_entries = max_entries
+        self._on_event = on_event
+        self._lock = Lock()
+        self._dim = 0
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._timestamps = np.zeros(0, dtype=np.float64)
+        self._last_used = np.zeros(0, dtype=np.float64)
+        self._scope_ids = np.zeros(0, dtype=np.int32)
+        self._values: list[dict[str, Any] | None] = []
+        self._scopes: dict[str, int] = {}
+
+    def _emit(self, event: str) -> None:
+        if self._on_event is not None:
+            self._on_event(event)
+
+    def _allocate(self, dim: int) -> None:
+        """(Re)allocate storage for vectors of the given dimension, dropping all entries."""
+        self._dim = dim
+        self._vectors = np.zeros((self.max_entries, dim), dtype=np.float32)
+        self._timestamps = np.zeros(self.max_entries, dtype=np.float64)
+        self._last_used = np.zeros(self.max_entries, dtype=np.float64)
+        self._scope_ids = np.full(self.max_entries, -1, dtype=np.int32)
+        self._values = [None] * self.max_entries
+        self._scopes.clear()
+
+    @staticmethod
+    def _normalize(vector: Sequence[float] | np.ndarray) -> np.ndarray | None:
+        v = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(v))
+        if norm == 0.0:
+            return None
+        return v / norm
+
+    def _expire(self, now: float, ttl: float) -> None:
+        expired = (self._scope_ids >= 0) & (now - self._timestamps > ttl)
+        for slot in np.flatnonzero(expired):
+            self._scope_ids[slot] = -1
+            self._values[slot] = None
+            self._emit("semantic_expired")
+
+    def get(
+        self, vector: Sequence[float] | np.ndarray, scope: str, threshold: float, ttl: float
+    ) -> tuple[dict[str, Any], float] | None:
+        """
+        Return ``(value, similarity)`` of the most similar live entry in ``scope``.
+
+        Returns None (and records a miss) when no entry reaches ``threshold``.
+        """
+        v = self._normalize(vector)
+        with self._lock:
+            scope_id = self._scopes.get(scope)
+            if v is None or scope_id is None or v.shape[0] != self._dim:
+                self._emit("semantic_miss")
+                return None
+
+            now = time.monotonic()
+            self._expire(now, ttl)
+            candidates = np.flatnonzero(self._scope_ids == scope_id)
+            if candidates.size == 0:
+                self._emit("semantic_miss")
+                return None
+
+            sims = self._vectors[candidates] @ v
+            best = int(np.argmax(sims))
+            similarity = float(sims[best])
+            if similarity < threshold:
+                self._emit("semantic_miss")
+                return None
+
+            slot = int(candidates[best])
+            self._last_used[slot] = now
+            value = self._values[slot]
+            self._emit("semantic_hit")
+            return (value, similarity) if value is not None else None
+
+    def set(self, vector: Sequence[float] | np.ndarray, scope: str, value: dict[str, Any]) -> None:
+        """Store ``value`` under ``vector``, evicting the LRU entry when full."""
+        v = self._normalize(vector)
+        if v is None:
+            return
+        with self._lock:
+            if v.shape[0] != self._dim:
+                self._allocate(v.shape[0])
+
+            free = np.flatnonzero(self._scope_ids < 0)
+            if free.size:
+                slot = int(free[0])
+            else:
+                slot = int(np.argmin(self._last_used))
+                self._emit("semantic_evicted")
+
+            scope_id = self._scopes.setdefault(scope, len(self._scopes))
+            now = time.monotonic()
+            self._vectors[slot] = v
+            self._timestamps[slot] = now
+            self._last_used[slot] = now
+            self._scope_ids[slot] = scope_id
+            self._values[slot] = value
+
+    def resize(self, max_entries: int) -> None:
+        """Change capacity; existing entries are dropped."""
+        with self._lock:
+            self.max_entries = max_entries
+            if self._dim:
+                self._allocate(self._dim)
+
+    def clear(self) -> int:
+        """Remove all entries; returns how many were live."""
+        with self._lock:
+            n = int(np.count_nonzero(self._scope_ids >= 0))
+            if self._dim:
+                self._allocate(self._dim)
+            return n
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(np.count_nonzero(self._scope_ids >= 0))
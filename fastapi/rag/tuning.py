@@ -0,0 +1,220 @@
+"""
+Search Parameter Tuning (ef_search / rescoring sweep)
+
+Measures the recall/latency trade-off of search-time parameters on real
+collections: stored vectors of sampled points serve as queries, exact search
+(``exact=True``) provides the top-k ground truth, and every combination of
+``hnsw_ef`` and quantization rescoring is timed query by query. The Pareto
+front of (recall@k, p95 latency) and a recommendation per recall target feed
+the env profile written by ``tools/qdrant_tune.py``.
+"""
+
+import json
+import time
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+from itertools import product
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import QueryRequest, SearchParams
+
+from .client_qdrant import SearchTuning, base_collection
+from .reindex import sample_vectors
+
+DEFAULT_EF_VALUES = (16, 32, 64, 128, 256, 512)
+DEFAULT_OVERSAMPLING = (1.0, 2.0, 4.0)
+
+
+@dataclass(slots=True)
+class TuningResult:
+    """Recall and latency of one parameter combination on one collection."""
+
+    collection: str
+    tuning: SearchTuning
+    recall: float  # mean recall@k against exact search
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    queries: int
+
+    def label(self) -> str:
+        t = self.tuning
+        if t.oversampling is not None:
+            return f"ef={t.hnsw_ef} rescore x{t.oversampling:g}"
+        return f"ef={t.hnsw_ef}" if t.rescore else f"ef={t.hnsw_ef} no rescore"
+
+
+def candidate_tunings(
+    ef_values: Iterable[int] = DEFAULT_EF_VALUES,
+    quantized: bool = False,
+    oversampling: Iterable[float] = DEFAULT_OVERSAMPLING,
+) -> list[SearchTuning]:
+    """
+    Parameter grid to sweep. Rescoring only matters for quantized
+    collections, so plain collections sweep ``hnsw_ef`` alone.
+    """
+    if not quantized:
+        return [SearchTuning(hnsw_ef=ef) for ef in ef_values]
+    rescoring = [(False, None)] + [(True, o) for o in oversampling]
+    return [
+        SearchTuning(hnsw_ef=ef, rescore=rescore, oversampling=over)
+        for ef, (rescore, over) in product(ef_values, rescoring)
+    ]
+
+
+def ground_truth(
+    client: QdrantClient, name: str, queries: Sequence[list[float]], k: int
+) -> list[set]:
+    """Exact top-k point IDs per query (exhaustive search, no quantization)."""
+    responses = client.query_batch_points(
+        name,
+        requests=[
+            QueryRequest(
+                query=q,
+                limit=k,
+                params=SearchParams(exact=True),
+                with_payload=False,
+                with_vector=False,
+            )
+            for q in queries
+        ],
+    )
+    return [{p.id for p in r.points} for r in responses]
+
+
+def measure(
+    client: QdrantClient,
+    name: str,
+    queries: Sequence[list[float]],
+    truth: Sequence[set],
+    tuning: SearchTuning,
+    k: int = 10,
+    repeats: int = 1,
+) -> TuningResult:
+    """
+    Run every query ``repeats`` times with ``tuning`` (one request each, so the
+    latency includes the round trip the API pays) and score recall@k.
+    """
+    params = tuning.search_params()
+    latencies: list[float] = []
+    recalls: list[float] = []
+    for _ in range(max(1, repeats)):
+        for query, expected in zip(queries, truth, strict=True):
+            start = time.perf_counter()
+            points = client.query_points(
+                name,
+                query=query,
+                limit=k,
+                search_params=params,
+                with_payload=False,
+                with_vectors=False,
+            ).points
+            latencies.append((time.perf_counter() - start) * 1000)
+            if expected:
+                recalls.append(len({p.id for p in points} & expected) / len(expected))
+    p50, p95, p99 = (float(v) for v in np.percentile(latencies, [50, 95, 99]))
+    return TuningResult(
+        collection=name,
+        tuning=tuning,
+        recall=float(np.mean(recalls)) if recalls else 1.0,
+        p50_ms=p50,
+        p95_ms=p95,
+        p99_ms=p99,
+        queries=len(queries),
+    )
+
+
+def sweep(
+    client: QdrantClient,
+    name: str,
+    tunings: Sequence[SearchTuning],
+    samples: int = 100,
+    k: int = 10,
+    repeats: int = 1,
+    progress: Callable[[TuningResult], None] | None = None,
+) -> list[TuningResult]:
+    """
+    Measure every tuning in ``tunings`` on ``name`` with the same sampled
+    queries and ground truth. Returns an empty list for an empty collection.
+    """
+    queries = sample_vectors(client, name, samples)
+    if not queries:
+        return []
+    truth = ground_truth(client, name, queries, k)
+    # Untimed pass so the first measured setting doesn't pay for cold caches
+    measure(client, name, queries, truth, tunings[0], k)
+
+    results = []
+    for tuning in tunings:
+        result = measure(client, name, queries, truth, tuning, k, repeats)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return results
+
+
+def pareto_front(results: Sequence[TuningResult]) -> list[TuningResult]:
+    """
+    Results no other result beats on both recall (higher) and p95 latency
+    (lower), sorted by latency.
+    """
+    front = [
+        r
+        for r in results
+        if not any(
+            o.recall >= r.recall
+            and o.p95_ms <= r.p95_ms
+            and (o.recall > r.recall or o.p95_ms < r.p95_ms)
+            for o in results
+        )
+    ]
+    return sorted(front, key=lambda r: (r.p95_ms, -r.recall))
+
+
+def recommend(results: Sequence[TuningResult], target_recall: float) -> TuningResult | None:
+    """
+    Fastest result (p95) reaching ``target_recall``; the most accurate one if
+    none does. Ties on latency prefer the cheaper setting (smaller ``hnsw_ef``).
+    """
+    if not results:
+        return None
+    passing = [r for r in results if r.recall >= target_recall]
+    if passing:
+        return min(passing, key=lambda r: (r.p95_ms, r.tuning.hnsw_ef or 0))
+    return max(results, key=lambda r: (r.recall, -r.p95_ms))
+
+
+def _params(tuning: SearchTuning) -> dict:
+    params: dict = {"hnsw_ef": tuning.hnsw_ef}
+    if not tuning.rescore:
+        params["rescore"] = False
+    if tuning.oversampling is not None:
+        params["oversampling"] = tuning.oversampling
+    return params
+
+
+def env_profile(
+    recommended: dict[str, TuningResult],
+    fast: dict[str, TuningResult] | None = None,
+    accurate: dict[str, TuningResult] | None = None,
+) -> dict[str, str]:
+    """
+    Env settings for the measured recommendations.
+
+    ``recommended`` becomes ``SEARCH_COLLECTION_PARAMS`` (keyed by base
+    collection name, so it survives alias swaps). The request profiles are
+    global, so ``SEARCH_FAST_HNSW_EF`` / ``SEARCH_ACCURATE_HNSW_EF`` take the
+    largest ``hnsw_ef`` any collection needs for its target.
+    """
+    env = {
+        "SEARCH_COLLECTION_PARAMS": json.dumps(
+            {base_collection(c): _params(r.tuning) for c, r in sorted(recommended.items())},
+            separators=(",", ":"),
+        )
+    }
+    for key, picks in (("SEARCH_FAST_HNSW_EF", fast), ("SEARCH_ACCURATE_HNSW_EF", accurate)):
+        efs = [r.tuning.hnsw_ef for r in (picks or {}).values() if r.tuning.hnsw_ef]
+        if efs:
+            env[key] = str(max(efs))
+    return env
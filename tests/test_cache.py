@@ -68,3 +68,51 @@ def test_cache_entry_expires_on_ttl(monkeypatch):
 
     metrics = pipeline.cache_stats()["metrics"]
     assert metrics["expired"] >= 1
+
+
+def test_semantic_cache_hit_within_threshold():
+    from rag.semantic_cache import SemanticCache
+
+    events: list[str] = []
+    cache = SemanticCache(max_entries=4, on_event=events.append)
+    cache.set([1.0, 0.0, 0.0], "scope", {"answer": "diyabet"})
+
+    hit = cache.get([0.99, 0.05, 0.0], "scope", threshold=0.95, ttl=60)
+    assert hit is not None
+    assert hit[0] == {"answer": "diyabet"}
+    assert hit[1] > 0.95
+
+    # Dissimilar vector and foreign scope both miss
+    assert cache.get([0.0, 1.0, 0.0], "scope", threshold=0.95, ttl=60) is None
+    assert cache.get([1.0, 0.0, 0.0], "other", threshold=0.95, ttl=60) is None
+    assert events == ["semantic_hit", "semantic_miss", "semantic_miss"]
+
+
+def test_semantic_cache_evicts_least_recently_used():
+    from rag.semantic_cache import SemanticCache
+
+    events: list[str] = []
+    cache = SemanticCache(max_entries=2, on_event=events.append)
+    cache.set([1.0, 0.0], "s", {"answer": "a"})
+    cache.set([0.0, 1.0], "s", {"answer": "b"})
+    assert cache.get([1.0, 0.0], "s", threshold=0.99, ttl=60) is not None  # "a" is now fresh
+
+    cache.set([-1.0, 0.0], "s", {"answer": "c"})
+
+    assert len(cache) == 2
+    assert "semantic_evicted" in events
+    assert cache.get([0.0, 1.0], "s", threshold=0.99, ttl=60) is None
+    assert cache.get([1.0, 0.0], "s", threshold=0.99, ttl=60)[0] == {"answer": "a"}
+
+
+def test_semantic_cache_expires_on_ttl():
+    from rag.semantic_cache import SemanticCache
+
+    events: list[str] = []
+    cache = SemanticCache(max_entries=2, on_event=events.append)
+    cache.set([1.0, 0.0], "s", {"answer": "a"})
+    time.sleep(0.02)
+
+    assert cache.get([1.0, 0.0], "s", threshold=0.9, ttl=0.01) is None
+    assert "semantic_expired" in events
+    assert len(cache) == 0
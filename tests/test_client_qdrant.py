@@ -0,0 +1,176 @@
+"""
+Tests for FreeHekim Qdrant client helpers (in-process Qdrant)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag import client_qdrant
+from rag.client_qdrant import EXTERNAL, INTERNAL, SearchPlanItem
+
+DIM = 8
+
+
+def _points(seed: int, n: int = 20) -> list[PointStruct]:
+    rng = np.random.default_rng(seed)
+    return [
+        PointStruct(
+            id=i,
+            vector=rng.random(DIM).tolist(),
+            payload={"text": f"chunk {i}", "metadata": {"doc": i}, "raw_html": "<p>…</p>" * 50},
+        )
+        for i in range(n)
+    ]
+
+
+def _populate(client) -> None:
+    for seed, name in enumerate((INTERNAL, EXTERNAL)):
+        client.create_collection(
+            name, vectors_config=VectorParams(size=DIM, distance=Distance.COSINE)
+        )
+        client.upsert(name, points=_points(seed))
+
+
+@pytest.fixture
+def memory_client(monkeypatch):
+    client = QdrantClient(":memory:")
+    _populate(client)
+    monkeypatch.setattr(client_qdrant, "_qdrant", client)
+    return client
+
+
+def test_search_uses_query_points(memory_client):
+    results = client_qdrant.search([0.5] * DIM, topk=3, collection=INTERNAL)
+    assert len(results) == 3
+    assert results[0].score >= results[-1].score
+
+
+def test_search_projects_payload_and_skips_vectors(memory_client, monkeypatch):
+    results = client_qdrant.search([0.5] * DIM, topk=2, collection=INTERNAL)
+    assert set(results[0].payload) == {"text", "metadata"}
+    assert results[0].vector is None
+
+    batched = client_qdrant.search_many(
+        [0.5] * DIM, [SearchPlanItem(INTERNAL, 2, name="a"), SearchPlanItem(INTERNAL, 1, name="b")]
+    )
+    assert all(set(p.payload) == {"text", "metadata"} for p in batched["a"] + batched["b"])
+
+    monkeypatch.setattr(client_qdrant.settings, "search_payload_fields", [])
+    full = client_qdrant.search([0.5] * DIM, topk=1, collection=INTERNAL)
+    assert "raw_html" in full[0].payload
+
+
+def test_search_many_returns_results_per_key(memory_client):
+    vector = [0.3] * DIM
+    timings: dict[str, float] = {}
+    plan = [
+        SearchPlanItem(INTERNAL, 3, name="internal"),
+        SearchPlanItem(INTERNAL, 1, name="internal_top1"),
+        SearchPlanItem(EXTERNAL, 2, name="external"),
+    ]
+
+    results = client_qdrant.search_many(vector, plan, timings=timings)
+
+    assert set(results) == {"internal", "internal_top1", "external"}
+    assert len(results["internal"]) == 3
+    assert results["internal_top1"][0].id == results["internal"][0].id
+    assert len(results["external"]) == 2
+    assert set(timings) == set(results)
+
+
+def test_search_many_rejects_unknown_collection(memory_client):
+    with pytest.raises(ValueError, match="Invalid collection"):
+        client_qdrant.search_many([0.1] * DIM, [SearchPlanItem("other", 3)])
+
+
+def test_search_many_allows_configured_extra_collection(memory_client, monkeypatch):
+    memory_client.create_collection(
+        "extra", vectors_config=VectorParams(size=DIM, distance=Distance.COSINE)
+    )
+    memory_client.upsert("extra", points=_points(7, n=4))
+    monkeypatch.setattr(client_qdrant.settings, "search_extra_collections", ["extra"])
+
+    results = client_qdrant.search_many([0.1] * DIM, [SearchPlanItem("extra", 10)])
+
+    assert len(results["extra"]) == 4
+
+
+def test_asearch_many_matches_sync(memory_client, monkeypatch):
+    vector = [0.7] * DIM
+    plan = [SearchPlanItem(INTERNAL, 4), SearchPlanItem(EXTERNAL, 4)]
+    expected = client_qdrant.search_many(vector, plan)
+
+    async def run():
+        client = AsyncQdrantClient(":memory:")
+        for seed, name in enumerate((INTERNAL, EXTERNAL)):
+            await client.create_collection(
+                name, vectors_config=VectorParams(size=DIM, distance=Distance.COSINE)
+            )
+            await client.upsert(name, points=_points(seed))
+        monkeypatch.setattr(client_qdrant, "_async_qdrant", client)
+        monkeypatch.setattr(client_qdrant, "_async_qdrant_loop", asyncio.get_running_loop())
+        return await client_qdrant.asearch_many(vector, plan)
+
+    results = asyncio.run(run())
+
+    for key in (INTERNAL, EXTERNAL):
+        assert [p.id for p in results[key]] == [p.id for p in expected[key]]
+
+
+def test_quantization_search_params_from_settings(memory_client, monkeypatch):
+    assert client_qdrant.search_params() is None  # server defaults
+
+    monkeypatch.setattr(client_qdrant.settings, "qdrant_quantization_oversampling", 2.0)
+    params = client_qdrant.search_params()
+    assert params.quantization.rescore is True and params.quantization.oversampling == 2.0
+
+    # Collections without quantization accept (and ignore) the parameters
+    assert len(client_qdrant.search([0.5] * DIM, topk=2, collection=INTERNAL)) == 2
+    batched = client_qdrant.search_many([0.5] * DIM, [SearchPlanItem(INTERNAL, 2)])
+    assert len(next(iter(batched.values()))) == 2
+
+
+def test_search_tuning_layers_settings_collection_and_profile(monkeypatch):
+    monkeypatch.setattr(client_qdrant.settings, "search_hnsw_ef", 128)
+    monkeypatch.setattr(client_qdrant.settings, "search_score_threshold", 0.2)
+    monkeypatch.setattr(
+        client_qdrant.settings,
+        "search_collection_params",
+        {EXTERNAL: {"hnsw_ef": 48, "score_threshold": 0.5}},
+    )
+
+    assert client_qdrant.search_tuning(INTERNAL).hnsw_ef == 128
+    external = client_qdrant.search_tuning(EXTERNAL)
+    assert external.hnsw_ef == 48 and external.score_threshold == 0.5
+
+    fast = client_qdrant.search_tuning(EXTERNAL, "fast")
+    assert fast.hnsw_ef == client_qdrant.settings.search_fast_hnsw_ef
+    assert fast.search_params().quantization.rescore is False
+    assert fast.score_threshold == 0.5  # thresholds are not part of the profile
+
+    accurate = client_qdrant.search_tuning(INTERNAL, "accurate").search_params()
+    assert accurate.hnsw_ef == client_qdrant.settings.search_accurate_hnsw_ef
+    assert accurate.quantization.rescore is True and accurate.quantization.oversampling == 2.0
+
+    with pytest.raises(ValueError):
+        client_qdrant.search_tuning(INTERNAL, "turbo")
+
+
+def test_search_applies_profile_and_collection_threshold(memory_client, monkeypatch):
+    monkeypatch.setattr(
+        client_qdrant.settings, "search_collection_params", {INTERNAL: {"score_threshold": 2.0}}
+    )
+    # Cosine scores never exceed 1, so the per-collection threshold filters everything
+    assert client_qdrant.search([0.5] * DIM, topk=3, collection=INTERNAL, profile="fast") == []
+    assert client_qdrant.search([0.5] * DIM, topk=3, collection=INTERNAL, score_threshold=0.0)
+
+    with pytest.raises(ValueError):
+        client_qdrant.search_many([0.5] * DIM, [SearchPlanItem(INTERNAL, 2, profile="turbo")])
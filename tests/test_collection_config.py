@@ -0,0 +1,84 @@
+"""
+Tests for Qdrant collection storage options and memory estimates
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, ScalarQuantization
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag.collection_config import (
+    CollectionOptions,
+    add_collection_arguments,
+    estimate_memory,
+    options_from_args,
+)
+
+
+def _parse(argv: list[str]) -> CollectionOptions:
+    parser = argparse.ArgumentParser()
+    add_collection_arguments(parser)
+    return options_from_args(parser.parse_args(argv))
+
+
+def test_defaults_create_plain_collection():
+    kwargs = CollectionOptions().create_kwargs(1536, Distance.COSINE)
+    assert set(kwargs) == {"vectors_config"}
+    assert kwargs["vectors_config"].on_disk is None
+
+
+def test_cli_options_build_quantized_on_disk_config():
+    options = _parse(
+        [
+            "--quantization", "scalar", "--scalar-quantile", "0.99",
+            "--quantization-always-ram", "--on-disk-vectors", "--on-disk-payload",
+            "--hnsw-m", "32", "--indexing-threshold", "10000",
+        ]
+    )  # fmt: skip
+
+    kwargs = options.create_kwargs(1536, Distance.COSINE)
+
+    assert kwargs["vectors_config"].on_disk is True
+    assert kwargs["on_disk_payload"] is True
+    assert isinstance(kwargs["quantization_config"], ScalarQuantization)
+    assert kwargs["quantization_config"].scalar.always_ram is True
+    assert kwargs["hnsw_config"].m == 32 and kwargs["hnsw_config"].ef_construct is None
+    assert kwargs["optimizers_config"].indexing_threshold == 10000
+    assert "scalar quantization" in options.describe()
+
+
+def test_options_round_trip_through_collection_info():
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        "c", **_parse(["--on-disk-vectors", "--hnsw-m", "8"]).create_kwargs(4, Distance.DOT)
+    )
+
+    options = CollectionOptions.from_collection_info(client.get_collection("c"))
+
+    assert options.on_disk_vectors is True
+    assert options.merged(CollectionOptions(quantization="binary")).quantization == "binary"
+    assert options.merged(CollectionOptions()).on_disk_vectors is True
+
+
+def test_estimate_memory_splits_ram_and_disk():
+    points, dim = 10_000, 1536
+    plain = estimate_memory(points, dim, CollectionOptions())
+    assert plain.vectors == points * dim * 4 and plain.disk == 0
+
+    small = estimate_memory(
+        points,
+        dim,
+        CollectionOptions(
+            quantization="scalar", quantization_always_ram=True, on_disk_vectors=True
+        ),
+    )
+    assert small.quantized == points * dim  # int8: 4x smaller
+    assert small.disk == small.vectors
+    assert small.ram == small.quantized + small.hnsw
+
+    binary = estimate_memory(points, dim, CollectionOptions(quantization="binary"))
+    assert binary.quantized == points * dim // 8
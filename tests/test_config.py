@@ -183,3 +183,24 @@ class TestSettingsHelpers:
 
             assert settings.get_qdrant_api_key() == "qdrant-secret"
             assert settings.get_openai_api_key() == "openai-secret"
+
+    def test_qdrant_client_kwargs_grpc(self):
+        """Test that gRPC settings reach the Qdrant client arguments"""
+        with patch.dict(
+            os.environ,
+            {
+                "QDRANT_API_KEY": "test",
+                "OPENAI_API_KEY": "sk-test",
+                "QDRANT_PREFER_GRPC": "true",
+                "QDRANT_GRPC_PORT": "16334",
+            },
+            clear=True,
+        ):
+            settings = Settings()
+            kwargs = settings.get_qdrant_client_kwargs()
+
+            assert kwargs["prefer_grpc"] is True
+            assert kwargs["grpc_port"] == 16334
+            assert kwargs["host"] == "localhost"
+            assert kwargs["api_key"] == "test"
+            assert settings.get_qdrant_client_kwargs("127.0.0.1")["host"] == "127.0.0.1"
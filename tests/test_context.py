@@ -0,0 +1,79 @@
+"""
+Tests for token-budgeted context packing (word-count tokenizer)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag import context
+from rag.context import BLOCK_OVERHEAD_TOKENS, count_tokens, pack_context
+from rag.ingest import chunk_text
+
+
+def _words(text):
+    return len(text.split())
+
+
+def _chunk(text, doc_id=None, index=None, score=1.0):
+    metadata = {} if doc_id is None else {"doc_id": doc_id, "chunk_index": index}
+    return {"text": text, "source": "internal", "score": score, "metadata": metadata}
+
+
+def test_budget_is_filled_best_first_and_cut_at_sentence_boundaries():
+    chunks = [
+        _chunk("Birinci kaynak tam sığar."),
+        _chunk("İkinci kaynak uzun. Bu cümle bütçeye sığmaz ve atılır."),
+        _chunk("Üçüncü kaynak hiç yer bulamaz."),
+    ]
+    budget = 2 * BLOCK_OVERHEAD_TOKENS + 4 + 5
+
+    packed = pack_context(chunks, budget, max_blocks=5, count=_words)
+
+    assert [c["text"] for c in packed.chunks] == [
+        "Birinci kaynak tam sığar.",
+        "İkinci kaynak uzun.",
+    ]
+    assert packed.tokens == 2 * BLOCK_OVERHEAD_TOKENS + 4 + 3
+    assert (packed.trimmed, packed.dropped) == (1, 1)
+    # The block cap applies before the budget
+    assert len(pack_context(chunks, 1000, max_blocks=1, count=_words).chunks) == 1
+
+
+def test_neighbouring_chunks_of_a_document_are_merged_without_overlap():
+    paragraphs = [f"Paragraf {i} metni burada yer alır ve biraz uzundur." for i in range(6)]
+    parts = chunk_text("\n\n".join(paragraphs), size=120, overlap=60)
+    assert len(parts) > 3
+    # Ranked out of document order, with another document in between
+    order = [1, 0, 2, *range(3, len(parts))]
+    chunks = [{**_chunk(parts[i], "doc-a", i, score=1.0 - i / 10), "id": f"a{i}"} for i in order]
+    chunks.insert(1, _chunk("Başka belge.", "doc-b", 0))
+
+    packed = pack_context(chunks, 1000, max_blocks=5, count=_words)
+
+    assert [c["metadata"]["doc_id"] for c in packed.chunks] == ["doc-a", "doc-b"]
+    assert packed.chunks[0]["text"] == "\n\n".join(paragraphs)
+    assert packed.chunks[0]["metadata"]["chunk_index"] == 1  # best ranked chunk
+    assert packed.chunks[0]["ids"] == [f"a{i}" for i in range(len(parts))]
+    assert packed.merged == len(parts) - 1
+
+
+def test_first_chunk_without_sentence_boundary_is_cut_at_a_word():
+    packed = pack_context(
+        [_chunk("kelime " * 100)], BLOCK_OVERHEAD_TOKENS + 10, max_blocks=5, count=_words
+    )
+
+    text = packed.chunks[0]["text"]
+    assert text.endswith("kelime...") and 5 < _words(text) <= 10
+    assert packed.tokens <= BLOCK_OVERHEAD_TOKENS + 10
+
+
+def test_count_tokens_falls_back_to_estimate_without_tiktoken(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tiktoken", None)  # import fails
+    context.reset_encoding()
+    try:
+        assert context.get_encoding() is None
+        assert count_tokens("a" * 30) == 11
+    finally:
+        context.reset_encoding()
@@ -2,15 +2,37 @@
 Tests for FreeHekim RAG embeddings module
 """
 
+import asyncio
 import sys
+import threading
+import time
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import numpy as np
 import pytest
 
 sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
 
-from rag.embeddings import EmbeddingError, embed, embed_batch, get_embedding_dimension
+from rag.embeddings import (
+    EmbeddingError,
+    aembed,
+    clear_embedding_cache,
+    embed,
+    embed_batch,
+    get_embedding_dimension,
+)
+from rag.local_embeddings import LocalEmbeddingModel
+from rag.microbatch import MicroBatcher
+
+
+@pytest.fixture(autouse=True)
+def _isolated_embedding_cache():
+    """Each test starts with an empty embedding cache."""
+    clear_embedding_cache()
+    yield
+    clear_embedding_cache()
 
 
 class TestEmbed:
@@ -99,22 +121,14 @@ class TestEmbedBatch:
             embed_batch([])
 
     @patch("rag.embeddings._get_openai_client")
-    def test_embed_batch_filters_empty_texts(self, mock_get_client):
-        """Test that empty texts are filtered out"""
-        mock_client = MagicMock()
-        mock_response = MagicMock()
-        mock_response.data = [
-            MagicMock(embedding=[0.1] * 1536),
-            MagicMock(embedding=[0.2] * 1536),
-        ]
-        mock_client.embeddings.create.return_value = mock_response
-        mock_get_client.return_value = mock_client
-
+    def test_embed_batch_rejects_empty_texts(self, mock_get_client):
+        """Test that empty texts are reported by index instead of being dropped"""
         texts = ["text1", "", "text2", "   "]
-        results = embed_batch(texts)
 
-        # Should only embed non-empty texts
-        assert len(results) == 2
+        with pytest.raises(ValueError, match="indices: 1, 3"):
+            embed_batch(texts)
+
+        mock_get_client.assert_not_called()
 
     def test_embed_batch_invalid_batch_size(self):
         """Test that invalid batch_size raises ValueError"""
@@ -141,6 +155,167 @@ class TestEmbedBatch:
         assert mock_client.embeddings.create.call_count == 3
         assert len(results) == 25
 
+    @patch("rag.embeddings._get_openai_client")
+    def test_embed_batch_concurrent_keeps_input_order(self, mock_get_client):
+        """Batches run concurrently but results stay aligned with inputs"""
+        seen_threads = set()
+
+        def fake_create(model, input, encoding_format):
+            seen_threads.add(threading.get_ident())
+            time.sleep(0.02 if input[0] == "t0" else 0.0)  # first batch finishes last
+            return MagicMock(data=[MagicMock(embedding=[float(t[1:])]) for t in input])
+
+        mock_client = MagicMock()
+        mock_client.embeddings.create.side_effect = fake_create
+        mock_get_client.return_value = mock_client
+
+        texts = [f"t{i}" for i in range(12)]
+        results = embed_batch(texts, batch_size=3, max_concurrency=4)
+
+        assert [r[0] for r in results] == [float(i) for i in range(12)]
+        assert mock_client.embeddings.create.call_count == 4
+        assert len(seen_threads) > 1
+
+    @patch("rag.embeddings._get_openai_client")
+    def test_embed_batch_token_budget_splits_batches(self, mock_get_client):
+        """Long texts are split by estimated tokens, not only by count"""
+        mock_client = MagicMock()
+        mock_client.embeddings.create.side_effect = lambda **kw: MagicMock(
+            data=[MagicMock(embedding=[0.1]) for _ in kw["input"]]
+        )
+        mock_get_client.return_value = mock_client
+
+        texts = [f"{i} " + "x" * 2998 for i in range(4)]  # ~1000 tokens each
+        embed_batch(texts, batch_size=100, max_concurrency=1, max_batch_tokens=2500)
+
+        sizes = [len(c.kwargs["input"]) for c in mock_client.embeddings.create.call_args_list]
+        assert sizes == [2, 2]
+
+    @patch("rag.embeddings._get_openai_client")
+    def test_embed_batch_honours_retry_after(self, mock_get_client):
+        """429 responses wait for the server-provided delay, then retry"""
+        import httpx
+        from openai import RateLimitError
+
+        response = httpx.Response(
+            429,
+            headers={"retry-after-ms": "30"},
+            request=httpx.Request("POST", "https://api.openai.com/v1/embeddings"),
+        )
+        calls = []
+
+        def flaky_create(**kwargs):
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise RateLimitError("slow down", response=response, body=None)
+            return MagicMock(data=[MagicMock(embedding=[0.3])])
+
+        mock_client = MagicMock()
+        mock_client.embeddings.create.side_effect = flaky_create
+        mock_get_client.return_value = mock_client
+
+        assert embed_batch(["tek"]) == [[0.3]]
+        assert len(calls) == 2
+        assert calls[1] - calls[0] >= 0.03
+
+
+class TestRateLimitHeaders:
+    """Test parsing of rate-limit hints"""
+
+    def test_reset_durations(self):
+        from rag.embeddings import _parse_duration
+
+        assert _parse_duration("1s") == 1.0
+        assert _parse_duration("6m0s") == 360.0
+        assert _parse_duration("250ms") == 0.25
+        assert _parse_duration("1m30.5s") == 90.5
+        assert _parse_duration("soon") is None
+
+    def test_delay_prefers_retry_after_then_longest_reset(self):
+        from rag.embeddings import _rate_limit_delay
+
+        def exc(headers):
+            return MagicMock(response=MagicMock(headers=headers))
+
+        assert _rate_limit_delay(exc({"retry-after": "2"})) == 2.0
+        assert (
+            _rate_limit_delay(
+                exc({"x-ratelimit-reset-tokens": "1.5s", "x-ratelimit-reset-requests": "20ms"})
+            )
+            == 1.5
+        )
+        assert _rate_limit_delay(exc({})) is None
+
+
+class TestEmbeddingCache:
+    """Test query-embedding cache shared by embed and embed_batch"""
+
+    @patch("rag.embeddings._get_openai_client")
+    def test_embed_cache_hit_skips_api(self, mock_get_client):
+        """Whitespace-normalized duplicates are served from the cache; case is kept"""
+        mock_client = MagicMock()
+        mock_client.embeddings.create.return_value = MagicMock(
+            data=[MagicMock(embedding=[0.5] * 1536)]
+        )
+        mock_get_client.return_value = mock_client
+
+        first = embed("KOAH belirtileri nelerdir?")
+        second = embed("  KOAH   belirtileri nelerdir? ")
+
+        assert first == second
+        assert all(isinstance(x, float) for x in second)
+        mock_client.embeddings.create.assert_called_once()
+
+        embed("koah belirtileri nelerdir?")  # acronym lower-cased: a different text
+        assert mock_client.embeddings.create.call_count == 2
+
+    @patch("rag.embeddings._get_openai_client")
+    def test_embed_batch_only_sends_misses(self, mock_get_client):
+        """embed_batch reuses vectors cached by embed and dedupes repeats"""
+        mock_client = MagicMock()
+        mock_client.embeddings.create.return_value = MagicMock(
+            data=[MagicMock(embedding=[0.25] * 1536)]
+        )
+        mock_get_client.return_value = mock_client
+        embed("cached")
+
+        mock_client.embeddings.create.reset_mock()
+        mock_client.embeddings.create.return_value = MagicMock(
+            data=[MagicMock(embedding=[0.75] * 1536)]
+        )
+        results = embed_batch(["cached", "new", "new"])
+
+        assert mock_client.embeddings.create.call_args.kwargs["input"] == ["new"]
+        assert results[0] == [0.25] * 1536
+        assert results[1] == results[2] == [0.75] * 1536
+
+    @patch("rag.embeddings.settings")
+    @patch("rag.embeddings._get_openai_client")
+    def test_embedding_cache_evicts_oldest(self, mock_get_client, mock_settings):
+        """Cache stays bounded by embedding_cache_max_entries"""
+        from rag import embeddings
+
+        mock_settings.embed_provider = "openai"
+        mock_settings.openai_embedding_model = "text-embedding-3-small"
+        mock_settings.embedding_cache_enabled = True
+        mock_settings.embedding_cache_ttl_seconds = 60
+        mock_settings.embedding_cache_max_entries = 2
+        mock_client = MagicMock()
+        mock_client.embeddings.create.return_value = MagicMock(
+            data=[MagicMock(embedding=[0.1] * 8)]
+        )
+        mock_get_client.return_value = mock_client
+
+        for text in ("a", "b", "c"):
+            embed(text)
+
+        assert len(embeddings._embedding_cache) == 2
+        assert embeddings._embedding_cache[embeddings._embedding_cache_key("c")].vector.dtype == (
+            "float32"
+        )
+        embed("a")
+        assert mock_client.embeddings.create.call_count == 4
+
 
 class TestGetEmbeddingDimension:
     """Test embedding dimension helper"""
@@ -167,3 +342,150 @@ class TestGetEmbeddingDimension:
         mock_settings.embed_provider = "unknown"
 
         assert get_embedding_dimension() == 1536
+
+
+class _FakeSession:
+    """ONNX session stand-in: hidden state row = [token count, first id, 0, …]."""
+
+    def __init__(self, hidden=4):
+        self.hidden = hidden
+        self.calls = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask")]
+
+    def get_outputs(self):
+        return [SimpleNamespace(shape=["batch", "seq", self.hidden])]
+
+    def run(self, _names, feeds):
+        ids, mask = feeds["input_ids"], feeds["attention_mask"]
+        self.calls.append(ids.shape)
+        out = np.zeros((*ids.shape, self.hidden), dtype=np.float32)
+        out[:, 0, 0] = mask.sum(axis=1)
+        out[:, 0, 1] = ids[:, 0]
+        return [out]
+
+
+class _FakeTokenizer:
+    def encode_batch(self, texts):
+        return [SimpleNamespace(ids=[len(t)] + [7] * (len(t.split()) - 1)) for t in texts]
+
+
+class TestLocalEmbeddingModel:
+    """Test the local ONNX embedding backend with a fake session"""
+
+    def test_encode_preserves_order_and_normalizes(self):
+        model = LocalEmbeddingModel(_FakeSession(), _FakeTokenizer(), max_batch_size=2)
+        texts = ["a b c d", "a", "a b", "a b c"]
+
+        vectors = model.encode(texts)
+
+        assert vectors.shape == (4, 4)
+        assert vectors.dtype == np.float32
+        assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+        # Row i was computed from text i (first id encodes the text length)
+        expected = [
+            np.array([n, len(t), 0, 0]) / np.hypot(n, len(t))
+            for t, n in zip(texts, [4, 1, 2, 3], strict=True)
+        ]
+        assert np.allclose(vectors, expected)
+
+    def test_batches_bucket_by_length_under_limits(self):
+        session = _FakeSession()
+        model = LocalEmbeddingModel(session, _FakeTokenizer(), max_batch_size=3, max_batch_tokens=8)
+        texts = ["w " * 5, "w", "w " * 4, "w w", "w"]
+
+        model.encode([t.strip() for t in texts])
+
+        # Sorted lengths 1,1,2 | 4 | 5: each batch padded only to its own longest text
+        assert session.calls == [(3, 2), (1, 4), (1, 5)]
+        assert model.dimension == 4
+
+    @patch("rag.embeddings.settings")
+    @patch("rag.embeddings.get_local_model")
+    def test_bge_m3_provider_uses_local_model(self, mock_get_model, mock_settings):
+        """bge-m3 no longer falls back to OpenAI or mutates settings"""
+        mock_settings.embed_provider = "bge-m3"
+        mock_settings.local_embed_model_dir = "models/bge-m3"
+        mock_settings.embedding_cache_enabled = False
+        mock_get_model.return_value = LocalEmbeddingModel(_FakeSession(), _FakeTokenizer())
+
+        single = embed("bas agrisi")
+        batch = embed_batch(["bas agrisi", "ates"])
+
+        assert mock_settings.embed_provider == "bge-m3"
+        assert len(single) == 4
+        assert batch[0] == pytest.approx(single)
+
+    @patch("rag.embeddings.settings")
+    @patch("rag.embeddings.get_local_model", side_effect=ImportError("onnxruntime"))
+    def test_bge_m3_missing_backend_raises_embedding_error(self, _mock_get, mock_settings):
+        mock_settings.embed_provider = "bge-m3"
+        mock_settings.embedding_cache_enabled = False
+
+        with pytest.raises(EmbeddingError, match="onnxruntime and tokenizers"):
+            embed("metin")
+
+    @patch("rag.embeddings.settings")
+    @patch("rag.embeddings.local_embedding_dimension", return_value=1024)
+    def test_dimension_for_local_model(self, _mock_dim, mock_settings):
+        mock_settings.embed_provider = "bge-m3"
+
+        assert get_embedding_dimension() == 1024
+
+
+class TestEmbeddingMicroBatch:
+    """Test merging of concurrent aembed calls"""
+
+    @patch("rag.embeddings._get_async_openai_client")
+    def test_concurrent_aembed_calls_share_one_request(self, mock_get_client):
+        def fake_create(model, input, encoding_format):
+            return MagicMock(data=[MagicMock(embedding=[float(len(t))] * 4) for t in input])
+
+        mock_client = MagicMock()
+        mock_client.embeddings.create = AsyncMock(side_effect=fake_create)
+        mock_get_client.return_value = mock_client
+        texts = ["a", "bb", "ccc", "bb", "dddd"]
+
+        async def burst():
+            return await asyncio.gather(*(aembed(t) for t in texts))
+
+        results = asyncio.run(burst())
+
+        mock_client.embeddings.create.assert_awaited_once()
+        assert mock_client.embeddings.create.call_args.kwargs["input"] == ["a", "bb", "ccc", "dddd"]
+        assert [r[0] for r in results] == [1.0, 2.0, 3.0, 2.0, 4.0]
+
+    def test_max_items_flushes_without_waiting_for_window(self):
+        batches = []
+        flushes = []
+
+        async def fetch(items):
+            batches.append(list(items))
+            return [i * 10 for i in items]
+
+        async def run():
+            batcher = MicroBatcher(
+                fetch, window_ms=10_000, max_items=3, on_flush=lambda n, d: flushes.append(n)
+            )
+            return await asyncio.wait_for(
+                asyncio.gather(*(batcher.submit(i) for i in range(6))), timeout=1
+            )
+
+        assert asyncio.run(run()) == [0, 10, 20, 30, 40, 50]
+        assert batches == [[0, 1, 2], [3, 4, 5]]
+        assert flushes == [3, 3]
+
+    def test_batch_failure_reaches_every_caller(self):
+        async def fetch(items):
+            raise EmbeddingError("boom")
+
+        async def run():
+            batcher = MicroBatcher(fetch, window_ms=1, max_items=10)
+            return await asyncio.gather(
+                *(batcher.submit(i) for i in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(r, EmbeddingError) for r in results)
@@ -0,0 +1,72 @@
+"""
+Tests for N-way weighted Reciprocal-Rank Fusion
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag.fusion import SMALL_FUSION, fuse_rankings
+
+
+def _hits(ids):
+    return [SimpleNamespace(id=i) for i in ids]
+
+
+def _legacy(internal, external, k=60):
+    """Reference: the original two-list dict implementation."""
+    scores = {}
+    for rank, r in enumerate(internal, start=1):
+        scores.setdefault(str(r.id), {"r": r, "s": 0.0, "src": "internal"})["s"] += 1 / (k + rank)
+    for rank, r in enumerate(external, start=1):
+        entry = scores.get(str(r.id))
+        if entry is None:
+            entry = scores[str(r.id)] = {"r": r, "s": 0.0, "src": "external"}
+        else:
+            entry["src"] = "both"
+        entry["s"] += 1 / (k + rank)
+    ranked = sorted(scores.values(), key=lambda e: e["s"], reverse=True)
+    return [(e["r"].id, e["s"], e["src"]) for e in ranked]
+
+
+@pytest.mark.parametrize("topk", [5, SMALL_FUSION])  # pure-Python and NumPy paths
+def test_two_lists_match_previous_implementation(topk):
+    rng = np.random.default_rng(3)
+    internal = _hits(rng.choice(topk * 2, topk, replace=False).tolist())
+    external = _hits(rng.choice(topk * 2, topk, replace=False).tolist())
+
+    fused = fuse_rankings({"internal": internal, "external": external})
+
+    assert [(r.id, s, src) for r, s, src in fused] == _legacy(internal, external)
+
+
+@pytest.mark.parametrize("pad", [0, SMALL_FUSION])
+def test_weights_k_and_multi_source_attribution(pad):
+    filler = _hits(range(1000, 1000 + pad))
+    rankings = {
+        "internal": _hits([1, 2]) + filler,
+        "external": _hits([3, 2]),
+        "keyword": _hits([3]),
+    }
+
+    fused = fuse_rankings(rankings, weights={"internal": 2.0}, k=0)
+    by_id = {r.id: (score, source) for r, score, source in fused}
+
+    assert fused[0][0].id == 1 and by_id[1] == (2.0, "internal")
+    assert by_id[2] == (pytest.approx(2.0 / 2 + 1 / 2), "both")
+    assert by_id[3] == (2.0, "both")
+    # Documents from several sources keep the first source's hit object
+    assert next(r for r, _, _ in fused if r.id == 2) is rankings["internal"][1]
+    assert len(fuse_rankings(rankings, limit=2)) == 2
+
+
+def test_empty_and_invalid_input():
+    assert fuse_rankings({}) == []
+    assert fuse_rankings({"internal": [], "external": []}) == []
+    with pytest.raises(ValueError):
+        fuse_rankings({"internal": _hits([1])}, k=-1)
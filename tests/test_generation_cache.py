@@ -0,0 +1,53 @@
+"""
+Tests for the generation cache (question normalization, context key, LRU/TTL)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag.generation_cache import GenerationCache, generation_key, normalize_question
+
+
+def _chunk(point_id, ingested_at="2026-01-01T00:00:00+00:00"):
+    return {"text": "metin", "id": point_id, "ingested_at": ingested_at}
+
+
+def test_normalize_question_ignores_case_punctuation_and_spacing():
+    assert normalize_question("  İLAÇ   Etkileşimi nedir?! ") == "ilaç etkileşimi nedir"
+    assert normalize_question("Işık") == normalize_question("ışık")
+
+
+def test_generation_key_covers_question_context_and_model_settings():
+    chunks = [_chunk("a"), _chunk("b")]
+    key = generation_key("Grip nedir?", chunks, "gpt-4", 0.3, 800)
+
+    assert key == generation_key("grip  nedir", chunks, "gpt-4", 0.3, 800)
+    assert key != generation_key("Grip nedir?", chunks[::-1], "gpt-4", 0.3, 800)
+    assert key != generation_key("Grip nedir?", chunks, "gpt-4o", 0.3, 800)
+    assert key != generation_key("Grip nedir?", chunks, "gpt-4", 0.7, 800)
+    reingested = [_chunk("a"), _chunk("b", "2026-02-01T00:00:00+00:00")]
+    assert key != generation_key("Grip nedir?", reingested, "gpt-4", 0.3, 800)
+    merged = [{"text": "metin", "ids": ["a", "b"], "ingested_at": ""}]
+    assert generation_key("Grip nedir?", merged, "gpt-4", 0.3, 800) is not None
+    # Chunks without point identity cannot be fingerprinted
+    assert generation_key("Grip nedir?", [{"text": "metin"}], "gpt-4", 0.3, 800) is None
+
+
+def test_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    events = []
+    cache = GenerationCache(max_entries=2, on_event=events.append)
+    now = [100.0]
+    monkeypatch.setattr("rag.generation_cache.time.monotonic", lambda: now[0])
+
+    cache.set("a", {"answer": "A"})
+    cache.set("b", {"answer": "B"})
+    assert cache.get("a", ttl=60) == {"answer": "A"}
+    cache.set("c", {"answer": "C"})  # evicts "b", the least recently used
+    assert cache.get("b", ttl=60) is None
+    now[0] += 61
+    assert cache.get("a", ttl=60) is None
+
+    assert events == ["hit", "evicted", "miss", "expired", "miss"]
+    assert len(cache) == 1 and cache.clear() == 1
@@ -0,0 +1,277 @@
+"""
+Tests for FreeHekim bulk ingestion (in-process Qdrant, fake embeddings)
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, FieldCondition, Filter, MatchValue, VectorParams
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag import ingest as ingest_module
+from rag.client_qdrant import INTERNAL
+from rag.incremental import Manifest, ingest_incremental, plan_incremental
+from rag.ingest import Checkpoint, chunk_text, ingest, iter_documents
+
+DIM = 4
+
+
+@pytest.fixture
+def client():
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        INTERNAL, vectors_config=VectorParams(size=DIM, distance=Distance.COSINE)
+    )
+    return client
+
+
+@pytest.fixture
+def embed_calls(monkeypatch):
+    calls = []
+
+    def fake_embed_batch(texts):
+        calls.append(list(texts))
+        return [[float(len(t)), 1.0, 0.0, 0.5] for t in texts]
+
+    monkeypatch.setattr(ingest_module, "embed_batch", fake_embed_batch)
+    return calls
+
+
+def _write_corpus(tmp_path: Path) -> Path:
+    corpus = tmp_path / "docs.jsonl"
+    records = [
+        {
+            "id": "diyabet",
+            "text": "Diyabet kan şekeri yüksekliğidir.\n\nBelirtiler: susama.",
+            "title": "Diyabet",
+        },
+        {"id": "grip", "text": "Grip viral bir enfeksiyondur.", "metadata": {"lang": "tr"}},
+        {"text": "kimliksiz kayit"},
+    ]
+    corpus.write_text(
+        "\n".join(json.dumps(r, ensure_ascii=False) for r in records), encoding="utf-8"
+    )
+    return corpus
+
+
+def test_chunk_text_respects_size_and_overlap():
+    text = "\n\n".join(f"Paragraf {i}. " + "kelime " * 30 for i in range(6))
+
+    chunks = chunk_text(text, size=300, overlap=50)
+
+    assert len(chunks) > 1
+    assert all(len(c) <= 300 for c in chunks)
+    # Each chunk after the first starts with the tail of its predecessor
+    assert chunks[1].split("\n\n")[0] in chunks[0]
+
+
+def test_iter_documents_reads_jsonl_and_markdown(tmp_path):
+    _write_corpus(tmp_path)
+    (tmp_path / "notes").mkdir()
+    (tmp_path / "notes" / "tansiyon.md").write_text(
+        "# Tansiyon\n\nYüksek tansiyon.", encoding="utf-8"
+    )
+
+    docs = list(iter_documents([tmp_path]))
+
+    assert [d.doc_id for d in docs] == ["diyabet", "grip", "notes/tansiyon.md"]
+    assert docs[0].metadata["title"] == "Diyabet"
+    assert docs[2].metadata["title"] == "Tansiyon"
+
+
+def test_ingest_is_idempotent_and_skips_unchanged(tmp_path, client, embed_calls):
+    corpus = _write_corpus(tmp_path)
+
+    first = ingest([corpus], INTERNAL, client=client, upsert_batch=1, upsert_workers=2)
+    second = ingest([corpus], INTERNAL, client=client)
+
+    assert first.documents == 2 and first.invalid_records == 1
+    assert first.embedded == first.upserted == first.chunks
+    assert client.count(INTERNAL).count == first.chunks
+    assert second.embedded == 0 and second.skipped_unchanged == second.chunks
+    assert len(embed_calls) == 1
+
+    point = client.scroll(INTERNAL, limit=10, with_payload=True)[0][0]
+    assert {"text", "metadata", "content_hash", "ingested_at"} <= set(point.payload)
+    assert {"doc_id", "chunk_index"} <= set(point.payload["metadata"])
+
+
+def test_ingest_reembeds_only_changed_chunks(tmp_path, client, embed_calls):
+    corpus = _write_corpus(tmp_path)
+    ingest([corpus], INTERNAL, client=client)
+
+    text = corpus.read_text(encoding="utf-8").replace("viral", "bulasici viral")
+    corpus.write_text(text, encoding="utf-8")
+    stats = ingest([corpus], INTERNAL, client=client)
+
+    assert stats.embedded == 1
+    assert embed_calls[-1] == ["Grip bulasici viral bir enfeksiyondur."]
+
+
+def test_checkpoint_resumes_after_stored_documents(tmp_path, client, embed_calls):
+    corpus = _write_corpus(tmp_path)
+    checkpoint = tmp_path / "ckpt.json"
+    ingest([corpus], INTERNAL, client=client, checkpoint=checkpoint, embed_group=1)
+
+    saved = json.loads(checkpoint.read_text(encoding="utf-8"))
+    assert saved["done"] == {str(corpus): 2}
+
+    resumed = ingest([corpus], INTERNAL, client=client, checkpoint=checkpoint)
+    assert resumed.documents == 0
+    assert list(Checkpoint(checkpoint).skip(iter_documents([corpus]))) == []
+
+
+def _write_records(path: Path, records: list[dict]) -> None:
+    path.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in records), encoding="utf-8")
+
+
+def _doc_filter(doc_id: str) -> Filter:
+    return Filter(must=[FieldCondition(key="metadata.doc_id", match=MatchValue(value=doc_id))])
+
+
+def test_incremental_embeds_delta_and_deletes_stale(tmp_path, client, embed_calls):
+    corpus = tmp_path / "docs.jsonl"
+    manifest = tmp_path / "manifest.json"
+    _write_records(
+        corpus,
+        [
+            {"id": "a", "text": "Birinci paragraf.\n\nIkinci paragraf."},
+            {"id": "b", "text": "Grip viral bir enfeksiyondur."},
+            {"id": "c", "text": "Silinecek belge."},
+        ],
+    )
+    first = ingest_incremental(
+        [corpus], INTERNAL, manifest, chunk_size=30, chunk_overlap=0, client=client
+    )
+    assert first.embedded == 4 and first.deleted == 0
+
+    _write_records(
+        corpus,
+        [
+            {"id": "a", "text": "Birinci paragraf.\n\nDegisen paragraf."},
+            {"id": "b", "text": "Grip viral bir enfeksiyondur."},
+            {"id": "d", "text": "Yeni belge."},
+        ],
+    )
+    plan = plan_incremental([corpus], Manifest.load(manifest, INTERNAL), 30, 0, client=client)
+    assert [d.doc_id for d in plan.new] == ["d"]
+    assert [d.doc_id for d in plan.changed] == ["a"]
+    assert plan.deleted == ["c"] and plan.unchanged == 1
+    assert plan.chunks_to_embed == 2  # "Birinci paragraf." is already stored
+    assert plan.estimated_cost(0.02) == pytest.approx(plan.tokens_to_embed / 1e6 * 0.02)
+
+    second = ingest_incremental(
+        [corpus], INTERNAL, manifest, plan=plan, chunk_size=30, chunk_overlap=0, client=client
+    )
+
+    assert second.embedded == 2 and second.deleted == 2
+    assert embed_calls[-1] == ["Yeni belge.", "Degisen paragraf."]
+    texts = sorted(p.payload["text"] for p in client.scroll(INTERNAL, limit=10)[0])
+    assert texts == [
+        "Birinci paragraf.",
+        "Degisen paragraf.",
+        "Grip viral bir enfeksiyondur.",
+        "Yeni belge.",
+    ]
+    saved = json.loads(manifest.read_text(encoding="utf-8"))
+    assert set(saved["documents"]) == {"a", "b", "d"}
+    assert saved["embedding_model"]
+
+
+def test_editing_a_middle_chunk_refreshes_its_neighbours(tmp_path, client, embed_calls):
+    corpus = tmp_path / "docs.jsonl"
+    manifest = tmp_path / "manifest.json"
+    _write_records(
+        corpus,
+        [
+            {"id": "a", "text": "Birinci paragraf.\n\nOrta paragraf.\n\nSon paragraf."},
+            {"id": "b", "text": "Tekrar eden.\n\nTekrar eden."},
+        ],
+    )
+    first = ingest_incremental(
+        [corpus], INTERNAL, manifest, chunk_size=20, chunk_overlap=0, client=client
+    )
+    # Repeated text keeps one point per position but is embedded once
+    assert first.upserted == 5 and first.embedded == 4
+    old = "2020-01-01T00:00:00+00:00"
+    client.set_payload(INTERNAL, payload={"ingested_at": old}, points=Filter())
+
+    _write_records(
+        corpus,
+        [
+            {"id": "a", "text": "Birinci paragraf.\n\nYeni orta.\n\nEk paragraf.\n\nSon paragraf."},
+            {"id": "b", "text": "Tekrar eden.\n\nTekrar eden."},
+        ],
+    )
+    second = ingest_incremental(
+        [corpus], INTERNAL, manifest, chunk_size=20, chunk_overlap=0, client=client
+    )
+
+    assert second.embedded == 2 and second.skipped_unchanged == 2 and second.deleted == 1
+    points = client.scroll(INTERNAL, scroll_filter=_doc_filter("a"), limit=10)[0]
+    payloads = sorted((p.payload for p in points), key=lambda p: p["metadata"]["chunk_index"])
+    assert [(p["metadata"]["chunk_index"], p["text"]) for p in payloads] == [
+        (0, "Birinci paragraf."),
+        (1, "Yeni orta."),
+        (2, "Ek paragraf."),
+        (3, "Son paragraf."),
+    ]
+    assert all(p["ingested_at"] > old for p in payloads)
+
+
+def test_incremental_reembeds_everything_when_model_changes(tmp_path, client, embed_calls):
+    corpus = _write_corpus(tmp_path)
+    manifest = tmp_path / "manifest.json"
+    ingest_incremental([corpus], INTERNAL, manifest, client=client)
+
+    data = json.loads(manifest.read_text(encoding="utf-8"))
+    data["embedding_model"] = "old-model"
+    manifest.write_text(json.dumps(data), encoding="utf-8")
+
+    plan = plan_incremental([corpus], Manifest.load(manifest, INTERNAL), client=client)
+    assert plan.reembed and "old-model" in plan.reason
+    assert len(plan.changed) == 2 and plan.unchanged == 0
+
+    stats = ingest_incremental([corpus], INTERNAL, manifest, plan=plan, client=client)
+    assert stats.embedded == stats.chunks and stats.deleted == 0
+
+
+def test_incremental_model_change_refuses_a_subset_of_paths(tmp_path, client, embed_calls):
+    (tmp_path / "tr").mkdir()
+    (tmp_path / "en").mkdir()
+    (tmp_path / "tr" / "a.md").write_text("# A\n\nTurkce.", encoding="utf-8")
+    (tmp_path / "en" / "b.md").write_text("# B\n\nEnglish.", encoding="utf-8")
+    manifest = tmp_path / "manifest.json"
+    roots = [tmp_path / "tr", tmp_path / "en"]
+    ingest_incremental(roots, INTERNAL, manifest, client=client)
+    data = json.loads(manifest.read_text(encoding="utf-8"))
+    data["embedding_model"] = "old-model"
+    manifest.write_text(json.dumps(data), encoding="utf-8")
+
+    plan = plan_incremental([tmp_path / "en"], Manifest.load(manifest, INTERNAL))
+    assert plan.uncovered == ["a.md"] and "old-model" in plan.rebuild_error
+    with pytest.raises(ValueError, match="outside the given paths"):
+        ingest_incremental([tmp_path / "en"], INTERNAL, manifest, client=client)
+    # Nothing was embedded and the manifest still names the old model
+    assert json.loads(manifest.read_text(encoding="utf-8"))["embedding_model"] == "old-model"
+    calls = len(embed_calls)
+
+    stats = ingest_incremental(roots, INTERNAL, manifest, client=client)
+    assert stats.embedded == 2 and stats.deleted == 0 and len(embed_calls) == calls + 1
+
+
+def test_incremental_only_deletes_under_scanned_paths(tmp_path, client, embed_calls):
+    (tmp_path / "tr").mkdir()
+    (tmp_path / "en").mkdir()
+    (tmp_path / "tr" / "a.md").write_text("# A\n\nTurkce.", encoding="utf-8")
+    (tmp_path / "en" / "b.md").write_text("# B\n\nEnglish.", encoding="utf-8")
+    manifest = tmp_path / "manifest.json"
+    ingest_incremental([tmp_path / "tr"], INTERNAL, manifest, client=client)
+    ingest_incremental([tmp_path / "en"], INTERNAL, manifest, client=client)
+
+    plan = plan_incremental([tmp_path / "en"], Manifest.load(manifest, INTERNAL))
+    assert plan.deleted == [] and plan.unchanged == 1
@@ -0,0 +1,100 @@
+"""
+Tests for the local BM25 keyword index (Turkish tokenization, build, search)
+"""
+
+import math
+import sys
+from pathlib import Path
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag import keyword_index
+from rag.client_qdrant import EXTERNAL, INTERNAL
+from rag.keyword_index import (
+    BM25_B,
+    BM25_K1,
+    KeywordIndex,
+    build_keyword_index,
+    get_keyword_index,
+    indexed_collections,
+    tokenize,
+)
+
+DOCS = {
+    INTERNAL: {
+        1: "Metformin tip 2 diyabet tedavisinde ilk seçenek ilaçtır.",
+        2: "Tip 2 diyabet (ICD-10 E11.9) yaşam tarzı değişikliği ve ilaç ile yönetilir.",
+        3: "Grip aşısı her yıl sonbaharda yapılmalıdır.",
+    },
+    EXTERNAL: {
+        4: "METFORMİN'in en sık yan etkisi mide bulantısıdır; metformin yemekle alınır.",
+        5: "Hipertansiyon tedavisinde tuz kısıtlaması önerilir.",
+    },
+}
+
+
+@pytest.fixture
+def client():
+    client = QdrantClient(":memory:")
+    for collection, docs in DOCS.items():
+        client.create_collection(
+            collection, vectors_config=VectorParams(size=2, distance=Distance.COSINE)
+        )
+        client.upsert(
+            collection,
+            points=[
+                PointStruct(
+                    id=i, vector=[1.0, 0.0], payload={"text": t, "metadata": {"doc_id": f"d{i}"}}
+                )
+                for i, t in docs.items()
+            ],
+        )
+    return client
+
+
+def test_tokenize_turkish_text_and_codes():
+    assert tokenize("METFORMİN'in yan etkileri nelerdir?") == ["metfo", "yan", "etkil"]
+    assert tokenize("E11.9 ve COVID-19 aşısı") == ["e11.9", "covid-19", "asisi"]
+    assert tokenize("İlaç ILAC ilac") == ["ilac"] * 3
+    assert tokenize("anti-inflamatuar 500 mg/gün") == ["anti", "infla", "500", "mg", "gun"]
+
+
+def test_build_and_search(tmp_path, client):
+    path = tmp_path / "bm25"
+    assert build_keyword_index(client, [INTERNAL, EXTERNAL], path, batch=2) == 5
+
+    index = KeywordIndex(path)
+    assert len(index) == 5 and indexed_collections(path) == [INTERNAL, EXTERNAL]
+    assert [p.id for p in index.search("E11.9", 5)] == [2]
+    assert [p.id for p in index.search("metforminin dozu", 5)] == [4, 1]  # tf 2 beats tf 1
+    assert index.search("aspirin", 5) == []
+    hit = index.search("grip aşısı", 1)[0]
+    assert hit.payload == {"text": DOCS[INTERNAL][3], "metadata": {"doc_id": "d3"}}
+
+    # Score matches the BM25 formula
+    lengths = [len(tokenize(t)) for docs in DOCS.values() for t in docs.values()]
+    avgdl, dl = sum(lengths) / len(lengths), len(tokenize(DOCS[INTERNAL][3]))
+    idf = math.log(1 + (5 - 1 + 0.5) / (1 + 0.5))
+    one = idf * (BM25_K1 + 1) / (1 + BM25_K1 * (1 - BM25_B + BM25_B * dl / avgdl))
+    assert hit.score == pytest.approx(2 * one, rel=1e-5)
+
+
+def test_get_keyword_index_reloads_after_rebuild(tmp_path, client, monkeypatch):
+    path = tmp_path / "bm25"
+    monkeypatch.setattr(keyword_index.settings, "keyword_index_enabled", True)
+    monkeypatch.setattr(keyword_index.settings, "keyword_index_path", str(path))
+    keyword_index.reset_keyword_index()
+
+    assert get_keyword_index() is None  # not built yet
+    build_keyword_index(client, [INTERNAL], path)
+    first = get_keyword_index()
+    assert first is not None and get_keyword_index() is first and len(first) == 3
+
+    build_keyword_index(client, [INTERNAL, EXTERNAL], path)
+    assert len(get_keyword_index()) == 5
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["bm25"]
+    keyword_index.reset_keyword_index()
@@ -0,0 +1,92 @@
+"""
+Tests for the local fallback index (in-process Qdrant export, NumPy search)
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag import local_index
+from rag.client_qdrant import EXTERNAL, INTERNAL
+from rag.local_index import LocalIndex, export_index, get_local_index
+
+DIM = 8
+
+
+@pytest.fixture
+def client():
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        INTERNAL, vectors_config=VectorParams(size=DIM, distance=Distance.COSINE)
+    )
+    rng = np.random.default_rng(7)
+    client.upsert(
+        INTERNAL,
+        points=[
+            PointStruct(
+                id=i,
+                vector=rng.normal(size=DIM).tolist(),
+                payload={"text": f"parça {i}", "metadata": {"doc_id": f"d{i}"}, "raw": "x" * 50},
+            )
+            for i in range(40)
+        ],
+    )
+    return client
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int8"])
+def test_export_and_search_match_qdrant(tmp_path, client, dtype, monkeypatch):
+    monkeypatch.setattr(local_index, "BLOCK_BYTES", 16 * DIM * 4)  # 16-row blocks
+    path = tmp_path / "internal"
+    assert export_index(client, INTERNAL, path, dtype=dtype, batch=16) == 40
+    assert not (path / "vectors.f32.npy").exists()  # scratch removed
+
+    index = LocalIndex(path)
+    query = np.random.default_rng(1).normal(size=DIM).tolist()
+    local = index.search(query, 5)
+    remote = client.query_points(INTERNAL, query=query, limit=5).points
+
+    assert len(index) == 40 and index.covers(INTERNAL) and not index.covers(EXTERNAL)
+    if dtype == "float32":
+        assert [p.id for p in local] == [p.id for p in remote]
+        assert local[0].score == pytest.approx(remote[0].score, abs=1e-5)
+    else:
+        assert local[0].id == remote[0].id
+    # Sidecar keeps only the keys searches return
+    assert local[0].payload == {
+        "text": f"parça {local[0].id}",
+        "metadata": {"doc_id": f"d{local[0].id}"},
+    }
+
+
+def test_export_replaces_index_and_respects_limit(tmp_path, client):
+    path = tmp_path / "internal"
+    export_index(client, INTERNAL, path)
+    assert export_index(client, INTERNAL, path, limit=10) == 10
+
+    assert len(LocalIndex(path)) == 10
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["internal"]
+    assert export_index(client, INTERNAL, path, dtype="int8", limit=0) == 0
+    assert LocalIndex(path).search([1.0] * DIM, 5) == []
+
+
+def test_get_local_index_reloads_after_refresh(tmp_path, client, monkeypatch):
+    path = tmp_path / "internal"
+    monkeypatch.setattr(local_index.settings, "local_index_enabled", True)
+    monkeypatch.setattr(local_index.settings, "local_index_path", str(path))
+    local_index.reset_local_index()
+
+    assert get_local_index() is None  # not exported yet
+    export_index(client, INTERNAL, path)
+    first = get_local_index()
+    assert first is not None and get_local_index() is first
+
+    export_index(client, INTERNAL, path, limit=5)
+    assert len(get_local_index()) == 5
+    local_index.reset_local_index()
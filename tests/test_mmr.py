@@ -0,0 +1,61 @@
+"""
+Tests for Maximal Marginal Relevance selection
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag.mmr import hit_vector, mmr_select
+
+
+def _reference(relevance, vectors, k, lambda_):
+    """Textbook MMR loop (recomputes every similarity each step)."""
+    rel = np.asarray(relevance) / max(relevance)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    selected = []
+    while len(selected) < k:
+        best, best_score = None, -np.inf
+        for i in range(len(rel)):
+            if i in selected:
+                continue
+            redundancy = max((max(float(unit[i] @ unit[j]), 0.0) for j in selected), default=0.0)
+            score = lambda_ * rel[i] - (1 - lambda_) * redundancy
+            if score > best_score:
+                best, best_score = i, score
+        selected.append(best)
+    return selected
+
+
+@pytest.mark.parametrize("lambda_", [0.0, 0.3, 0.7, 1.0])
+def test_matches_reference_implementation(lambda_):
+    rng = np.random.default_rng(5)
+    vectors = rng.normal(size=(30, 16))
+    relevance = np.sort(rng.random(30))[::-1]
+
+    assert mmr_select(relevance, vectors, 8, lambda_) == _reference(relevance, vectors, 8, lambda_)
+
+
+def test_near_duplicates_are_skipped_and_missing_vectors_kept():
+    vectors = np.array([[1.0, 0.0], [1.0, 0.01], [0.0, 0.0], [0.0, 1.0]])
+    relevance = [0.04, 0.039, 0.038, 0.02]
+
+    assert mmr_select(relevance, vectors, 3, 0.5) == [0, 2, 3]
+    assert mmr_select(relevance, vectors, 3, 1.0) == [0, 1, 2]  # relevance only
+    assert mmr_select(relevance, vectors, 10, 0.5) == [0, 2, 3, 1]
+
+
+def test_invalid_input_and_hit_vector():
+    with pytest.raises(ValueError):
+        mmr_select([1.0], np.zeros((1, 2)), 1, 1.5)
+    with pytest.raises(ValueError):
+        mmr_select([1.0, 0.5], np.zeros((1, 2)), 1)
+    assert mmr_select([], np.zeros((0, 2)), 3) == []
+    assert hit_vector(SimpleNamespace(vector=[0.1, 0.2])) == [0.1, 0.2]
+    assert hit_vector(SimpleNamespace(vector={"dense": [0.1]})) is None
+    assert hit_vector(SimpleNamespace(id=1)) is None
@@ -0,0 +1,528 @@
+"""Async RAG pipeline tests (retrieval, fusion, error mapping)"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag import context, pipeline  # noqa E402
+
+
+def _point(pid, text):
+    return SimpleNamespace(id=pid, score=0.9, payload={"text": text, "metadata": {}})
+
+
+def _patch_pipeline(monkeypatch, internal, external, calls=None):
+    calls = calls if calls is not None else {}
+
+    async def fake_aembed(text):
+        calls["embed"] = calls.get("embed", 0) + 1
+        return [0.1] * 8
+
+    async def fake_asearch_many(vector, plan, *args, **kwargs):
+        return {
+            item.key: internal if item.collection == pipeline.INTERNAL else external
+            for item in plan
+        }
+
+    async def fake_agenerate(question, context_chunks):
+        calls["generate"] = calls.get("generate", 0) + 1
+        return {"answer": "cevap", "tokens_used": 42, "model": "gpt-test"}
+
+    pipeline.flush_cache()
+    monkeypatch.setattr(pipeline, "aembed", fake_aembed)
+    monkeypatch.setattr(pipeline, "asearch_many", fake_asearch_many)
+    monkeypatch.setattr(pipeline, "agenerate_answer", fake_agenerate)
+    return calls
+
+
+def test_aretrieve_answer_returns_fused_response(monkeypatch):
+    _patch_pipeline(
+        monkeypatch,
+        internal=[_point(1, "iç kaynak"), _point(2, "ortak")],
+        external=[_point(2, "ortak"), _point(3, "dış kaynak")],
+    )
+
+    result = asyncio.run(pipeline.aretrieve_answer("Diyabet belirtileri nelerdir?"))
+
+    assert result["answer"] == "cevap"
+    assert result["metadata"]["internal_hits"] == 2
+    assert result["metadata"]["external_hits"] == 2
+    assert result["metadata"]["fused_results"] == 3
+    assert result["metadata"]["tokens_used"] == 42
+    assert result["sources"][0]["source"] == "both"
+
+
+def test_retrieve_answer_sync_wrapper_uses_cache(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "enable_cache", True, raising=False)
+    calls = _patch_pipeline(monkeypatch, internal=[_point(1, "metin")], external=[])
+
+    first = pipeline.retrieve_answer("Metformin yan etkileri?")
+    second = pipeline.retrieve_answer("Metformin yan etkileri?")
+
+    assert first == second
+    assert calls["generate"] == 1
+
+
+def test_aretrieve_answer_maps_connection_error(monkeypatch):
+    _patch_pipeline(monkeypatch, internal=[], external=[])
+
+    async def failing_asearch_many(*args, **kwargs):
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(pipeline, "asearch_many", failing_asearch_many)
+
+    result = asyncio.run(pipeline.aretrieve_answer("Tansiyon nedir?"))
+
+    assert result["metadata"]["error_type"] == "database"
+    assert result["error"].startswith("Database error")
+    assert pipeline.MEDICAL_DISCLAIMER in result["answer"]
+
+
+def test_empty_question_short_circuits():
+    result = asyncio.run(pipeline.aretrieve_answer("   "))
+    assert result["error"] == "Question cannot be empty"
+
+
+def test_astream_answer_emits_sources_tokens_and_done(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "enable_cache", False, raising=False)
+    _patch_pipeline(monkeypatch, internal=[_point(1, "metin")], external=[])
+
+    async def fake_stream(question, context_chunks, usage):
+        usage["tokens_used"] = 7
+        for piece in ("Merhaba", " dünya"):
+            yield piece
+
+    monkeypatch.setattr(pipeline, "_astream_llm", fake_stream)
+
+    async def collect():
+        return [event async for event in pipeline.astream_answer("Baş ağrısı neden olur?")]
+
+    events = asyncio.run(collect())
+    names = [e["event"] for e in events]
+
+    assert names[0] == "sources"
+    assert events[0]["data"]["metadata"]["internal_hits"] == 1
+    assert names[1:3] == ["token", "token"]
+    # Disclaimer missing from the model output -> streamed as final token
+    assert pipeline.MEDICAL_DISCLAIMER in events[3]["data"]["text"]
+    assert events[-1] == {
+        "event": "done",
+        "data": {
+            "tokens_used": 7,
+            "model": pipeline.settings.llm_model,
+            "disclaimer_appended": True,
+        },
+    }
+
+
+def test_identical_concurrent_queries_are_coalesced(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "enable_cache", False, raising=False)
+    monkeypatch.setattr(pipeline.settings, "enable_request_coalescing", True, raising=False)
+    calls = _patch_pipeline(monkeypatch, internal=[_point(1, "metin")], external=[])
+
+    async def slow_generate(question, context_chunks):
+        calls["generate"] = calls.get("generate", 0) + 1
+        await asyncio.sleep(0.05)
+        return {"answer": "cevap", "tokens_used": 1, "model": "gpt-test"}
+
+    monkeypatch.setattr(pipeline, "agenerate_answer", slow_generate)
+
+    async def burst():
+        return await asyncio.gather(
+            *(pipeline.aretrieve_answer("Grip belirtileri?") for _ in range(5))
+        )
+
+    results = asyncio.run(burst())
+
+    assert calls["generate"] == 1
+    assert calls["embed"] == 1
+    assert all(r == results[0] for r in results)
+    assert not pipeline._inflight
+
+
+def test_coalesced_followers_recover_when_leader_is_cancelled():
+    async def scenario():
+        started = asyncio.Event()
+
+        async def never_finishes():
+            started.set()
+            await asyncio.sleep(10)
+            return {"answer": "leader"}
+
+        async def quick():
+            return {"answer": "follower"}
+
+        leader = asyncio.create_task(pipeline._coalesced("k", never_finishes))
+        await started.wait()
+        follower = asyncio.create_task(pipeline._coalesced("k", quick))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == {"answer": "follower"}
+    assert not pipeline._inflight
+
+
+def test_search_latency_recorded_per_collection(monkeypatch):
+    from prometheus_client import REGISTRY
+
+    _patch_pipeline(monkeypatch, internal=[], external=[])
+
+    async def uneven_asearch_many(vector, plan, timings=None, **kwargs):
+        timings.update({"internal": 0.05, "external": 0.001})
+        return {item.key: [] for item in plan}
+
+    monkeypatch.setattr(pipeline, "asearch_many", uneven_asearch_many)
+
+    def total(label):
+        return REGISTRY.get_sample_value("rag_search_seconds_sum", {"collection": label}) or 0.0
+
+    before = {label: total(label) for label in ("internal", "external")}
+    asyncio.run(pipeline._aretrieve_context("soru", 5, [0.1] * 8))
+    internal = total("internal") - before["internal"]
+    external = total("external") - before["external"]
+
+    assert abs(internal - 0.05) < 1e-9
+    assert abs(external - 0.001) < 1e-9
+
+
+def test_search_profile_reaches_plan_and_cache_key(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "enable_cache", True, raising=False)
+    calls = _patch_pipeline(monkeypatch, internal=[_point(1, "metin")], external=[])
+    profiles = []
+
+    async def recording_asearch_many(vector, plan, *args, **kwargs):
+        profiles.extend(item.profile for item in plan)
+        return {item.key: [_point(1, "metin")] for item in plan}
+
+    monkeypatch.setattr(pipeline, "asearch_many", recording_asearch_many)
+
+    asyncio.run(pipeline.aretrieve_answer("Ates nedir?", profile="fast"))
+    asyncio.run(pipeline.aretrieve_answer("Ates nedir?", profile="accurate"))
+    asyncio.run(pipeline.aretrieve_answer("Ates nedir?", profile="fast"))
+
+    assert profiles == ["fast", "fast", "accurate", "accurate"]
+    assert calls["generate"] == 2  # third call is a cache hit for the "fast" key
+
+
+def test_unknown_search_profile_is_rejected(monkeypatch):
+    _patch_pipeline(monkeypatch, internal=[], external=[])
+    with pytest.raises(ValueError, match="turbo"):
+        asyncio.run(pipeline.aretrieve_answer("Ates nedir?", profile="turbo"))
+
+
+def _fake_local_index(hits):
+    return SimpleNamespace(
+        collection=pipeline.INTERNAL,
+        covers=lambda collection: collection == pipeline.INTERNAL,
+        search=lambda vector, limit, threshold=None: hits[:limit],
+    )
+
+
+def test_search_falls_back_to_local_index_and_skips_cache(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "enable_cache", True, raising=False)
+    calls = _patch_pipeline(monkeypatch, internal=[], external=[])
+
+    async def failing_asearch_many(vector, plan, *args, **kwargs):
+        raise ConnectionError("qdrant down")
+
+    monkeypatch.setattr(pipeline, "asearch_many", failing_asearch_many)
+    monkeypatch.setattr(
+        pipeline, "get_local_index", lambda: _fake_local_index([_point(1, "yerel kopya")])
+    )
+
+    result = asyncio.run(pipeline.aretrieve_answer("Diyabet nedir?"))
+    asyncio.run(pipeline.aretrieve_answer("Diyabet nedir?"))
+
+    assert result["answer"] == "cevap"
+    assert result["metadata"]["fallback"] == "local_index"
+    assert result["metadata"]["internal_hits"] == 1 and result["metadata"]["external_hits"] == 0
+    assert calls["generate"] == 2  # degraded answers are not cached
+
+
+def test_slow_search_falls_back_after_latency_budget(monkeypatch):
+    _patch_pipeline(monkeypatch, internal=[_point(1, "qdrant")], external=[])
+
+    async def slow_asearch_many(vector, plan, *args, **kwargs):
+        await asyncio.sleep(1)
+        return {}
+
+    monkeypatch.setattr(pipeline, "asearch_many", slow_asearch_many)
+    monkeypatch.setattr(pipeline.settings, "local_index_latency_budget_seconds", 0.05)
+    monkeypatch.setattr(
+        pipeline, "get_local_index", lambda: _fake_local_index([_point(2, "yerel")])
+    )
+
+    result = asyncio.run(pipeline.aretrieve_answer("Grip nedir?"))
+
+    assert result["metadata"]["fallback"] == "local_index"
+    assert result["sources"][0]["text"] == "yerel"
+
+
+def test_connection_error_without_local_index_is_reported(monkeypatch):
+    _patch_pipeline(monkeypatch, internal=[], external=[])
+
+    async def failing_asearch_many(vector, plan, *args, **kwargs):
+        raise ConnectionError("qdrant down")
+
+    monkeypatch.setattr(pipeline, "asearch_many", failing_asearch_many)
+    monkeypatch.setattr(pipeline, "get_local_index", lambda: None)
+
+    result = asyncio.run(pipeline.aretrieve_answer("Grip nedir?"))
+
+    assert result["metadata"]["error_type"] == "database"
+
+
+def test_fusion_collections_are_searched_and_weighted(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "enable_cache", False, raising=False)
+    monkeypatch.setattr(pipeline.settings, "search_fusion_collections", ["freehekim_drugs"])
+    monkeypatch.setattr(pipeline.settings, "rrf_weights", {"freehekim_drugs": 3.0})
+    _patch_pipeline(monkeypatch, internal=[], external=[])
+    keys = []
+
+    async def fake_asearch_many(vector, plan, *args, **kwargs):
+        keys.extend(item.key for item in plan)
+        hits = {
+            "internal": [_point(1, "ic")],
+            "external": [],
+            "freehekim_drugs": [_point(9, "ilac")],
+        }
+        return {item.key: hits[item.key] for item in plan}
+
+    monkeypatch.setattr(pipeline, "asearch_many", fake_asearch_many)
+
+    result = asyncio.run(pipeline.aretrieve_answer("Metformin dozu?"))
+
+    assert keys == ["internal", "external", "freehekim_drugs"]
+    assert [s["source"] for s in result["sources"]] == ["freehekim_drugs", "internal"]
+    assert result["metadata"]["fused_results"] == 2
+
+
+def test_mmr_replaces_near_duplicate_context_chunks(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "enable_cache", False, raising=False)
+    monkeypatch.setattr(pipeline.settings, "mmr_enabled", True)
+    monkeypatch.setattr(pipeline.settings, "mmr_lambda", 0.5)
+    monkeypatch.setattr(pipeline.settings, "mmr_candidates", 4)
+    internal = [_point(1, "a"), _point(2, "a kopya"), _point(3, "b")]
+    for hit, vector in zip(internal, ([1.0, 0.0], [1.0, 0.01], [0.0, 1.0]), strict=True):
+        hit.vector = vector
+    _patch_pipeline(monkeypatch, internal=internal, external=[])
+    plans = []
+
+    async def fake_asearch_many(vector, plan, *args, **kwargs):
+        plans.extend(plan)
+        return {item.key: internal if item.key == "internal" else [] for item in plan}
+
+    monkeypatch.setattr(pipeline, "asearch_many", fake_asearch_many)
+
+    result = asyncio.run(pipeline.aretrieve_answer("Grip nedir?", top_k=2))
+
+    assert all(item.with_vectors and item.limit == 4 for item in plans)
+    assert [s["text"] for s in result["sources"]] == ["a", "b"]
+    assert result["metadata"]["fused_results"] == 3
+
+
+def test_keyword_index_is_fused_as_a_source(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "enable_cache", False, raising=False)
+    _patch_pipeline(monkeypatch, internal=[_point(1, "diyabet")], external=[])
+    queries = []
+
+    def keyword_search(q, limit):
+        queries.append((q, limit))
+        return [_point(7, "E11.9 kodu"), _point(1, "diyabet")]
+
+    monkeypatch.setattr(
+        pipeline, "get_keyword_index", lambda: SimpleNamespace(search=keyword_search)
+    )
+
+    result = asyncio.run(pipeline.aretrieve_answer("E11.9 nedir?", top_k=3))
+
+    assert queries == [("E11.9 nedir?", 3)]
+    assert [(s["text"], s["source"]) for s in result["sources"]] == [
+        ("diyabet", "both"),
+        ("E11.9 kodu", "keyword"),
+    ]
+    assert result["metadata"]["keyword_hits"] == 2
+
+
+def test_keyword_index_failure_only_drops_that_source(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "enable_cache", False, raising=False)
+    _patch_pipeline(monkeypatch, internal=[_point(1, "diyabet")], external=[])
+
+    def broken_search(q, limit):
+        raise OSError("index file missing")
+
+    monkeypatch.setattr(
+        pipeline, "get_keyword_index", lambda: SimpleNamespace(search=broken_search)
+    )
+
+    result = asyncio.run(pipeline.aretrieve_answer("Diyabet nedir?"))
+
+    assert [s["text"] for s in result["sources"]] == ["diyabet"]
+    assert result["metadata"]["keyword_hits"] == 0
+
+
+class _FakeReranker:
+    def __init__(self, scores, delay=0.0):
+        self.scores, self.delay, self.options = scores, delay, None
+
+    def run_options(self):
+        self.options = SimpleNamespace(terminate=False)
+        return self.options
+
+    def score(self, q, texts, options):
+        time.sleep(self.delay)
+        return np.array([self.scores[t] for t in texts], dtype=np.float32)
+
+
+def test_reranker_reorders_context_chunks(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "enable_cache", False, raising=False)
+    monkeypatch.setattr(pipeline.settings, "rerank_enabled", True)
+    monkeypatch.setattr(pipeline.settings, "rerank_candidates", 2)
+    internal = [_point(1, "a"), _point(2, "b"), _point(3, "c")]
+    _patch_pipeline(monkeypatch, internal=internal, external=[])
+    reranker = _FakeReranker({"a": 0.1, "b": 0.9})
+    monkeypatch.setattr(pipeline, "get_reranker", lambda: reranker)
+
+    result = asyncio.run(pipeline.aretrieve_answer("Grip nedir?", top_k=3))
+
+    # Top 2 re-scored by the cross-encoder, the rest keeps RRF order behind them;
+    # the RRF score stays in "score"
+    assert [(s["text"], s["score"], s.get("rerank_score")) for s in result["sources"]] == [
+        ("b", round(1 / 62, 4), 0.9),
+        ("a", round(1 / 61, 4), 0.1),
+        ("c", round(1 / 63, 4), None),
+    ]
+    assert result["metadata"]["rerank"] == "applied"
+
+
+def test_mmr_after_reranking_chooses_among_reranked_hits(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "enable_cache", False, raising=False)
+    monkeypatch.setattr(pipeline.settings, "rerank_enabled", True)
+    monkeypatch.setattr(pipeline.settings, "rerank_candidates", 3)
+    monkeypatch.setattr(pipeline.settings, "mmr_enabled", True)
+    monkeypatch.setattr(pipeline.settings, "mmr_lambda", 0.5)
+    monkeypatch.setattr(pipeline.settings, "mmr_candidates", 4)
+    internal = [_point(1, "a"), _point(2, "a kopya"), _point(3, "b"), _point(4, "c")]
+    vectors = ([1.0, 0.0], [1.0, 0.01], [0.0, 1.0], [-1.0, 0.0])
+    for hit, vector in zip(internal, vectors, strict=True):
+        hit.vector = vector
+    _patch_pipeline(monkeypatch, internal=internal, external=[])
+    scores = {"a": 0.9, "a kopya": 0.8, "b": 0.6}
+    monkeypatch.setattr(pipeline, "get_reranker", lambda: _FakeReranker(scores))
+
+    result = asyncio.run(pipeline.aretrieve_answer("Grip nedir?", top_k=2))
+
+    # "c" (not reranked, most diverse) stays out; relevance is the cross-encoder score
+    assert [(s["text"], s["rerank_score"]) for s in result["sources"]] == [("a", 0.9), ("b", 0.6)]
+
+
+def test_reranker_widens_search_and_limits_context(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "enable_cache", False, raising=False)
+    monkeypatch.setattr(pipeline.settings, "rerank_enabled", True)
+    monkeypatch.setattr(pipeline.settings, "rerank_candidates", 5)
+    monkeypatch.setattr(pipeline.settings, "rerank_context_chunks", 1)
+    internal = [_point(1, "a"), _point(2, "b")]
+    _patch_pipeline(monkeypatch, internal=internal, external=[])
+    monkeypatch.setattr(pipeline, "get_reranker", lambda: _FakeReranker({"a": 0.1, "b": 0.9}))
+    plans = []
+
+    async def fake_asearch_many(vector, plan, *args, **kwargs):
+        plans.extend(plan)
+        return {item.key: internal if item.key == "internal" else [] for item in plan}
+
+    monkeypatch.setattr(pipeline, "asearch_many", fake_asearch_many)
+
+    result = asyncio.run(pipeline.aretrieve_answer("Grip nedir?", top_k=3))
+
+    assert all(item.limit == 5 for item in plans)
+    assert [s["text"] for s in result["sources"]] == ["b"]
+
+
+def test_reranker_budget_keeps_rrf_order(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "enable_cache", False, raising=False)
+    monkeypatch.setattr(pipeline.settings, "rerank_enabled", True)
+    monkeypatch.setattr(pipeline.settings, "rerank_budget_seconds", 0.05)
+    _patch_pipeline(monkeypatch, internal=[_point(1, "a"), _point(2, "b")], external=[])
+    reranker = _FakeReranker({"a": 0.1, "b": 0.9}, delay=0.3)
+    monkeypatch.setattr(pipeline, "get_reranker", lambda: reranker)
+
+    result = asyncio.run(pipeline.aretrieve_answer("Grip nedir?"))
+
+    assert [s["text"] for s in result["sources"]] == ["a", "b"]
+    assert result["metadata"]["rerank"] == "timeout"
+    assert reranker.options.terminate is True
+
+
+def test_context_is_packed_to_the_prompt_token_budget(monkeypatch):
+    monkeypatch.setattr(pipeline.settings, "enable_cache", False, raising=False)
+    monkeypatch.setattr(pipeline.settings, "pipeline_prompt_token_budget", 500)
+    monkeypatch.setattr(context, "get_encoding", lambda: None)  # ~3 characters per token
+
+    def hit(pid, doc_id, index, text):
+        metadata = {"doc_id": doc_id, "chunk_index": index}
+        return SimpleNamespace(id=pid, score=0.9, payload={"text": text, "metadata": metadata})
+
+    internal = [
+        hit(1, "grip", 1, "Ateş ve halsizlik görülür. " * 10),
+        hit(2, "grip", 0, "Grip viral bir enfeksiyondur. " * 10),
+        hit(3, "asi", 0, "Aşı her yıl yapılmalıdır. " * 20),
+    ]
+    calls = _patch_pipeline(monkeypatch, internal=internal, external=[])
+
+    async def fake_agenerate(question, context_chunks):
+        calls["messages"] = pipeline._build_messages(question, context_chunks)
+        calls["chunks"] = context_chunks
+        return {"answer": "cevap", "tokens_used": 42, "model": "gpt-test"}
+
+    monkeypatch.setattr(pipeline, "agenerate_answer", fake_agenerate)
+
+    asyncio.run(pipeline.aretrieve_answer("Grip nedir?", top_k=3))
+
+    first, second = calls["chunks"]
+    # Neighbouring chunks merged in document order, the rest cut at a sentence
+    assert first["text"].startswith("Grip") and first["text"].endswith("görülür.")
+    assert second["text"].endswith(".")
+    assert len(second["text"]) < len(internal[2].payload["text"].strip())
+    prompt = sum(context.count_tokens(m["content"]) for m in calls["messages"])
+    assert prompt <= 500
+
+
+def test_generation_cache_reuses_answers_until_points_are_reingested(monkeypatch):
+    internal = [_point(1, "Diyabet kan şekerinin yüksek seyrettiği bir hastalıktır.")]
+    internal[0].payload["ingested_at"] = "2026-01-01T00:00:00+00:00"
+    agenerate_answer = pipeline.agenerate_answer
+    _patch_pipeline(monkeypatch, internal=internal, external=[])
+    monkeypatch.setattr(pipeline, "agenerate_answer", agenerate_answer)
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content=f"cevap {len(calls)} {pipeline.MEDICAL_DISCLAIMER}")
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=message)], usage=SimpleNamespace(total_tokens=50)
+        )
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(pipeline, "_get_async_llm_client", lambda: client)
+
+    first = asyncio.run(pipeline.aretrieve_answer("Diyabet nedir?"))
+    second = asyncio.run(pipeline.aretrieve_answer("diyabet NEDİR"))
+
+    assert len(calls) == 1
+    assert second["answer"] == first["answer"]
+    assert second["metadata"]["generation_cached"] is True
+    assert second["metadata"]["tokens_used"] == 0
+
+    internal[0].payload["ingested_at"] = "2026-02-01T00:00:00+00:00"
+    third = asyncio.run(pipeline.aretrieve_answer("Diyabet nedir"))
+
+    assert len(calls) == 2
+    assert "generation_cached" not in third["metadata"]
@@ -42,3 +42,10 @@ def test_metrics_endpoint_exists():
     assert response.status_code == 200
     # Prometheus metrics should be plain text
     assert "text/plain" in response.headers.get("content-type", "")
+
+
+def test_rag_query_stream_rejects_empty_question():
+    """Test that /rag/query/stream validates input like /rag/query"""
+    response = client.post("/rag/query/stream", json={"q": ""})
+    assert response.status_code == 400
+    assert "error" in response.json()
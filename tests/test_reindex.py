@@ -0,0 +1,103 @@
+"""
+Tests for blue/green reindexing with Qdrant aliases (in-process Qdrant)
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag.client_qdrant import INTERNAL, base_collection
+from rag.reindex import (
+    alias_target,
+    copy_points,
+    create_version,
+    list_versions,
+    prune_versions,
+    rollback,
+    swap_alias,
+    validate_version,
+)
+
+DIM = 4
+
+
+def _points(n: int, offset: int = 0) -> list[PointStruct]:
+    return [
+        PointStruct(
+            id=i + offset,
+            vector=[float(i % 7), float(i % 3), 1.0, float(i % 5)],
+            payload={"text": f"parca {i}", "metadata": {"doc_id": f"d{i}"}},
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def client():
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        INTERNAL, vectors_config=VectorParams(size=DIM, distance=Distance.COSINE)
+    )
+    client.upsert(INTERNAL, points=_points(30))
+    return client
+
+
+def test_first_swap_migrates_plain_collection(client):
+    build = create_version(client, INTERNAL, DIM)
+    assert base_collection(build) == INTERNAL
+    assert copy_points(client, INTERNAL, build, batch=7) == 30
+
+    previous = swap_alias(client, INTERNAL, build)
+
+    assert alias_target(client, INTERNAL) == build
+    assert previous in list_versions(client, INTERNAL) and previous != build
+    assert client.count(previous).count == 30  # old data kept for rollback
+    assert client.count(INTERNAL).count == 30  # the name now resolves through the alias
+
+
+def test_swap_and_rollback_switch_alias(client):
+    first = create_version(client, INTERNAL, DIM)
+    copy_points(client, INTERNAL, first)
+    swap_alias(client, INTERNAL, first)
+
+    second = create_version(client, INTERNAL, DIM)
+    client.upsert(second, points=_points(40))
+    assert swap_alias(client, INTERNAL, second) == first
+    assert client.count(INTERNAL).count == 40
+
+    assert rollback(client, INTERNAL) == first
+    assert client.count(INTERNAL).count == 30
+
+
+def test_validate_version_checks_counts_and_recall(client):
+    build = create_version(client, INTERNAL, DIM)
+    client.upsert(build, points=_points(10))
+
+    report = validate_version(client, build, expected_points=10, live=INTERNAL, samples=5, k=3)
+
+    assert not report.ok
+    assert any("of live" in e for e in report.errors)
+    assert report.recall == pytest.approx(1.0) and report.samples == 5
+
+    client.upsert(build, points=_points(30, offset=100))
+    assert validate_version(client, build, expected_points=40, live=INTERNAL, samples=5).ok
+
+
+def test_prune_keeps_live_and_newer_builds(client):
+    versions = []
+    for _ in range(4):
+        name = create_version(client, INTERNAL, DIM)
+        client.upsert(name, points=_points(3))
+        versions.append(name)
+    swap_alias(client, INTERNAL, versions[2])  # migrates the plain collection too
+
+    removed = prune_versions(client, INTERNAL, keep=1)
+
+    remaining = list_versions(client, INTERNAL)
+    assert versions[2] in remaining and versions[3] in remaining
+    assert versions[0] in removed and versions[1] in removed
@@ -0,0 +1,95 @@
+"""
+Tests for the local cross-encoder reranker (fake ONNX session and tokenizer)
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag import rerank
+from rag.rerank import CrossEncoderReranker, get_reranker
+
+
+class _FakeSession:
+    """Logit per pair = number of passage tokens shared with the query, minus 2."""
+
+    def __init__(self, labels=1, inputs=("input_ids", "attention_mask", "token_type_ids")):
+        self.labels = labels
+        self.inputs = inputs
+        self.calls = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name=n) for n in self.inputs]
+
+    def run(self, _names, feeds, run_options=None):
+        self.calls.append((sorted(feeds), feeds["input_ids"].shape, run_options))
+        ids, types = feeds["input_ids"], feeds.get("token_type_ids")
+        logits = []
+        for row in range(ids.shape[0]):
+            query = set(ids[row][types[row] == 0].tolist()) - {0} if types is not None else set()
+            passage = ids[row][types[row] == 1].tolist() if types is not None else []
+            logits.append(sum(t in query for t in passage) - 2.0)
+        out = np.array(logits, dtype=np.float32)[:, None]
+        return [np.hstack([-out, out]) if self.labels == 2 else out]
+
+
+class _FakeTokenizer:
+    """Word -> id by first letter; query words get type 0, passage words type 1."""
+
+    def encode_batch(self, pairs):
+        encodings = []
+        for query, passage in pairs:
+            q = [ord(w[0]) for w in query.split()]
+            p = [ord(w[0]) for w in passage.split()]
+            encodings.append(SimpleNamespace(ids=q + p, type_ids=[0] * len(q) + [1] * len(p)))
+        return encodings
+
+
+@pytest.mark.parametrize("labels", [1, 2])
+def test_scores_all_pairs_in_one_call(labels):
+    session = _FakeSession(labels=labels)
+    reranker = CrossEncoderReranker(session, _FakeTokenizer())
+    passages = ["kalp", "grip ates oksuruk", "ates grip", "grip ates oksuruk ates"]
+
+    scores = reranker.score("grip ates", passages, run_options="opts")
+
+    assert len(session.calls) == 1
+    assert session.calls[0] == (
+        ["attention_mask", "input_ids", "token_type_ids"],
+        (4, 6),  # padded to the longest pair
+        "opts",
+    )
+    logits = np.array([-2.0, 0.0, 0.0, 1.0]) * (2 if labels == 2 else 1)
+    assert scores == pytest.approx(1 / (1 + np.exp(-logits)))
+    assert reranker.score("grip", []).shape == (0,)
+
+
+def test_only_declared_inputs_are_fed():
+    session = _FakeSession(inputs=("input_ids", "attention_mask"))
+    CrossEncoderReranker(session, _FakeTokenizer()).score("grip", ["grip"])
+
+    assert session.calls[0][0] == ["attention_mask", "input_ids"]
+
+
+def test_get_reranker_disabled_or_unloadable(monkeypatch):
+    rerank.reset_reranker()
+    monkeypatch.setattr(rerank.settings, "rerank_enabled", False)
+    assert get_reranker() is None
+
+    loads = []
+
+    def failing_load(*args, **kwargs):
+        loads.append(args)
+        raise FileNotFoundError("no model.onnx")
+
+    monkeypatch.setattr(rerank.settings, "rerank_enabled", True)
+    monkeypatch.setattr(CrossEncoderReranker, "load", failing_load)
+    assert get_reranker() is None
+    assert get_reranker() is None
+    assert len(loads) == 1  # a failed load is not retried per request
+    rerank.reset_reranker()
@@ -0,0 +1,83 @@
+"""
+Tests for the search parameter tuner (in-process Qdrant)
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag.client_qdrant import INTERNAL, SearchTuning
+from rag.tuning import (
+    TuningResult,
+    candidate_tunings,
+    env_profile,
+    pareto_front,
+    recommend,
+    sweep,
+)
+
+DIM = 8
+
+
+def _result(ef: int, recall: float, p95: float, **tuning) -> TuningResult:
+    return TuningResult(INTERNAL, SearchTuning(hnsw_ef=ef, **tuning), recall, p95 / 2, p95, p95, 10)
+
+
+def test_candidate_tunings_sweeps_rescoring_only_when_quantized():
+    assert [t.hnsw_ef for t in candidate_tunings([32, 64])] == [32, 64]
+
+    quantized = candidate_tunings([32], quantized=True, oversampling=[2.0])
+    assert [(t.rescore, t.oversampling) for t in quantized] == [(False, None), (True, 2.0)]
+
+
+def test_sweep_measures_every_setting_against_exact_ground_truth():
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        INTERNAL, vectors_config=VectorParams(size=DIM, distance=Distance.COSINE)
+    )
+    rng = np.random.default_rng(0)
+    client.upsert(
+        INTERNAL,
+        points=[PointStruct(id=i, vector=rng.random(DIM).tolist()) for i in range(50)],
+    )
+
+    results = sweep(client, INTERNAL, candidate_tunings([16, 64]), samples=5, k=3)
+
+    assert [r.tuning.hnsw_ef for r in results] == [16, 64]
+    # The local client searches exhaustively, so every setting matches exact search
+    assert all(r.recall == 1.0 and r.queries == 5 for r in results)
+    assert all(0 <= r.p50_ms <= r.p95_ms <= r.p99_ms for r in results)
+
+
+def test_pareto_front_and_recommendation():
+    slow_exact = _result(512, 1.0, 9.0)
+    balanced = _result(64, 0.96, 3.0)
+    cheap = _result(16, 0.85, 1.0)
+    dominated = _result(128, 0.95, 4.0)
+    results = [slow_exact, balanced, cheap, dominated]
+
+    assert pareto_front(results) == [cheap, balanced, slow_exact]
+    assert recommend(results, 0.95) is balanced
+    assert recommend(results, 0.8) is cheap
+    assert recommend(results, 1.01) is slow_exact  # unreachable target -> most accurate
+    assert recommend([], 0.9) is None
+
+
+def test_env_profile_keys_params_by_base_collection():
+    env = env_profile(
+        {f"{INTERNAL}__v20260101T000000": _result(64, 0.97, 2.0, rescore=True, oversampling=2.0)},
+        fast={INTERNAL: _result(16, 0.9, 1.0)},
+        accurate={INTERNAL: _result(256, 1.0, 5.0)},
+    )
+
+    assert json.loads(env["SEARCH_COLLECTION_PARAMS"]) == {
+        INTERNAL: {"hnsw_ef": 64, "oversampling": 2.0}
+    }
+    assert env["SEARCH_FAST_HNSW_EF"] == "16"
+    assert env["SEARCH_ACCURATE_HNSW_EF"] == "256"
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Multi-collection search benchmark for FreeHekim RAG
+
+Compares one `query_points` call per (collection, query) against
+`rag.client_qdrant.search_many`, which batches queries on the same collection
+into one `query_batch_points` call and runs collections concurrently.
+
+By default an in-process Qdrant (`QdrantClient(":memory:")`) is populated
+with random vectors, so the numbers show client-side request overhead only.
+Use --simulated-rtt-ms to add a fixed delay per request (models the network
+round trip), or point it at a real server with --url.
+
+Usage:
+  python tools/bench_qdrant_search.py
+  python tools/bench_qdrant_search.py --points 20000 --queries-per-collection 3
+  python tools/bench_qdrant_search.py --simulated-rtt-ms 2
+  python tools/bench_qdrant_search.py --url http://127.0.0.1:6333
+
+Options:
+  --url URL                     Qdrant URL (default: in-process :memory:)
+  --points N                    Points per collection for :memory: (default: 5000)
+  --dimension N                 Vector size for :memory: (default: 1536)
+  --queries-per-collection N    Queries per collection in one plan (default: 2)
+  --topk N                      Limit per query (default: 5)
+  --rounds N                    Measured rounds (default: 200)
+  --simulated-rtt-ms MS         Extra delay per request, :memory: only (default: 0)
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from qdrant_client import QdrantClient  # type: ignore
+from qdrant_client.models import Distance, PointStruct, VectorParams  # type: ignore
+
+# Add fastapi to path (so we can import the RAG client helpers)
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag import client_qdrant  # type: ignore
+from rag.client_qdrant import EXTERNAL, INTERNAL, SearchPlanItem, search_many  # type: ignore
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark multi-collection Qdrant search")
+    p.add_argument("--url", type=str, default="", help="Qdrant URL (default: :memory:)")
+    p.add_argument("--points", type=int, default=5000, help="Points per collection (:memory:)")
+    p.add_argument("--dimension", type=int, default=1536, help="Vector size (:memory:)")
+    p.add_argument("--queries-per-collection", type=int, default=2)
+    p.add_argument("--topk", type=int, default=5)
+    p.add_argument("--rounds", type=int, default=200)
+    p.add_argument("--simulated-rtt-ms", type=float, default=0.0)
+    return p.parse_args()
+
+
+def populate(client: QdrantClient, points: int, dim: int) -> None:
+    rng = np.random.default_rng(42)
+    for name in (INTERNAL, EXTERNAL):
+        client.create_collection(
+            name, vectors_config=VectorParams(size=dim, distance=Distance.COSINE)
+        )
+        vectors = rng.random((points, dim), dtype=np.float32)
+        for start in range(0, points, 512):
+            client.upsert(
+                name,
+                points=[
+                    PointStruct(id=i, vector=vectors[i].tolist(), payload={"text": f"chunk {i}"})
+                    for i in range(start, min(points, start + 512))
+                ],
+            )
+
+
+def add_simulated_rtt(client: QdrantClient, rtt_ms: float) -> None:
+    """Delay every query request by a fixed round trip (sleep releases the GIL)."""
+    for name in ("query_points", "query_batch_points"):
+        original = getattr(client, name)
+
+        def delayed(*a, _original=original, **kw):
+            time.sleep(rtt_ms / 1000)
+            return _original(*a, **kw)
+
+        setattr(client, name, delayed)
+
+
+def percentiles(samples: list[float]) -> str:
+    ms = sorted(s * 1000 for s in samples)
+    p50 = statistics.median(ms)
+    p95 = ms[int(0.95 * (len(ms) - 1))]
+    return f"p50={p50:7.2f} ms  p95={p95:7.2f} ms  mean={statistics.fmean(ms):7.2f} ms"
+
+
+def main() -> int:
+    args = parse_args()
+
+    if args.url:
+        client = QdrantClient(url=args.url)
+        dim = int(client.get_collection(INTERNAL).config.params.vectors.size)  # type: ignore[union-attr]
+    else:
+        client = QdrantClient(":memory:")
+        dim = args.dimension
+        print(f"Populating :memory: Qdrant ({args.points} points x 2 collections, dim={dim}) …")
+        populate(client, args.points, dim)
+        if args.simulated_rtt_ms > 0:
+            add_simulated_rtt(client, args.simulated_rtt_ms)
+
+    # Route rag.client_qdrant through this client
+    client_qdrant._qdrant = client
+
+    plan = [
+        SearchPlanItem(collection, args.topk, name=f"{collection}#{i}")
+        for collection in (INTERNAL, EXTERNAL)
+        for i in range(args.queries_per_collection)
+    ]
+    rng = np.random.default_rng(7)
+    queries = [rng.random(dim, dtype=np.float32).tolist() for _ in range(args.rounds)]
+
+    def one_call_per_item(vector: list[float]) -> None:
+        for item in plan:
+            client.query_points(item.collection, query=vector, limit=item.limit)
+
+    def batched(vector: list[float]) -> None:
+        search_many(vector, plan)
+
+    results: dict[str, list[float]] = {}
+    for label, fn in (("per-item query_points", one_call_per_item), ("search_many", batched)):
+        fn(queries[0])  # warm-up
+        samples = []
+        for vector in queries:
+            t0 = time.perf_counter()
+            fn(vector)
+            samples.append(time.perf_counter() - t0)
+        results[label] = samples
+
+    print()
+    print(f"Plan: {len(plan)} queries over 2 collections, topk={args.topk}, rounds={args.rounds}")
+    if args.simulated_rtt_ms > 0 and not args.url:
+        print(f"Simulated round trip: {args.simulated_rtt_ms} ms per request")
+    print(
+        f"- per-item query_points : {len(plan)} requests/plan | {percentiles(results['per-item query_points'])}"
+    )
+    print(
+        f"- search_many           : 2 requests/plan (concurrent) | {percentiles(results['search_many'])}"
+    )
+    base = statistics.median(results["per-item query_points"])
+    new = statistics.median(results["search_many"])
+    print(f"Median speedup: {base / new:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
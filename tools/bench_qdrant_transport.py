@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Qdrant transport serialization benchmark for FreeHekim RAG
+
+Measures the client-side CPU cost of one `query_points` round trip for our
+vector size, without a server: encoding the request and decoding a top-k
+response with payloads, exactly as qdrant-client does for each transport.
+
+- REST: pydantic → JSON body, JSON → pydantic response models
+- gRPC: REST models → protobuf `QueryPoints` bytes, protobuf `QueryResponse`
+  → REST `ScoredPoint` models
+
+Wire size matters as much as CPU: the 1536-dim query vector is ~30 KB as JSON
+and ~6 KB as protobuf. Payload decoding on the gRPC path goes through
+qdrant-client's Python-level Struct conversion, so payload-only responses
+can decode slower than JSON; vector-bearing responses are much cheaper.
+
+Usage:
+  python tools/bench_qdrant_transport.py
+  python tools/bench_qdrant_transport.py --dimension 3072 --topk 10 --with-vectors
+
+Options:
+  --dimension N      Vector size (default: 1536, text-embedding-3-small)
+  --topk N           Points in the response (default: 5)
+  --payload-chars N  Length of the "text" payload per point (default: 1000)
+  --with-vectors     Include vectors in the response (default: payload only)
+  --rounds N         Measured iterations per step (default: 2000)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+from qdrant_client import grpc, models  # type: ignore
+from qdrant_client.conversions.conversion import GrpcToRest, RestToGrpc  # type: ignore
+from qdrant_client.http.api.search_api import jsonable_encoder  # type: ignore
+from qdrant_client.http.api_client import parse_as_type  # type: ignore
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark REST vs gRPC serialization cost")
+    p.add_argument("--dimension", type=int, default=1536)
+    p.add_argument("--topk", type=int, default=5)
+    p.add_argument("--payload-chars", type=int, default=1000)
+    p.add_argument("--with-vectors", action="store_true")
+    p.add_argument("--rounds", type=int, default=2000)
+    return p.parse_args()
+
+
+def timeit(fn: Callable[[], object], rounds: int) -> float:
+    """Median seconds per call over ``rounds`` calls (after one warm-up)."""
+    fn()
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def build_points(args: argparse.Namespace, rng: np.random.Generator) -> list[models.ScoredPoint]:
+    text = ("Diyabet belirtileri ve tedavi seçenekleri. " * 64)[: args.payload_chars]
+    return [
+        models.ScoredPoint(
+            id=i,
+            version=1,
+            score=float(1.0 - i * 0.01),
+            payload={"text": text, "metadata": {"source": "freehekim", "doc_id": f"doc-{i}"}},
+            vector=rng.random(args.dimension, dtype=np.float32).tolist()
+            if args.with_vectors
+            else None,
+        )
+        for i in range(args.topk)
+    ]
+
+
+def main() -> int:
+    args = parse_args()
+    rng = np.random.default_rng(42)
+    vector = rng.random(args.dimension, dtype=np.float32).tolist()
+    points = build_points(args, rng)
+
+    # REST: what search_api.query_points sends and parses
+    def rest_encode() -> bytes:
+        request = models.QueryRequest(
+            query=vector, limit=args.topk, with_payload=True, with_vector=args.with_vectors
+        )
+        return jsonable_encoder(request).encode()  # pydantic v2: JSON string body
+
+    rest_response = json.dumps(
+        {
+            "result": {"points": [json.loads(jsonable_encoder(p)) for p in points]},
+            "status": "ok",
+            "time": 0.001,
+        }
+    ).encode()
+
+    def rest_decode() -> object:
+        return parse_as_type(json.loads(rest_response), models.InlineResponse20022)
+
+    # gRPC: what qdrant_remote.query_points builds and converts back
+    def grpc_encode() -> bytes:
+        request = grpc.QueryPoints(
+            collection_name="freehekim_internal",
+            query=RestToGrpc.convert_query(models.NearestQuery(nearest=vector)),
+            limit=args.topk,
+            with_payload=RestToGrpc.convert_with_payload_interface(True),
+            with_vectors=RestToGrpc.convert_with_vectors(args.with_vectors),
+        )
+        return request.SerializeToString()
+
+    grpc_response = grpc.QueryResponse(
+        result=[RestToGrpc.convert_scored_point(p) for p in points], time=0.001
+    ).SerializeToString()
+
+    def grpc_decode() -> object:
+        res = grpc.QueryResponse.FromString(grpc_response)
+        return [GrpcToRest.convert_scored_point(hit) for hit in res.result]
+
+    rows = [
+        ("REST/JSON", len(rest_encode()), len(rest_response), rest_encode, rest_decode),
+        ("gRPC/protobuf", len(grpc_encode()), len(grpc_response), grpc_encode, grpc_decode),
+    ]
+
+    print(
+        f"dim={args.dimension} topk={args.topk} payload={args.payload_chars} chars "
+        f"with_vectors={args.with_vectors} rounds={args.rounds}"
+    )
+    print(
+        f"{'transport':<14} {'req bytes':>10} {'resp bytes':>11} {'encode µs':>10} "
+        f"{'decode µs':>10} {'total µs':>10}"
+    )
+    totals = {}
+    for name, req_bytes, resp_bytes, encode, decode in rows:
+        enc = timeit(encode, args.rounds) * 1e6
+        dec = timeit(decode, args.rounds) * 1e6
+        totals[name] = enc + dec
+        print(
+            f"{name:<14} {req_bytes:>10} {resp_bytes:>11} {enc:>10.1f} {dec:>10.1f} "
+            f"{enc + dec:>10.1f}"
+        )
+    delta = totals["REST/JSON"] - totals["gRPC/protobuf"]
+    print(
+        f"gRPC vs REST: {delta:+.1f} µs saved per query "
+        f"({totals['REST/JSON'] / totals['gRPC/protobuf']:.2f}x)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
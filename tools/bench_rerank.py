@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Cross-encoder reranker latency benchmark for FreeHekim RAG
+
+Loads the local reranker (RERANK_MODEL_DIR, see fastapi/rag/rerank.py) and
+times one scoring call for a question against N chunks, the work the
+pipeline does per request, so RERANK_BUDGET_SECONDS and RERANK_CANDIDATES can
+be chosen for the target CPU. Runs offline.
+
+Usage:
+  python tools/bench_rerank.py
+  python tools/bench_rerank.py --candidates 10 20 40 --chunk-words 150 --rounds 30
+
+Options:
+  --model-dir DIR       Model directory (default: RERANK_MODEL_DIR)
+  --candidates N [N…]   Chunks per call (default: RERANK_CANDIDATES)
+  --chunk-words N       Words per synthetic chunk (default: 120)
+  --rounds N            Measured calls per setting (default: 20)
+
+Notes:
+  - Threads and max length come from RERANK_THREADS / RERANK_MAX_LENGTH
+  - Requires onnxruntime + tokenizers (pip install -r fastapi/requirements-local.txt)
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add fastapi to path (so we can import the RAG helpers)
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from config import Settings  # type: ignore
+from rag.rerank import CrossEncoderReranker  # type: ignore
+
+QUESTION = "Metformin kullanan diyabet hastasında böbrek fonksiyonu nasıl izlenmeli?"
+WORDS = (
+    "diyabet metformin böbrek glomerüler filtrasyon hızı kreatinin laktik asidoz doz "
+    "hasta tedavi izlem yıllık ölçüm risk kontrendikasyon insülin hipoglisemi"
+).split()
+
+
+def parse_args(settings: Settings) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark the local cross-encoder reranker")
+    p.add_argument("--model-dir", default=settings.rerank_model_dir)
+    p.add_argument("--candidates", type=int, nargs="+", default=[settings.rerank_candidates])
+    p.add_argument("--chunk-words", type=int, default=120)
+    p.add_argument("--rounds", type=int, default=20)
+    return p.parse_args()
+
+
+def make_chunks(n: int, words: int) -> list[str]:
+    return [" ".join(WORDS[(i + j) % len(WORDS)] for j in range(words)) for i in range(n)]
+
+
+def main() -> int:
+    settings = Settings()
+    args = parse_args(settings)
+    t0 = time.perf_counter()
+    reranker = CrossEncoderReranker.load(
+        args.model_dir, threads=settings.rerank_threads, max_length=settings.rerank_max_length
+    )
+    print(f"Loaded {args.model_dir} in {time.perf_counter() - t0:.1f}s")
+    print(
+        f"threads={settings.rerank_threads}, max_length={settings.rerank_max_length}, "
+        f"budget={settings.rerank_budget_seconds}s\n"
+    )
+
+    for n in args.candidates:
+        chunks = make_chunks(n, args.chunk_words)
+        reranker.score(QUESTION, chunks)  # warm-up
+        samples = []
+        for _ in range(args.rounds):
+            t0 = time.perf_counter()
+            reranker.score(QUESTION, chunks)
+            samples.append(time.perf_counter() - t0)
+        ms = sorted(s * 1000 for s in samples)
+        p95 = ms[int(0.95 * (len(ms) - 1))]
+        within = sum(s <= settings.rerank_budget_seconds for s in samples)
+        print(
+            f"{n:>4} chunks: p50={statistics.median(ms):7.1f} ms  p95={p95:7.1f} ms  "
+            f"within budget {within}/{len(samples)}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
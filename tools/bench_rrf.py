@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Reciprocal-Rank Fusion benchmark for FreeHekim RAG
+
+Compares the previous dict-of-dicts RRF (two lists, string point IDs) with
+`rag.fusion.fuse_rankings` (N weighted lists, interned IDs, NumPy scoring).
+The previous implementation only takes two lists, so the N-list comparison
+uses the same dict-of-dicts approach extended to N lists as the baseline.
+Both paths are checked to produce the same ranking before timing. With fewer
+than rag.fusion.SMALL_FUSION hits in total fuse_rankings takes a pure-Python
+path, since NumPy's per-call overhead would dominate.
+
+Overlap between lists is controlled with --overlap: each list draws its IDs
+from a shared pool of `topk / overlap` documents, so 0.5 means roughly half of
+a list's hits also appear in the others.
+
+Usage:
+  python tools/bench_rrf.py
+  python tools/bench_rrf.py --topk 100 --lists 4 --rounds 2000
+  python tools/bench_rrf.py --topk 10 --lists 2
+
+Options:
+  --topk N       Hits per list (default: 100)
+  --lists N      Number of ranked lists for the N-way comparison (default: 4)
+  --overlap X    Shared-ID fraction between lists, 0..1 (default: 0.5)
+  --rounds N     Measured fusions per implementation (default: 1000)
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+# Add fastapi to path (so we can import the RAG helpers)
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from qdrant_client.models import ScoredPoint  # type: ignore
+
+from rag.fusion import RRF_K, fuse_rankings  # type: ignore
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Benchmark reciprocal-rank fusion")
+    p.add_argument("--topk", type=int, default=100)
+    p.add_argument("--lists", type=int, default=4)
+    p.add_argument("--overlap", type=float, default=0.5)
+    p.add_argument("--rounds", type=int, default=1000)
+    return p.parse_args()
+
+
+def legacy_rrf(internal: list, external: list, k: int = RRF_K) -> list[tuple[Any, float, str]]:
+    """The two-list implementation fuse_rankings replaced (kept here as the baseline)."""
+    scores: dict[str, dict[str, Any]] = {}
+    for rank, result in enumerate(internal, start=1):
+        point_id = str(result.id)
+        if point_id not in scores:
+            scores[point_id] = {"result": result, "score": 0.0, "source": "internal"}
+        scores[point_id]["score"] += 1.0 / (k + rank)
+    for rank, result in enumerate(external, start=1):
+        point_id = str(result.id)
+        if point_id not in scores:
+            scores[point_id] = {"result": result, "score": 0.0, "source": "external"}
+        else:
+            scores[point_id]["source"] = "both"
+        scores[point_id]["score"] += 1.0 / (k + rank)
+    ranked = sorted(scores.values(), key=lambda x: x["score"], reverse=True)
+    return [(r["result"], r["score"], r["source"]) for r in ranked]
+
+
+def legacy_rrf_n(rankings: dict[str, list], k: int = RRF_K) -> list[tuple[Any, float, str]]:
+    """The legacy dict-of-dicts approach extended to N lists."""
+    scores: dict[str, dict[str, Any]] = {}
+    for name, results in rankings.items():
+        for rank, result in enumerate(results, start=1):
+            point_id = str(result.id)
+            if point_id not in scores:
+                scores[point_id] = {"result": result, "score": 0.0, "source": name}
+            elif scores[point_id]["source"] != name:
+                scores[point_id]["source"] = "both"
+            scores[point_id]["score"] += 1.0 / (k + rank)
+    ranked = sorted(scores.values(), key=lambda x: x["score"], reverse=True)
+    return [(r["result"], r["score"], r["source"]) for r in ranked]
+
+
+def make_rankings(n_lists: int, topk: int, overlap: float) -> dict[str, list[ScoredPoint]]:
+    rng = np.random.default_rng(42)
+    pool = max(topk, int(topk / max(overlap, 0.01)))
+    names = ["internal", "external"] + [f"source_{i}" for i in range(2, n_lists)]
+    return {
+        name: [
+            ScoredPoint(id=int(pid), version=0, score=1.0 - r / topk, payload={"text": "x"})
+            for r, pid in enumerate(rng.choice(pool, topk, replace=False))
+        ]
+        for name in names[:n_lists]
+    }
+
+
+def timed(fn: Callable[[], Any], rounds: int) -> list[float]:
+    fn()  # warm-up
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def summary(samples: list[float]) -> str:
+    us = sorted(s * 1e6 for s in samples)
+    p95 = us[int(0.95 * (len(us) - 1))]
+    return f"p50={statistics.median(us):8.1f} µs  p95={p95:8.1f} µs"
+
+
+def same_ranking(a: list[tuple[Any, float, str]], b: list[tuple[Any, float, str]]) -> bool:
+    return [(r.id, round(s, 12), src) for r, s, src in a] == [
+        (r.id, round(s, 12), src) for r, s, src in b
+    ]
+
+
+def compare(label: str, baseline: Callable[[], Any], new: Callable[[], Any], rounds: int) -> None:
+    if not same_ranking(baseline(), new()):
+        raise SystemExit(f"✗ {label}: rankings differ")
+    base, fused = timed(baseline, rounds), timed(new, rounds)
+    print(f"{label}")
+    print(f"- dict-of-dicts : {summary(base)}")
+    print(f"- fuse_rankings : {summary(fused)}")
+    print(f"  median speedup: {statistics.median(base) / statistics.median(fused):.2f}x")
+
+
+def main() -> int:
+    args = parse_args()
+    rankings = make_rankings(max(2, args.lists), args.topk, args.overlap)
+    two = {name: rankings[name] for name in ("internal", "external")}
+    unique = len({p.id for hits in rankings.values() for p in hits})
+    print(f"topk={args.topk}, {len(rankings)} lists, {unique} unique IDs, rounds={args.rounds}\n")
+
+    compare(
+        "2 lists (previous reciprocal_rank_fusion)",
+        lambda: legacy_rrf(two["internal"], two["external"]),
+        lambda: fuse_rankings(two),
+        args.rounds,
+    )
+    if len(rankings) > 2:
+        print()
+        compare(
+            f"{len(rankings)} lists (dict-of-dicts extended to N)",
+            lambda: legacy_rrf_n(rankings),
+            lambda: fuse_rankings(rankings),
+            args.rounds,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Keyword-source recall evaluation for FreeHekim RAG
+
+Runs a labeled query set through retrieval twice: the vector searches alone
+(internal + external + SEARCH_FUSION_COLLECTIONS, fused with RRF) and the same
+searches plus the local BM25 keyword index as the API fuses them with
+KEYWORD_INDEX_ENABLED. Reports recall@k for both (and for the keyword index on
+its own) and the gain, so the weight of the "keyword" source can be tuned with
+RRF_WEIGHTS before it is enabled.
+
+Query set: JSONL, one object per line; a hit is relevant when its
+`metadata.doc_id` (or point ID) is listed in `relevant`:
+
+  {"query": "Metformin yan etkileri", "relevant": ["ilac-metformin"]}
+  {"query": "E11.9 tedavisi", "relevant": ["icd-e11", "diyabet-tip2"]}
+
+Usage:
+  python tools/eval_keyword_recall.py queries.jsonl
+  python tools/eval_keyword_recall.py queries.jsonl --k 5 --k 10 --show-changes
+
+Options:
+  --index DIR        Keyword index directory (default: KEYWORD_INDEX_PATH)
+  --k N              Cut-off for recall@k; repeatable (default: 5 and 10)
+  --show-changes     List the queries whose recall@k (largest k) changed
+
+Notes:
+  - Reads config from repo .env via Settings (fastapi/config.py); RRF_K and
+    RRF_WEIGHTS apply as in the API
+  - Embeds every query once (embedding cost ~ query count x tokens)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+from pathlib import Path
+from typing import Any
+
+# Add fastapi to path (so we can import the RAG helpers)
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from config import Settings  # type: ignore
+from rag.client_qdrant import (  # type: ignore
+    EXTERNAL,
+    INTERNAL,
+    SearchPlanItem,
+    base_collection,
+    search_many,
+)
+from rag.embeddings import embed_batch  # type: ignore
+from rag.fusion import fuse_rankings  # type: ignore
+from rag.keyword_index import KeywordIndex  # type: ignore
+
+
+def parse_args(settings: Settings) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Measure the recall gain of the BM25 keyword source")
+    p.add_argument("queries", help="Labeled query set (JSONL with query / relevant)")
+    p.add_argument("--index", default=settings.keyword_index_path)
+    p.add_argument("--k", type=int, action="append", default=None, help="recall@k cut-off")
+    p.add_argument("--show-changes", action="store_true")
+    return p.parse_args()
+
+
+def load_queries(path: str) -> list[dict[str, Any]]:
+    queries = []
+    with Path(path).open(encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not record.get("query") or not record.get("relevant"):
+                raise SystemExit(f"✗ {path}:{lineno}: needs non-empty 'query' and 'relevant'")
+            queries.append(record)
+    return queries
+
+
+def hit_key(hit: Any) -> str:
+    metadata = (hit.payload or {}).get("metadata") or {}
+    return str(metadata.get("doc_id") or hit.id)
+
+
+def recall(ranked: list[Any], relevant: set[str], k: int) -> float:
+    found = {hit_key(hit) for hit in ranked[:k]}
+    return len(found & relevant) / len(relevant)
+
+
+def main() -> int:
+    settings = Settings()
+    args = parse_args(settings)
+    cutoffs = sorted(set(args.k or [5, 10]))
+    depth = max(cutoffs)
+    queries = load_queries(args.queries)
+    index = KeywordIndex(args.index)
+    print(
+        f"{len(queries)} queries, keyword index {args.index} "
+        f"({len(index)} documents of {', '.join(index.collections)})"
+    )
+
+    plan = [
+        SearchPlanItem(INTERNAL, depth, name="internal"),
+        SearchPlanItem(EXTERNAL, depth, name="external"),
+        *(
+            SearchPlanItem(c, depth, name=base_collection(c))
+            for c in settings.search_fusion_collections
+        ),
+    ]
+    vectors = embed_batch([q["query"] for q in queries])
+    scores: dict[str, dict[int, list[float]]] = {
+        method: {k: [] for k in cutoffs} for method in ("dense", "keyword", "fused")
+    }
+    changes = []
+    for query, vector in zip(queries, vectors, strict=True):
+        relevant = {str(r) for r in query["relevant"]}
+        rankings = search_many(vector, plan)
+        keyword = index.search(query["query"], depth)
+        ranked = {
+            "dense": [
+                hit for hit, _, _ in fuse_rankings(rankings, settings.rrf_weights, settings.rrf_k)
+            ],
+            "keyword": keyword,
+            "fused": [
+                hit
+                for hit, _, _ in fuse_rankings(
+                    {**rankings, "keyword": keyword}, settings.rrf_weights, settings.rrf_k
+                )
+            ],
+        }
+        for method, hits in ranked.items():
+            for k in cutoffs:
+                scores[method][k].append(recall(hits, relevant, k))
+        before, after = scores["dense"][depth][-1], scores["fused"][depth][-1]
+        if before != after:
+            changes.append((after - before, query["query"], before, after))
+
+    print()
+    print(f"{'recall':<12}" + "".join(f"{'@' + str(k):>10}" for k in cutoffs))
+    for method, label in (("dense", "vector"), ("keyword", "bm25"), ("fused", "vector+bm25")):
+        means = [statistics.fmean(scores[method][k]) for k in cutoffs]
+        print(f"{label:<12}" + "".join(f"{m:>10.3f}" for m in means))
+    gains = [
+        statistics.fmean(scores["fused"][k]) - statistics.fmean(scores["dense"][k]) for k in cutoffs
+    ]
+    print(f"{'gain':<12}" + "".join(f"{g:>+10.3f}" for g in gains))
+
+    improved = sum(delta > 0 for delta, *_ in changes)
+    print(f"\n@{depth}: {improved} queries improved, {len(changes) - improved} regressed")
+    if args.show_changes:
+        for delta, text, before, after in sorted(changes, reverse=True):
+            print(f"  {delta:+.2f}  {before:.2f} -> {after:.2f}  {text}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Bulk ingestion tool for FreeHekim RAG
+
+Streams JSONL / Markdown documents, chunks them, embeds new chunks with
+embed_batch and upserts them into a Qdrant collection in parallel batches.
+Re-runs are idempotent (content-hash point IDs): unchanged chunks are skipped.
+
+--incremental diffs the inputs against a local manifest (document hashes,
+chunking, embedding model), embeds only new/changed documents, deletes the
+points of changed and removed documents by filter and prints a cost and time
+estimate before doing anything.
+After an embedding model or chunking change it refuses to run unless the
+paths cover every document in the manifest.
+
+--keyword-index DIR rebuilds the local BM25 keyword index afterwards from the
+collection's payloads in Qdrant (plus any collections the index already
+covers), so it reflects the deletions of an incremental run as well.
+
+Usage:
+  python tools/ingest.py data/articles/ --collection internal
+  python tools/ingest.py data/pubmed.jsonl --collection external --checkpoint .ingest-external.json
+  python tools/ingest.py data/articles/ --collection internal --incremental --dry-run
+  python tools/ingest.py data/articles/ --collection internal --keyword-index data/keyword-index/bm25
+
+Options:
+  --collection internal|external|<name>   Target collection (default: internal)
+  --chunk-size N                          Max characters per chunk (default: 1200)
+  --chunk-overlap N                       Overlap characters between chunks (default: 150)
+  --embed-group N                         Chunks per embed_batch call (default: 256)
+  --upsert-batch N                        Points per upsert request (default: 128)
+  --upsert-workers N                      Parallel upsert requests (default: 4)
+  --checkpoint PATH                       Resume file for long runs (optional)
+  --incremental                           Only apply the diff against the manifest
+  --manifest PATH                         Manifest file (default: .ingest-manifest-<collection>.json)
+  --dry-run                               Print the incremental plan and estimate, then exit
+  --price-per-1m USD                      Embedding price override for the estimate
+  --keyword-index DIR                     Rebuild the BM25 keyword index at DIR afterwards
+
+Notes:
+  - Reads config from repo .env via Settings (fastapi/config.py)
+  - Collections must exist with the right dimension (tools/qdrant_reset.py)
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Add fastapi to path (so we can import the RAG helpers)
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag.client_qdrant import EXTERNAL, INTERNAL, get_qdrant_client  # type: ignore
+from rag.incremental import (  # type: ignore
+    Manifest,
+    default_manifest_path,
+    embedding_price_per_1m,
+    ingest_incremental,
+    plan_incremental,
+)
+from rag.ingest import (  # type: ignore
+    DEFAULT_CHUNK_OVERLAP,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_EMBED_GROUP,
+    DEFAULT_UPSERT_BATCH,
+    DEFAULT_UPSERT_WORKERS,
+    IngestStats,
+    ingest,
+)
+from rag.keyword_index import build_keyword_index, indexed_collections  # type: ignore
+
+ALIASES = {"internal": INTERNAL, "external": EXTERNAL}
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Ingest documents into FreeHekim Qdrant collections")
+    p.add_argument("paths", nargs="+", help="JSONL/Markdown files or directories")
+    p.add_argument("--collection", default="internal", help="internal | external | collection name")
+    p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    p.add_argument("--chunk-overlap", type=int, default=DEFAULT_CHUNK_OVERLAP)
+    p.add_argument("--embed-group", type=int, default=DEFAULT_EMBED_GROUP)
+    p.add_argument("--upsert-batch", type=int, default=DEFAULT_UPSERT_BATCH)
+    p.add_argument("--upsert-workers", type=int, default=DEFAULT_UPSERT_WORKERS)
+    p.add_argument("--checkpoint", default=None, help="Checkpoint file to resume long runs")
+    p.add_argument("--incremental", action="store_true", help="Apply only the manifest diff")
+    p.add_argument("--manifest", default=None, help="Manifest file for --incremental")
+    p.add_argument("--dry-run", action="store_true", help="Print the incremental plan and exit")
+    p.add_argument("--price-per-1m", type=float, default=None, help="USD per 1M tokens")
+    p.add_argument("--keyword-index", default=None, help="Rebuild the BM25 index at this path")
+    args = p.parse_args()
+    if args.incremental and args.checkpoint:
+        p.error("--checkpoint cannot be combined with --incremental (re-runs are cheap)")
+    if args.dry_run and not args.incremental:
+        p.error("--dry-run requires --incremental")
+    return args
+
+
+def report(stats: IngestStats) -> None:
+    print(f"  … {stats.summary()}", flush=True)
+
+
+def format_duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f}min"
+    return f"{seconds / 3600:.1f}h"
+
+
+def rebuild_keyword_index(path: str, collection: str) -> None:
+    collections = indexed_collections(path)
+    if collection not in collections:
+        collections.append(collection)
+    count = build_keyword_index(get_qdrant_client(), collections, path)
+    print(f"- Keyword index: {count} documents of {', '.join(collections)} at {path}")
+
+
+def run_incremental(args: argparse.Namespace, collection: str) -> int:
+    manifest_path = args.manifest or default_manifest_path(collection)
+    manifest = Manifest.load(manifest_path, collection)
+    print(f"- Manifest: {manifest_path} ({len(manifest.documents)} docs)")
+
+    client = get_qdrant_client()
+    plan = plan_incremental(
+        args.paths, manifest, args.chunk_size, args.chunk_overlap, client=client
+    )
+    price = args.price_per_1m if args.price_per_1m is not None else embedding_price_per_1m()
+    cost = plan.estimated_cost(price)
+    measured = "measured" if manifest.tokens_per_second else "assumed"
+
+    print("Incremental plan:")
+    print(f"- {plan.summary()}")
+    if plan.reason:
+        print(f"- All documents re-processed: {plan.reason}")
+    if plan.rebuild_error:
+        print(f"- Cannot apply: {plan.rebuild_error}")
+    print(
+        f"- Estimated cost: {'unknown (pass --price-per-1m)' if cost is None else f'${cost:.4f}'}"
+    )
+    print(
+        f"- Estimated embedding time: {format_duration(plan.estimated_seconds(manifest.tokens_per_second))}"
+        f" ({measured} throughput)"
+    )
+    if args.dry_run:
+        print("Dry run: nothing changed.")
+        return 0
+    if plan.rebuild_error:
+        return 1
+    if not plan.delta and not plan.deleted:
+        print("Nothing to do.")
+        return 0
+
+    stats = ingest_incremental(
+        args.paths,
+        collection,
+        manifest_path,
+        plan=plan,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        embed_group=args.embed_group,
+        upsert_batch=args.upsert_batch,
+        upsert_workers=args.upsert_workers,
+        client=client,
+        progress=report,
+    )
+    print("Done.")
+    print(f"- {stats.summary()}")
+    if args.keyword_index:
+        rebuild_keyword_index(args.keyword_index, collection)
+    return 0
+
+
+def main() -> int:
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    collection = ALIASES.get(args.collection, args.collection)
+
+    print("Ingestion plan:")
+    print(f"- Sources: {', '.join(args.paths)}")
+    print(f"- Collection: {collection}")
+    print(f"- Chunking: {args.chunk_size} chars, overlap {args.chunk_overlap}")
+    if args.checkpoint:
+        print(f"- Checkpoint: {args.checkpoint}")
+    if args.incremental:
+        return run_incremental(args, collection)
+
+    stats = ingest(
+        args.paths,
+        collection,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        embed_group=args.embed_group,
+        upsert_batch=args.upsert_batch,
+        upsert_workers=args.upsert_workers,
+        checkpoint=args.checkpoint,
+        progress=report,
+    )
+
+    print("Done.")
+    print(f"- {stats.summary()}")
+    if stats.invalid_records:
+        print(f"- Skipped {stats.invalid_records} invalid records (see warnings)")
+    if args.keyword_index:
+        rebuild_keyword_index(args.keyword_index, collection)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
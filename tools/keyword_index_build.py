@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+BM25 keyword index build for FreeHekim RAG
+
+Scrolls the `text` payload of one or more Qdrant collections into the local
+BM25 index the API searches next to the vector collections
+(KEYWORD_INDEX_ENABLED, see fastapi/rag/keyword_index.py). The new copy
+replaces the old one atomically; a running API reopens it on its next search.
+`tools/ingest.py --keyword-index DIR` runs the same build after ingestion.
+
+Usage:
+  python tools/keyword_index_build.py
+  python tools/keyword_index_build.py --collection internal --output /srv/freehekim-rag/keyword-index/bm25
+  python tools/keyword_index_build.py --status
+
+Options:
+  --collection internal|external|<name>   Collection or alias to index; repeatable
+                                          (default: internal and external)
+  --output DIR                            Index directory (default: KEYWORD_INDEX_PATH)
+  --status                                Show the current index and exit
+
+Notes:
+  - Reads config from repo .env via Settings (fastapi/config.py)
+  - Only payloads are read (no vectors); one index covers all given collections
+  - Set KEYWORD_INDEX_ENABLED=true on the API to use the index
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add fastapi to path (so we can import the RAG helpers)
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from config import Settings  # type: ignore
+from rag.client_qdrant import EXTERNAL, INTERNAL, get_qdrant_client  # type: ignore
+from rag.collection_config import format_bytes  # type: ignore
+from rag.keyword_index import KeywordIndex, build_keyword_index  # type: ignore
+
+ALIASES = {"internal": INTERNAL, "external": EXTERNAL}
+
+
+def parse_args(settings: Settings) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Build the local BM25 keyword index from Qdrant")
+    p.add_argument(
+        "--collection",
+        action="append",
+        default=None,
+        help="internal | external | name (repeatable)",
+    )
+    p.add_argument("--output", default=settings.keyword_index_path)
+    p.add_argument("--status", action="store_true", help="Show the current index and exit")
+    return p.parse_args()
+
+
+def show_status(path: Path) -> int:
+    if not (path / "meta.json").exists():
+        print(f"✗ No keyword index at {path}")
+        return 1
+    index = KeywordIndex(path)
+    size = sum(f.stat().st_size for f in path.iterdir())
+    meta = index.meta
+    print(f"{path}: {len(index)} documents of {', '.join(index.collections)}")
+    print(
+        f"- {meta['terms']} terms, {meta['postings']} postings, "
+        f"{meta['avg_doc_length']:.0f} tokens/doc, {format_bytes(size)}"
+    )
+    print(f"- built at {meta['built_at']}")
+    return 0
+
+
+def main() -> int:
+    settings = Settings()
+    args = parse_args(settings)
+    output = Path(args.output)
+    if args.status:
+        return show_status(output)
+
+    names = args.collection or ["internal", "external"]
+    collections = [ALIASES.get(name, name) for name in names]
+    client = get_qdrant_client()
+    t0 = time.perf_counter()
+
+    def _progress(done: int) -> None:
+        print(f"\r  {done} documents", end="", flush=True)
+
+    count = build_keyword_index(client, collections, output, progress=_progress)
+    print()
+    print(
+        f"✓ Indexed {count} documents of {', '.join(collections)} to {output} "
+        f"in {time.perf_counter() - t0:.1f}s"
+    )
+    if not settings.keyword_index_enabled:
+        print("  (KEYWORD_INDEX_ENABLED is false; the API will not use it until enabled)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Local fallback index export for FreeHekim RAG
+
+Scrolls a Qdrant collection (vectors + search payload keys) into the
+memory-mapped index the API searches when Qdrant is down or slower than
+LOCAL_INDEX_LATENCY_BUDGET_SECONDS (see fastapi/rag/local_index.py). The new
+copy replaces the old one atomically; a running API reopens it on its next
+fallback search. Meant to run on a schedule
+(deployment/systemd/freehekim-rag-local-index.timer).
+
+Usage:
+  python tools/local_index_export.py
+  python tools/local_index_export.py --dtype int8 --output /srv/freehekim-rag/local-index
+  python tools/local_index_export.py --status
+
+Options:
+  --collection internal|external|<name>   Collection or alias to export (default: internal)
+  --output DIR                            Index directory (default: LOCAL_INDEX_PATH)
+  --dtype float32|int8                    Vector storage; int8 is 4x smaller (default: float32)
+  --limit N                               Export at most N points (default: all)
+  --status                                Show the current index and exit
+
+Notes:
+  - Reads config from repo .env via Settings (fastapi/config.py)
+  - Size: points x dimension x 4 bytes (float32) or x 1 byte (int8), plus payloads
+  - Set LOCAL_INDEX_ENABLED=true on the API to use the index
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add fastapi to path (so we can import the RAG helpers)
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from config import Settings  # type: ignore
+from rag.client_qdrant import EXTERNAL, INTERNAL, get_qdrant_client  # type: ignore
+from rag.collection_config import format_bytes  # type: ignore
+from rag.local_index import INDEX_DTYPES, LocalIndex, export_index  # type: ignore
+
+ALIASES = {"internal": INTERNAL, "external": EXTERNAL}
+
+
+def parse_args(settings: Settings) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Export a Qdrant collection to the local fallback index"
+    )
+    p.add_argument("--collection", default="internal", help="internal | external | name")
+    p.add_argument("--output", default=settings.local_index_path)
+    p.add_argument("--dtype", choices=INDEX_DTYPES, default="float32")
+    p.add_argument("--limit", type=int, default=None)
+    p.add_argument("--status", action="store_true", help="Show the current index and exit")
+    return p.parse_args()
+
+
+def show_status(path: Path) -> int:
+    if not (path / "meta.json").exists():
+        print(f"✗ No local index at {path}")
+        return 1
+    index = LocalIndex(path)
+    size = sum(f.stat().st_size for f in path.iterdir())
+    meta = index.meta
+    print(f"{path}: {len(index)} points of {index.collection}")
+    print(
+        f"- dimension {index.dimension}, {meta['distance']}, {meta['dtype']}, {format_bytes(size)}"
+    )
+    print(f"- exported at {meta['exported_at']}")
+    return 0
+
+
+def main() -> int:
+    settings = Settings()
+    args = parse_args(settings)
+    output = Path(args.output)
+    if args.status:
+        return show_status(output)
+
+    collection = ALIASES.get(args.collection, args.collection)
+    client = get_qdrant_client()
+    t0 = time.perf_counter()
+
+    def _progress(done: int) -> None:
+        print(f"\r  {done} points", end="", flush=True)
+
+    count = export_index(
+        client, collection, output, dtype=args.dtype, limit=args.limit, progress=_progress
+    )
+    print()
+    print(
+        f"✓ Exported {count} points of {collection} to {output} in {time.perf_counter() - t0:.1f}s"
+    )
+    if not settings.local_index_enabled:
+        print("  (LOCAL_INDEX_ENABLED is false; the API will not use it until enabled)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
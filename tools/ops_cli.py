@@ -253,6 +253,9 @@ class OpsCLI:
             self.output_lines.append(
                 "Not: Bu değerler genel amaçlıdır. p95 gecikme ve doğruluğu grafikten izleyerek kademeli ayarlayın."
             )
+            self.output_lines.append(
+                "Ölçüme dayalı öneri (recall@k + p50/p95/p99): python tools/qdrant_tune.py"
+            )
         except Exception as e:
             self.print_err(f"Öneri hesaplanamadı: {e}")
 
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Zero-downtime (blue/green) reindex tool for FreeHekim RAG
+
+Builds a new versioned collection (<alias>__v<timestamp>) while the live one
+keeps serving, waits for indexing, warms it, validates point counts and a
+sampled recall check, then atomically switches the alias that the API's
+INTERNAL/EXTERNAL names resolve to. The previous version is kept for
+instant rollback.
+
+Usage:
+  python tools/qdrant_reindex.py --collection internal --from-paths data/articles/
+  python tools/qdrant_reindex.py --collection internal          # copy live points (no re-embedding)
+  python tools/qdrant_reindex.py --collection internal --status
+  python tools/qdrant_reindex.py --collection internal --rollback
+
+Options:
+  --collection internal|external|<name>   Alias to rebuild (default: internal)
+  --from-paths PATH [PATH ...]            Re-ingest JSONL/Markdown sources (default: copy live points)
+  --dimension N                           Vector size for --from-paths (default: from model)
+  --distance cosine|dot|euclid            Vector distance (default: live collection's, else cosine)
+  --samples N / --k N                     Recall check queries and depth (default: 50 / 10)
+  --min-recall X                          Minimum ANN recall@k vs exact search (default: 0.9)
+  --min-count-ratio X                     Minimum points vs live version (default: 0.95)
+  --keep N                                Versions to keep after the swap (default: 2)
+  --status                                Show versions and the live target
+  --rollback                              Point the alias at the previous version
+  -y, --yes                               Skip confirmation prompt before the swap
+  Storage/index options of tools/qdrant_reset.py (--quantization, --on-disk-vectors, --hnsw-m, …)
+  override the live collection's layout for the new version.
+
+Notes:
+  - Reads config from repo .env via Settings (fastapi/config.py)
+  - The first swap migrates a plain collection into a version (brief gap)
+  - A build that fails validation is kept for inspection and never swapped in
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Add fastapi to path (so we can import the RAG helpers)
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from qdrant_client.models import Distance  # type: ignore
+
+from rag.client_qdrant import EXTERNAL, INTERNAL, get_qdrant_client  # type: ignore
+from rag.collection_config import (  # type: ignore
+    CollectionOptions,
+    add_collection_arguments,
+    options_from_args,
+)
+from rag.embeddings import get_embedding_dimension  # type: ignore
+from rag.incremental import Manifest, default_manifest_path, ingest_incremental  # type: ignore
+from rag.reindex import (  # type: ignore
+    alias_target,
+    copy_points,
+    create_version,
+    is_plain_collection,
+    list_versions,
+    prune_versions,
+    rollback,
+    swap_alias,
+    validate_version,
+    wait_until_indexed,
+    warm,
+)
+
+ALIASES = {"internal": INTERNAL, "external": EXTERNAL}
+DISTANCES = {"cosine": Distance.COSINE, "dot": Distance.DOT, "euclid": Distance.EUCLID}
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Blue/green reindex of FreeHekim Qdrant collections")
+    p.add_argument("--collection", default="internal", help="internal | external | alias name")
+    p.add_argument("--from-paths", nargs="+", default=None, help="Re-ingest these sources")
+    p.add_argument("--dimension", type=int, default=0)
+    p.add_argument("--distance", choices=sorted(DISTANCES), default=None)
+    p.add_argument("--samples", type=int, default=50)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--min-recall", type=float, default=0.9)
+    p.add_argument("--min-count-ratio", type=float, default=0.95)
+    p.add_argument("--keep", type=int, default=2)
+    p.add_argument(
+        "--index-timeout", type=float, default=600.0, help="Seconds to wait for indexing"
+    )
+    p.add_argument("--status", action="store_true", help="Show versions and exit")
+    p.add_argument("--rollback", action="store_true", help="Switch back to the previous version")
+    p.add_argument("-y", "--yes", action="store_true", help="Skip confirmation prompt")
+    add_collection_arguments(p)
+    return p.parse_args()
+
+
+def show_status(client, alias: str) -> int:
+    live = alias_target(client, alias)
+    if live is None:
+        kind = "plain collection (not migrated)" if client.collection_exists(alias) else "missing"
+        print(f"{alias}: {kind}")
+    else:
+        print(f"{alias} -> {live}")
+    for name in list_versions(client, alias):
+        marker = "*" if name == live else " "
+        print(f" {marker} {name}: {client.count(name, exact=True).count} points")
+    return 0
+
+
+def main() -> int:
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    alias = ALIASES.get(args.collection, args.collection)
+    client = get_qdrant_client()
+
+    if args.status:
+        return show_status(client, alias)
+    if args.rollback:
+        target = rollback(client, alias)
+        print(f"Rolled back: {alias} -> {target}")
+        return 0
+
+    live = alias_target(client, alias) or (alias if is_plain_collection(client, alias) else None)
+    live_info = client.get_collection(live) if live else None
+    live_params = live_info.config.params.vectors if live_info else None
+    base = CollectionOptions.from_collection_info(live_info) if live_info else CollectionOptions()
+    options = base.merged(options_from_args(args))
+    if args.from_paths:
+        dim = args.dimension or get_embedding_dimension()
+    elif live_params is not None:
+        dim = live_params.size  # type: ignore[union-attr]
+    else:
+        print(f"✗ {alias} does not exist; pass --from-paths to build it from sources")
+        return 1
+    if args.distance:
+        distance = DISTANCES[args.distance]
+    else:
+        distance = live_params.distance if live_params is not None else Distance.COSINE  # type: ignore[union-attr]
+
+    print("Reindex plan:")
+    print(f"- Alias: {alias} (live: {live or '-'})")
+    print(f"- Source: {', '.join(args.from_paths) if args.from_paths else f'copy of {live}'}")
+    print(f"- Dimension: {dim}, distance: {distance}")
+    print(f"- Storage: {options.describe()}")
+
+    build = create_version(client, alias, dim, distance, options=options)
+    print(f"Building {build} …")
+    build_manifest = None
+    if args.from_paths:
+        build_manifest = default_manifest_path(build)
+        stats = ingest_incremental(args.from_paths, build, build_manifest, client=client)
+        expected = stats.upserted
+        print(f"- {stats.summary()}")
+    else:
+        expected = copy_points(client, live, build)
+        print(f"- Copied {expected} points")
+
+    if not wait_until_indexed(client, build, timeout=args.index_timeout):
+        print(f"✗ {build} still indexing after {args.index_timeout:.0f}s; not swapped")
+        return 1
+    warmed = warm(client, build, queries=args.samples, k=args.k)
+    print(f"- Warmed with {warmed} queries")
+
+    report = validate_version(
+        client,
+        build,
+        expected,
+        live=live,
+        min_count_ratio=args.min_count_ratio,
+        samples=args.samples,
+        k=args.k,
+        min_recall=args.min_recall,
+    )
+    print(f"- Validation: {report.summary()}")
+    if not report.ok:
+        for error in report.errors:
+            print(f"✗ {error}")
+        print(f"✗ Not swapped; {build} kept for inspection")
+        return 1
+
+    if not args.yes:
+        ans = input(f"Switch {alias} -> {build}? (yes/NO) ").strip().lower()
+        if ans != "yes":
+            print(f"Aborted; {build} kept (not live).")
+            return 1
+
+    previous = swap_alias(client, alias, build)
+    print(f"✓ {alias} -> {build} (rollback target: {previous or '-'})")
+
+    if build_manifest is not None:
+        manifest = Manifest.load(build_manifest, build)
+        manifest.collection = alias
+        manifest.save(default_manifest_path(alias))
+        Path(build_manifest).unlink(missing_ok=True)
+
+    removed = prune_versions(client, alias, keep=args.keep)
+    if removed:
+        print(f"- Pruned: {', '.join(removed)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -14,8 +14,24 @@ Options:
   --distance cosine|dot|euclid                          Vector distance (default: cosine)
   -y, --yes                                             Skip confirmation prompt
 
+Storage / index options (omitted = Qdrant default):
+  --quantization none|scalar|product|binary             Quantized copy of the vectors for search
+  --[no-]quantization-always-ram                        Keep quantized vectors in RAM
+  --scalar-quantile 0.99                                Scalar (int8) calibration quantile
+  --product-compression x4|x8|x16|x32|x64               Product quantization ratio
+  --[no-]on-disk-vectors / --[no-]on-disk-payload       mmap originals / payload from disk
+  --hnsw-m N --hnsw-ef-construct N --[no-]hnsw-on-disk  HNSW graph parameters
+  --indexing-threshold KB --default-segment-number N --max-segment-size KB   Optimizer thresholds
+
+  Small VPS example (vectors on disk, int8 copy in RAM, rescored at query time):
+    python tools/qdrant_reset.py --yes --quantization scalar --scalar-quantile 0.99 \
+      --quantization-always-ram --on-disk-vectors --on-disk-payload
+  Search-time rescoring/oversampling: QDRANT_QUANTIZATION_RESCORE / QDRANT_QUANTIZATION_OVERSAMPLING
+
 Notes:
   - Reads config from repo .env via Settings (fastapi/config.py)
+  - Collections served through an alias are skipped; rebuild those without
+    downtime with tools/qdrant_reindex.py
   - Requires Qdrant to be reachable (docker compose up)
 """
 from __future__ import annotations
@@ -28,10 +44,11 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
 
 from config import Settings  # type: ignore
+from rag.collection_config import add_collection_arguments, options_from_args  # type: ignore
 from rag.embeddings import get_embedding_dimension  # type: ignore
 
 from qdrant_client import QdrantClient  # type: ignore
-from qdrant_client.models import Distance, VectorParams  # type: ignore
+from qdrant_client.models import Distance, PayloadSchemaType  # type: ignore
 
 
 def parse_args() -> argparse.Namespace:
@@ -56,6 +73,7 @@ def parse_args() -> argparse.Namespace:
         help="Vector distance (default: cosine)",
     )
     p.add_argument("-y", "--yes", action="store_true", help="Skip confirmation prompt")
+    add_collection_arguments(p)
     return p.parse_args()
 
 
@@ -77,12 +95,16 @@ def main() -> int:
     cols = [c.strip() for c in args.collections.split(",") if c.strip()]
     dim = args.dimension or get_embedding_dimension()
     dist = to_distance(args.distance)
+    options = options_from_args(args)
 
     print("Qdrant reset plan:")
     print(f"- Host: {settings.qdrant_host}:{settings.qdrant_port} (https={settings.use_https})")
+    if settings.qdrant_prefer_grpc:
+        print(f"- Transport: gRPC (port {settings.qdrant_grpc_port})")
     print(f"- Collections: {', '.join(cols)}")
     print(f"- Dimension: {dim}")
     print(f"- Distance: {args.distance}")
+    print(f"- Storage: {options.describe()}")
 
     if not args.yes:
         ans = input("This will DELETE and RECREATE the collections. Continue? (yes/NO) ").strip().lower()
@@ -92,13 +114,7 @@ def main() -> int:
 
     # Build client with fallback for host network context (host vs container)
     def build_client(host: str) -> QdrantClient:
-        return QdrantClient(
-            host=host,
-            port=settings.qdrant_port,
-            api_key=settings.get_qdrant_api_key(),
-            https=settings.use_https,
-            timeout=settings.qdrant_timeout,
-        )
+        return QdrantClient(**settings.get_qdrant_client_kwargs(host))
 
     client: QdrantClient
     try:
@@ -113,8 +129,13 @@ def main() -> int:
         else:
             raise
 
+    aliases = {a.alias_name: a.collection_name for a in client.get_aliases().aliases}
+
     # Drop and recreate
     for name in cols:
+        if name in aliases:
+            print(f"(skip) {name} is an alias of {aliases[name]}; use tools/qdrant_reindex.py")
+            continue
         try:
             print(f"Deleting collection: {name} …")
             client.delete_collection(name)
@@ -122,10 +143,9 @@ def main() -> int:
             print(f"  (skip) delete failed or not exists: {e}")
 
         print(f"Creating collection: {name} (dim={dim}, distance={args.distance}) …")
-        client.recreate_collection(
-            collection_name=name,
-            vectors_config=VectorParams(size=dim, distance=dist),
-        )
+        client.recreate_collection(collection_name=name, **options.create_kwargs(dim, dist))
+        # Keyword index for incremental re-indexing (delete by metadata.doc_id)
+        client.create_payload_index(name, "metadata.doc_id", PayloadSchemaType.KEYWORD)
         print(f"  OK: {name}")
 
     print("Done.")
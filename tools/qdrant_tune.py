@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Search parameter tuner for FreeHekim RAG (ef_search / rescoring sweep)
+
+Samples stored vectors from each collection as queries, computes exact top-k
+ground truth (exact=True), then sweeps hnsw_ef (and rescoring/oversampling on
+quantized collections) measuring recall@k and p50/p95/p99 latency. Prints the
+Pareto front and writes the recommended settings as an .env suggestion next to
+the Ops CLI profiles (docs/env-suggestions/).
+
+Usage:
+  python tools/qdrant_tune.py
+  python tools/qdrant_tune.py --collection internal --target-recall 0.98
+  python tools/qdrant_tune.py --ef 32 64 128 --samples 200 --repeats 3 --all
+
+Options:
+  --collection NAME [NAME ...]   internal | external | collection/alias (default: internal external)
+  --samples N                    Sampled query vectors per collection (default: 100)
+  --k N                          Recall depth (default: 10)
+  --ef N [N ...]                 hnsw_ef values (default: 16 32 64 128 256 512)
+  --oversampling X [X ...]       Oversampling values for quantized collections (default: 1 2 4)
+  --repeats N                    Timed runs per query (default: 1)
+  --target-recall X              Recall@k for the recommendation (default: 0.95)
+  --fast-recall X                Recall@k for SEARCH_FAST_HNSW_EF (default: 0.9)
+  --all                          Print every measured setting, not only the Pareto front
+  --no-write                     Do not write the .env suggestion file
+
+Notes:
+  - Reads config from repo .env via Settings (fastapi/config.py)
+  - Latency is per request from this machine; run it where the API runs
+  - Local/in-process Qdrant ignores HNSW and quantization (recall is always 1.0)
+  - The suggestion file is never applied automatically
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add fastapi to path (so we can import the RAG helpers)
+sys.path.insert(0, str(Path(__file__).parent.parent / "fastapi"))
+
+from rag.client_qdrant import EXTERNAL, INTERNAL, get_qdrant_client  # type: ignore
+from rag.collection_config import CollectionOptions  # type: ignore
+from rag.tuning import (  # type: ignore
+    DEFAULT_EF_VALUES,
+    DEFAULT_OVERSAMPLING,
+    TuningResult,
+    candidate_tunings,
+    env_profile,
+    pareto_front,
+    recommend,
+    sweep,
+)
+
+ALIASES = {"internal": INTERNAL, "external": EXTERNAL}
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Sweep Qdrant search params for recall vs latency")
+    p.add_argument("--collection", nargs="+", default=["internal", "external"])
+    p.add_argument("--samples", type=int, default=100)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--ef", type=int, nargs="+", default=list(DEFAULT_EF_VALUES))
+    p.add_argument("--oversampling", type=float, nargs="+", default=list(DEFAULT_OVERSAMPLING))
+    p.add_argument("--repeats", type=int, default=1)
+    p.add_argument("--target-recall", type=float, default=0.95)
+    p.add_argument("--fast-recall", type=float, default=0.9)
+    p.add_argument("--all", action="store_true", help="Print every measured setting")
+    p.add_argument("--no-write", action="store_true", help="Do not write the .env suggestion")
+    return p.parse_args()
+
+
+def print_table(results: list[TuningResult], pareto: list[TuningResult], k: int) -> None:
+    print(f"  {'setting':<24} {f'recall@{k}':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for r in results:
+        marker = "*" if r in pareto else " "
+        print(
+            f"{marker} {r.label():<24} {r.recall:>9.3f} "
+            f"{r.p50_ms:>8.2f} {r.p95_ms:>8.2f} {r.p99_ms:>8.2f}"
+        )
+
+
+def write_suggestion(env: dict[str, str], notes: list[str]) -> Path:
+    now = datetime.now().strftime("%Y%m%d_%H%M")
+    outdir = Path(__file__).parent.parent / "docs" / "env-suggestions"
+    outdir.mkdir(parents=True, exist_ok=True)
+    path = outdir / f"env_suggestion_search_{now}.env"
+    lines = [
+        "# Auto-generated .env suggestion (manual apply)",
+        f"# {datetime.now().isoformat(timespec='minutes')}",
+        "# profile: search-tuned (tools/qdrant_tune.py)",
+        *[f"# {n}" for n in notes],
+        "",
+    ]
+    lines += [f"{k}={v}" for k, v in env.items()]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def main() -> int:
+    args = parse_args()
+    client = get_qdrant_client()
+
+    recommended: dict[str, TuningResult] = {}
+    fast: dict[str, TuningResult] = {}
+    accurate: dict[str, TuningResult] = {}
+    notes: list[str] = []
+    for arg in args.collection:
+        name = ALIASES.get(arg, arg)
+        if not client.collection_exists(name):
+            print(f"✗ {name}: not found, skipped")
+            continue
+        options = CollectionOptions.from_collection_info(client.get_collection(name))
+        quantized = options.quantization not in (None, "none")
+        tunings = candidate_tunings(args.ef, quantized, args.oversampling)
+        print(f"\n{name} ({options.describe()}): {len(tunings)} settings, {args.samples} samples")
+
+        results = sweep(client, name, tunings, samples=args.samples, k=args.k, repeats=args.repeats)
+        if not results:
+            print("  (empty collection, skipped)")
+            continue
+        pareto = pareto_front(results)
+        print_table(results if args.all else pareto, pareto, args.k)
+
+        best = recommend(results, args.target_recall)
+        recommended[name], fast[name] = best, recommend(results, args.fast_recall)
+        accurate[name] = recommend(results, max(r.recall for r in results))
+        met = "" if best.recall >= args.target_recall else f" (target {args.target_recall} not met)"
+        print(
+            f"→ recommended: {best.label()} | recall {best.recall:.3f}, p95 {best.p95_ms:.2f} ms{met}"
+        )
+        notes.append(
+            f"{name}: {best.label()} recall@{args.k}={best.recall:.3f} "
+            f"p50={best.p50_ms:.2f}ms p95={best.p95_ms:.2f}ms p99={best.p99_ms:.2f}ms"
+        )
+
+    if not recommended:
+        print("✗ Nothing measured")
+        return 1
+
+    env = env_profile(recommended, fast, accurate)
+    print("\nSuggested settings:")
+    for key, value in env.items():
+        print(f"  {key}={value}")
+    if not args.no_write:
+        path = write_suggestion(env, notes)
+        print(f"✓ Written: {path} (not applied to .env)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
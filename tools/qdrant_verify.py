@@ -10,9 +10,14 @@ Kullanım:
 
 Çıktı örneği:
   ✓ Beklenen dim: 1536
+  ✓ Bağlantı: REST (port 6333)
   ✓ freehekim_internal: 1536 dims, 12000 points
+    · Depolama: scalar quantization (int8, quantile 0.99, always_ram), vectors on disk
+    · Bellek (tahmini): vektör 70.3 MB, quantize 17.6 MB, HNSW 1.5 MB → RAM 19.0 MB, disk 70.3 MB
   ✓ freehekim_external: 1536 dims, 8540 points
   ✓ Hepsi uyumlu
+
+Bellek tahmini yalnızca vektörleri ve HNSW grafını kapsar (payload ve segment ek yükü hariç).
 """
 
 from __future__ import annotations
@@ -30,6 +35,12 @@ from rag.client_qdrant import (  # type: ignore  # noqa: E402
     EXTERNAL,
     INTERNAL,
     get_qdrant_client,
+    settings,
+)
+from rag.collection_config import (  # type: ignore  # noqa: E402
+    CollectionOptions,
+    estimate_memory,
+    format_bytes,
 )
 from rag.embeddings import get_embedding_dimension  # type: ignore  # noqa: E402
 
@@ -38,21 +49,39 @@ def main() -> int:
     expected = get_embedding_dimension()
     print(f"✓ Beklenen dim: {expected}")
 
+    transport = (
+        f"gRPC (port {settings.qdrant_grpc_port})"
+        if settings.qdrant_prefer_grpc
+        else f"REST (port {settings.qdrant_port})"
+    )
+    print(f"✓ Bağlantı: {transport}")
+
     client = get_qdrant_client()
 
-    def info(name: str) -> tuple[int, int]:
+    aliases = {a.alias_name: a.collection_name for a in client.get_aliases().aliases}
+
+    def info(name: str) -> tuple[int, int, CollectionOptions]:
         meta = client.get_collection(name)
         # qdrant_client 1.9.0: vectors config altından boyut
         size = meta.config.params.vectors.size  # type: ignore[attr-defined]
-        points = meta.points_count
-        return int(size), int(points)
+        points = meta.points_count or 0
+        return int(size), int(points), CollectionOptions.from_collection_info(meta)
 
     ok = True
     for name in (INTERNAL, EXTERNAL):
         try:
-            size, count = info(name)
+            size, count, options = info(name)
             status = "✓" if size == expected else "✗"
-            print(f"{status} {name}: {size} dims, {count} points")
+            target = f" → {aliases[name]}" if name in aliases else ""
+            print(f"{status} {name}{target}: {size} dims, {count} points")
+            mem = estimate_memory(count, size, options)
+            quantized = f", quantize {format_bytes(mem.quantized)}" if mem.quantized else ""
+            print(f"    · Depolama: {options.describe()}")
+            print(
+                f"    · Bellek (tahmini): vektör {format_bytes(mem.vectors)}{quantized}, "
+                f"HNSW {format_bytes(mem.hnsw)} → RAM {format_bytes(mem.ram)}, "
+                f"disk {format_bytes(mem.disk)}"
+            )
             if size != expected:
                 ok = False
         except Exception as e: